@@ -0,0 +1 @@
+# Synthetic benchmarks: python -m benchmarks.run
@@ -0,0 +1,209 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from scripts.core.executor import CommandResult
+from scripts.core.registry_backend import FakeRegistryBackend
+from scripts.core.registry_index import UNINSTALL_KEY
+from scripts.core.winget_scheduler import RUNTIME_CATEGORY
+
+CATEGORY_COUNT = 20
+# Makes the synthetic local installers look like NSIS, so they run with /S instead of as wizards
+NSIS_STUB = b'MZ' + b'\0' * 510 + b'NullsoftInst'
+
+
+def package_id(index):
+    return f"Bench.Package{index:05d}"
+
+
+def program_name(index):
+    return f"Bench Program {index:05d}"
+
+
+def category_name(index):
+    # Every tenth package is a runtime so the scheduler's dependency ordering gets exercised
+    if index % 10 == 0:
+        return RUNTIME_CATEGORY
+    return f"Category {index % CATEGORY_COUNT:02d}"
+
+
+def make_winget_catalog(size):
+    return {
+        program_name(index): {'category': category_name(index), 'Name': program_name(index), 'winget': package_id(index)}
+        for index in range(size)
+    }
+
+
+def make_uninstall_catalog(size):
+    return [{'name': f"Bench.App{index:05d}", 'name_program': f"Bench App {index:05d}"} for index in range(size)]
+
+
+def write_workspace(root, size):
+    # functions/ and Programs/ laid out like the real repository
+    os.makedirs(os.path.join(root, 'functions', 'install'))
+    os.makedirs(os.path.join(root, 'functions', 'uninstall'))
+    os.makedirs(os.path.join(root, 'cache'))
+    with open(os.path.join(root, 'functions', 'install', 'winget.json'), 'w', encoding='utf-8') as file:
+        json.dump(make_winget_catalog(size), file)
+    with open(os.path.join(root, 'functions', 'uninstall', 'uninstall.json'), 'w', encoding='utf-8') as file:
+        json.dump(make_uninstall_catalog(size), file)
+    for index in range(size):
+        folder = os.path.join(root, 'Programs', f"Category {index % CATEGORY_COUNT:02d}", f"Local Program {index:05d}")
+        os.makedirs(folder)
+        with open(os.path.join(folder, 'setup.exe'), 'wb') as file:
+            file.write(NSIS_STUB)
+
+
+def make_source_index(path, size, schema=2):
+    # A winget source index (Public/index.db) with `size` packages, laid out like schema 1.x
+    # (one manifest row per version) or 2.x (one row per package)
+    connection = sqlite3.connect(path)
+    with connection:
+        if schema == 2:
+            connection.executescript('''
+                CREATE TABLE packages(id TEXT NOT NULL, name TEXT NOT NULL, moniker TEXT, latest_version TEXT NOT NULL,
+                                      arp_min_version TEXT, arp_max_version TEXT, hash BLOB);
+                CREATE TABLE tags2(tag TEXT NOT NULL);
+                CREATE TABLE tags2_map(package INT64 NOT NULL, tag INT64 NOT NULL);
+                CREATE TABLE norm_publishers2(norm_publisher TEXT NOT NULL);
+                CREATE TABLE norm_publishers2_map(package INT64 NOT NULL, norm_publisher INT64 NOT NULL);
+            ''')
+            connection.executemany('INSERT INTO packages(rowid, id, name, moniker, latest_version) VALUES (?, ?, ?, ?, ?)', [
+                (index + 1, package_id(index), program_name(index), f"bench{index}", '1.10.0') for index in range(size)
+            ])
+            owner = 'package'
+        else:
+            connection.executescript('''
+                CREATE TABLE ids(id TEXT NOT NULL);
+                CREATE TABLE names(name TEXT NOT NULL);
+                CREATE TABLE monikers(moniker TEXT NOT NULL);
+                CREATE TABLE versions(version TEXT NOT NULL);
+                CREATE TABLE manifest(id INT64 NOT NULL, name INT64 NOT NULL, moniker INT64 NOT NULL, version INT64 NOT NULL,
+                                      channel INT64 NOT NULL, pathpart INT64 NOT NULL);
+                CREATE TABLE tags(tag TEXT NOT NULL);
+                CREATE TABLE tags_map(manifest INT64 NOT NULL, tag INT64 NOT NULL);
+                CREATE TABLE norm_publishers(norm_publisher TEXT NOT NULL);
+                CREATE TABLE norm_publishers_map(manifest INT64 NOT NULL, norm_publisher INT64 NOT NULL);
+                INSERT INTO versions(rowid, version) VALUES (1, '1.9.2'), (2, '1.10.0');
+            ''')
+            connection.executemany('INSERT INTO ids(rowid, id) VALUES (?, ?)', [(index + 1, package_id(index)) for index in range(size)])
+            connection.executemany('INSERT INTO names(rowid, name) VALUES (?, ?)', [(index + 1, program_name(index)) for index in range(size)])
+            connection.executemany('INSERT INTO monikers(rowid, moniker) VALUES (?, ?)', [(index + 1, f"bench{index}") for index in range(size)])
+            # Two versions per package, the tags and publisher hang off the latest one (even rowids)
+            connection.executemany('INSERT INTO manifest(rowid, id, name, moniker, version, channel, pathpart) VALUES (?, ?, ?, ?, ?, 0, 0)', [
+                (2 * index + version, index + 1, index + 1, index + 1, version) for index in range(size) for version in (1, 2)
+            ])
+            owner = 'manifest'
+        suffix = '2' if schema == 2 else ''
+        owners = [index + 1 if schema == 2 else 2 * index + 2 for index in range(size)]
+        connection.executemany(f"INSERT INTO tags{suffix}(rowid, tag) VALUES (?, ?)", [(1, 'bench'), (2, 'utility'), (3, 'browser')])
+        connection.executemany(f"INSERT INTO tags{suffix}_map({owner}, tag) VALUES (?, ?)", [
+            (owner_id, tag) for index, owner_id in enumerate(owners) for tag in (1, 2 + index % 2)
+        ])
+        connection.execute(f"INSERT INTO norm_publishers{suffix}(rowid, norm_publisher) VALUES (1, 'bench corp')")
+        connection.executemany(f"INSERT INTO norm_publishers{suffix}_map({owner}, norm_publisher) VALUES (?, 1)", [(owner_id,) for owner_id in owners])
+    connection.close()
+
+
+class FakeWinget:
+    # Keeps an installed set and answers winget the way the real CLI prints it
+    def __init__(self, size, installed_ratio=0.5, latency=0.0):
+        step = max(int(1 / installed_ratio), 1) if installed_ratio else 0
+        self.installed = {package_id(index) for index in range(size) if step and index % step == 0}
+        self.names = {package_id(index): program_name(index) for index in range(size)}
+        self.latency = latency
+        self.lock = threading.Lock()
+
+    def list_output(self):
+        rows = [(self.names.get(package_id_, package_id_), package_id_, '1.0.0', '1.1.0', 'winget')
+                for package_id_ in sorted(self.installed)]
+        header = ('Name', 'Id', 'Version', 'Available', 'Source')
+        widths = [max([len(header[column])] + [len(row[column]) for row in rows]) + 1 for column in range(len(header))]
+        lines = ['\r   - \r   \\ \r', ''.join(cell.ljust(width) for cell, width in zip(header, widths)), '-' * sum(widths)]
+        lines += [''.join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows]
+        return '\n'.join(lines) + '\n'
+
+    def run(self, command, on_output):
+        time.sleep(self.latency)
+        verb = command[1]
+        if verb == 'list':
+            with self.lock:
+                return CommandResult(command, 0, self.list_output())
+        if verb in ('install', 'upgrade', 'uninstall'):
+            package = command[command.index('--id') + 1]
+            for line in (f"Found {self.names.get(package, package)} [{package}] Version 1.1.0\n",
+                         'Downloading https://example.invalid/setup.exe\n', '  1.0 MB / 2.0 MB\r', '  2.0 MB / 2.0 MB\n',
+                         'Successfully verified installer hash\n', 'Starting package install...\n', 'Successfully installed\n'):
+                if on_output:
+                    on_output('stdout', line)
+            with self.lock:
+                if verb == 'uninstall':
+                    self.installed.discard(package)
+                else:
+                    self.installed.add(package)
+            return CommandResult(command, 0, 'Successfully installed\n')
+        if verb == 'export':
+            with self.lock:
+                packages = [{'PackageIdentifier': package_id_, 'Version': '1.0.0'} for package_id_ in sorted(self.installed)]
+            with open(command[command.index('--output') + 1], 'w', encoding='utf-8') as file:
+                json.dump({'Sources': [{'Packages': packages, 'SourceDetails': {'Name': 'winget'}}]}, file)
+            return CommandResult(command, 0, '')
+        if verb == 'import':
+            with open(command[command.index('--import-file') + 1], 'r', encoding='utf-8') as file:
+                manifest = json.load(file)
+            with self.lock:
+                for package in manifest['Sources'][0]['Packages']:
+                    self.installed.add(package['PackageIdentifier'])
+                    if on_output:
+                        on_output('stdout', f"Found {package['PackageIdentifier']} [{package['PackageIdentifier']}] Version 1.1.0\n")
+            return CommandResult(command, 0, '')
+        return CommandResult(command, 0, '')
+
+
+class FakePowerShell:
+    def __init__(self, size, installed_ratio=0.5):
+        step = max(int(1 / installed_ratio), 1) if installed_ratio else 0
+        self.packages = [
+            {'Name': f"Bench.App{index:05d}", 'PackageFullName': f"Bench.App{index:05d}_1.0.0.0_x64__bench",
+             'PackageFamilyName': f"Bench.App{index:05d}_bench", 'Version': '1.0.0.0'}
+            for index in range(size) if step and index % step == 1 % step
+        ]
+
+    def run(self, command, on_output):
+        script = command[-1]
+        if script.startswith('Get-AppxPackage |'):
+            return CommandResult(command, 0, json.dumps(self.packages))
+        return CommandResult(command, 0, '')
+
+
+def make_registry(size, installed_ratio=0.5):
+    step = max(int(1 / installed_ratio), 1) if installed_ratio else 0
+    keys = {}
+    for index in range(size):
+        if step and index % step == 0:
+            keys[f"{UNINSTALL_KEY}\\BenchApp{index:05d}"] = {
+                'DisplayName': f"Bench.App{index:05d}", 'DisplayVersion': '1.0', 'UninstallString': f'"C:\\Bench\\{index}\\uninstall.exe" /S',
+            }
+    # Plus the usual noise of a real machine
+    for index in range(size * 2):
+        keys[f"{UNINSTALL_KEY}\\Other{index:06d}"] = {'DisplayName': f"Unrelated Software {index}", 'UninstallString': 'x'}
+    return FakeRegistryBackend({'HKLM': keys})
+
+
+class FakeRunner:
+    # Plugged into executor.set_runner, so no real process is ever started
+    def __init__(self, winget, powershell, latency=0.0):
+        self.winget = winget
+        self.powershell = powershell
+        self.latency = latency
+
+    def __call__(self, command, shell, on_output):
+        if not shell and command and command[0] == 'winget':
+            return self.winget.run(command, on_output)
+        if not shell and command and command[0] == 'powershell':
+            return self.powershell.run(command, on_output)
+        # Local installers, msiexec, uninstall strings, gpupdate
+        time.sleep(self.latency)
+        return CommandResult(command, 0, '')
@@ -0,0 +1,260 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# python -m benchmarks.run [--sizes 10 1000 10000] [--output results.json]
+# Runs the real GUI code against fake winget, PowerShell and registry backends, so it works on any OS.
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import Qt, QT_VERSION_STR
+from PyQt5.QtWidgets import QApplication, QMessageBox
+
+from scripts.core import executor, registry_index, appx_inventory, installer_hashes, silent_install
+from scripts.core.inventory_cache import inventory_cache
+from scripts.core.program_catalog import program_catalog
+from scripts.core.winget_catalog import catalog_store
+from scripts.core.log_setup import configure_logging
+from scripts.package_model import IsCategoryRole
+from benchmarks.fakes import FakeWinget, FakePowerShell, FakeRunner, make_registry, make_source_index, write_workspace
+
+DEFAULT_SIZES = (10, 1000, 10000)
+# The install queues are capped, nobody selects 10,000 packages and the fake installs still cost real time
+DEFAULT_MAX_QUEUE = 200
+WAIT_TIMEOUT = 600
+
+
+class MessageLog:
+    # Stands in for the QMessageBox statics so nothing blocks; the queues report completion through them
+    def __init__(self):
+        self.titles = []
+
+    def install(self):
+        for name in ('information', 'warning', 'critical'):
+            setattr(QMessageBox, name, staticmethod(self._record))
+        QMessageBox.question = staticmethod(lambda *args, **kwargs: QMessageBox.Yes)
+
+    def _record(self, parent, title, *args, **kwargs):
+        self.titles.append(title)
+        return QMessageBox.Ok
+
+    def count(self, title):
+        return self.titles.count(title)
+
+
+def reset_core_state(size, installed_ratio, latency):
+    # The core keeps module level caches; every run starts from a cold machine
+    with inventory_cache.lock:
+        inventory_cache.index = None
+        inventory_cache.timestamp = 0
+        inventory_cache.pending_changes = []
+        inventory_cache.listeners = []
+        inventory_cache.refresh_thread = None
+    program_catalog.categories = None
+    program_catalog.program_categories = {}
+    installer_hashes.hash_cache.entries = None
+    silent_install._detected.clear()
+    registry_index.set_backend(make_registry(size, installed_ratio))
+    appx_inventory.invalidate_appx_index()
+    catalog_store.close()
+    executor.set_runner(FakeRunner(FakeWinget(size, installed_ratio, latency), FakePowerShell(size, installed_ratio), latency))
+
+
+def wait_until(app, condition, timeout=WAIT_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError('benchmark step did not finish')
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def timed(function):
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+
+def check_rows(proxy, count):
+    # Ticks the first `count` selectable program rows, like a user clicking their checkboxes would
+    checked = 0
+    for row in range(proxy.rowCount()):
+        if checked >= count:
+            break
+        index = proxy.index(row, 0)
+        if proxy.data(index, IsCategoryRole) or not proxy.flags(index) & Qt.ItemIsEnabled:
+            continue
+        proxy.setData(index, Qt.Checked, Qt.CheckStateRole)
+        checked += 1
+    return checked
+
+
+def uncheck_all(proxy):
+    proxy.clear_checks()
+
+
+def type_query(search_box, text):
+    # One filter pass per keystroke, the first one also builds the search index
+    for end in range(1, len(text) + 1):
+        search_box.setText(text[:end])
+    search_box.clear()
+
+
+def run_once(app, App, messages, size, args):
+    reset_core_state(size, args.installed_ratio, args.latency / 1000)
+    timings = {}
+
+    started = time.perf_counter()
+    window = App()
+    timings['startup'] = time.perf_counter() - started
+    wait_until(app, lambda: {'winget', 'registry', 'appx', 'programs'} <= window.inventoryReady)
+    timings['startup_to_inventory'] = time.perf_counter() - started
+
+    def reload_winget():
+        window.installedCountWinget = 0
+        window.loadWingetData()
+
+    def reload_folders():
+        # What the inventory worker does: revalidate Programs/ against the cache, then load the rows
+        window.loadFolders(program_catalog.refresh())
+
+    timings['loadWingetData'] = timed(reload_winget)
+    timings['applyWingetInventory'] = timed(window.applyWingetInventory)
+    timings['loadFolders'] = timed(reload_folders)
+    timings['applyFolderInventory'] = timed(window.applyFolderInventory)
+    timings['loadUninstallData'] = timed(window.loadUninstallData)
+    timings['applyUninstallInventory'] = timed(window.applyUninstallInventory)
+
+    timings['selectAllWinget'] = timed(lambda: window.selectAllWinget(Qt.Checked))
+    timings['selectAllWingetUpdaUnins'] = timed(lambda: window.selectAllWingetUpdaUnins(Qt.Checked))
+    timings['selectAll'] = timed(lambda: window.selectAll(Qt.Checked))
+    timings['selectAllUninstall'] = timed(lambda: window.selectAllUninstall(Qt.Checked))
+    timings['filterWinget'] = timed(lambda: type_query(window.searchBoxWinget, 'bench program 00012'))
+    make_source_index('index.db', size)
+    timings['catalogImport'] = timed(lambda: catalog_store.import_source_index('index.db'))
+    timings['catalogSearch'] = timed(lambda: type_query(window.searchBoxCatalog, 'bench program 00012'))
+    for proxy in (window.wingetInstallProxy, window.wingetUpdaUninsProxy, window.folderProxy, window.uninstallProxy):
+        uncheck_all(proxy)
+
+    queue = min(size, args.max_queue)
+
+    selected_counts = {}
+
+    def run_queue(name, proxy, start, title, prepare=None, count=queue):
+        selected = check_rows(proxy, count)
+        selected_counts[name] = selected
+        if not selected:
+            return 0
+        if prepare:
+            prepare()
+        finished = messages.count(title)
+        started = time.perf_counter()
+        start()
+        wait_until(app, lambda: messages.count(title) > finished)
+        timings[name] = time.perf_counter() - started
+        uncheck_all(proxy)
+        return selected
+
+    # Both winget install modes need packages that aren't installed yet, so they split the queue
+    run_queue('installQueueWinget', window.wingetInstallProxy, window.installSelectedWinget, 'Install',
+              prepare=lambda: window.bulkCheckboxWinget.setChecked(False), count=(queue + 1) // 2)
+    run_queue('installQueueWingetBulk', window.wingetInstallProxy, window.installSelectedWinget, 'Install',
+              prepare=lambda: window.bulkCheckboxWinget.setChecked(True), count=(queue + 1) // 2)
+    run_queue('updateQueueWinget', window.wingetUpdaUninsProxy, window.updateSelectedWingetUpdaUnins, 'Update')
+    run_queue('uninstallQueueWinget', window.wingetUpdaUninsProxy, window.uninstallSelectedWingetUpdaUnins, 'Uninstall')
+    run_queue('installQueueLocal', window.folderProxy, window.installSelected, 'Install')
+    run_queue('uninstallQueue', window.uninstallProxy, window.uninstallSelected, 'Uninstall')
+    # The Uninstall tab rescans the registry and Appx on a worker once the queue is done
+    wait_until(app, lambda: {'registry', 'appx'} <= window.inventoryReady)
+
+    inventory_cache.listeners = []
+    window.inventoryWorker.wait()
+    if getattr(window, 'uninstallRescanWorker', None) is not None:
+        window.uninstallRescanWorker.wait()
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return selected_counts, timings
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description='Time the loaders, select-all and install queues against fake backends.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='Number of synthetic packages per catalog')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per size, the median is reported')
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE, help='Programs selected for the install/uninstall queues')
+    parser.add_argument('--installed-ratio', type=float, default=0.5, help='Share of the catalog that starts out installed')
+    parser.add_argument('--latency', type=float, default=0.0, help='Milliseconds every fake command takes')
+    parser.add_argument('--output', help='Write the JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    stdout = sys.stdout
+    app = QApplication.instance() or QApplication([])
+    messages = MessageLog()
+    messages.install()
+    workspace_root = tempfile.mkdtemp(prefix='bench-')
+    results = []
+    try:
+        # Same queued pipeline as the GUI, with the log kept inside the scratch directory
+        os.chdir(workspace_root)
+        configure_logging(path=os.path.join(workspace_root, 'log.txt'), console=None)
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            from main import App
+            for size in args.sizes:
+                runs = []
+                for repeat in range(args.repeat):
+                    workspace = os.path.join(workspace_root, f"{size}-{repeat}")
+                    write_workspace(workspace, size)
+                    os.chdir(workspace)
+                    selected, timings = run_once(app, App, messages, size, args)
+                    runs.append(timings)
+                    print(f"size {size} run {repeat + 1}: {timings}", file=sys.stderr)
+                results.append({
+                    'size': size,
+                    'selected': selected,
+                    'timings': {name: statistics.median(run[name] for run in runs if name in run) for name in runs[0]},
+                    'runs': runs,
+                })
+    finally:
+        os.chdir(REPO_ROOT)
+        executor.set_runner(None)
+        shutil.rmtree(workspace_root, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'qt': QT_VERSION_STR,
+            'latency_ms': args.latency,
+            'installed_ratio': args.installed_ratio,
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        stdout.write(text + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,28 +1,42 @@
 import sys
 import os
-import subprocess
 import ctypes
 import logging
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QPushButton, QMessageBox, QProgressBar, QCheckBox, QLabel, QTabWidget
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QListView, QPushButton, QMessageBox, QProgressBar, QCheckBox, QLabel, QTabWidget, QLineEdit, QComboBox, QTableView, QAbstractItemView, QHeaderView
 
 from scripts.winget_manager import (
     loadWingetData, is_program_installed_winget, selectAllWinget, selectAllWingetUpdaUnins, 
-    categorySelectAllWinget, categorySelectAllWingetUpdaUnins, onItemChangedWinget, 
-    onItemChangedWingetUpdaUnins, installSelectedWinget, installNextWinget, 
+    installSelectedWinget, installNextWinget, applyWingetInventory, 
     onInstallFinishedWinget, updateCounterLabelWinget, uninstallSelectedWingetUpdaUnins, 
     uninstallNextWinget, onUninstallFinishedWinget, updateSelectedWingetUpdaUnins, 
-    updateNextWinget, onUpdateFinishedWinget
+    updateNextWinget, onUpdateFinishedWinget, onAllInstallsFinishedWinget,
+    startWingetUpdaUninsScheduler, onAllUninstallsFinishedWinget, onAllUpdatesFinishedWinget,
+    onProgressWinget, onProgressWingetUpdaUnins, filterWinget, filterWingetUpdaUnins
 )
 from scripts.install_programs_manager import (
     updateCounterLabel, loadFolders, is_program_installed, is_program_installed_for_uninstall, 
-    selectAll, selectAllUninstall, installSelected, categorySelectAll, onItemChanged, 
-    installNext, getCategoryForProgram, onInstallFinished
+    selectAll, selectAllUninstall, installSelected, 
+    installNext, onAllInstallsFinished, getCategoryForProgram, onInstallFinished, applyFolderInventory
+)
+from scripts.policies import (
+    startScriptThread, applyPolicies, revertPolicies, onPoliciesFinished, scanPolicies, showPolicyResults,
+    installPythonModules, onPythonModulesInstalled
+)
+from scripts.uninstall import loadUninstallData, applyUninstallInventory, uninstallSelected, uninstallNext, onUninstallFinished
+from scripts.catalog_browser import (
+    CatalogResultsModel, loadCatalogBrowser, updateCatalogStatus, importCatalog, importCatalogFile, startCatalogImport,
+    onCatalogImported, onCatalogImportFailed, searchCatalog, addCatalogSelection
+)
+from scripts.package_model import PackageListModel, PackageTabProxy, STATE_FILTERS
+from scripts.core.requirements_check import ensure_requirements
+from scripts.core.log_setup import configure_logging
+from scripts.core.winget_inventory import refresh_sources_in_background
+from scripts.inventory_worker import (
+    startInventoryWorker, rescanUninstallInventory, onWingetInventoryReady, onProgramsReady, onUninstallInventoryReady,
+    onInventoryProbeFailed
 )
-from scripts.policies import applyPolicies, revertPolicies, installPythonModules
-from scripts.uninstall import loadUninstallData, uninstallSelected, uninstallNext, onUninstallFinished
 
-# Configure logging
-logging.basicConfig(filename='log.txt', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('main')
 
 def is_admin():
     try:
@@ -30,37 +44,12 @@ def is_admin():
     except:
         return False
 
-if not is_admin():
-    ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, __file__, None, 1)
-    sys.exit()
-
 def check_and_install_requirements():
-    logging.info("\n\nAPPLICATION STARTED")
-    try:
-        import pkg_resources
-    except ImportError:
-        subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'setuptools'])
-        import pkg_resources
-
-    subprocess.check_call([sys.executable, '-m', 'pip', 'install', '--upgrade', 'pip'])
-
-    requirements_path = 'requirements.txt'
-    if os.path.isfile(requirements_path):
-        with open(requirements_path, 'r') as file:
-            requirements = file.read().splitlines()
-        
-        installed_packages = {pkg.key for pkg in pkg_resources.working_set}
-        missing_packages = [pkg for pkg in requirements if pkg not in installed_packages]
-
-        if missing_packages:
-            subprocess.check_call([sys.executable, '-m', 'pip', 'install', *missing_packages])
-    print("Winget update list")
-    logging.info("Winget update list")
-    subprocess.run(["powershell", "-Command", "winget update"])
-    print("Winget update completed")
-    logging.info("Winget update completed")
-
-check_and_install_requirements()
+    logger.info("\n\nAPPLICATION STARTED")
+    # Skips pip entirely when the environment is unchanged since the last launch
+    ensure_requirements('requirements.txt')
+    logger.info("Winget source update started in the background")
+    refresh_sources_in_background()
 
 class App(QWidget):
     def __init__(self):
@@ -69,6 +58,7 @@ class App(QWidget):
             self.all_installed_successfully = True
             self.installCounter = 0
             self.totalPrograms = 0
+            self.installJobs = {}
             self.totalProgramsWinget = 0
             self.installedCountWinget = 0
             self.initUI()
@@ -77,8 +67,7 @@ class App(QWidget):
             fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
             line_number = exc_tb.tb_lineno
             error_message = f"An error occurred in {fname} at line {line_number}: {e}"
-            logging.error(error_message)
-            print(error_message)
+            logger.error(error_message)
             QMessageBox.critical(None, "Error", error_message)
             sys.exit(1)
 
@@ -86,6 +75,11 @@ class App(QWidget):
         self.setWindowTitle('Program Manager')
         self.setGeometry(100, 100, 400, 300)
 
+        # One model per catalog; every tab looks at it through its own proxy with its own check states
+        self.wingetModel = PackageListModel(self)
+        self.folderModel = PackageListModel(self)
+        self.uninstallModel = PackageListModel(self)
+
         layout = QVBoxLayout()
         self.tabWidget = QTabWidget()
         layout.addWidget(self.tabWidget)
@@ -95,10 +89,14 @@ class App(QWidget):
         self.initInstallTab()
         self.initWingetInstallTab()
         self.initWingetUpdateUninstallTab()
+        self.initCatalogTab()
 
         self.setLayout(layout)
         self.loadFolders()
         self.loadWingetData()
+        self.loadCatalogBrowser()
+        # Lists show "checking…" until the inventory worker reports back
+        self.startInventoryWorker()
 
     def initScriptsTab(self):
         self.scripts = QWidget()
@@ -108,6 +106,7 @@ class App(QWidget):
 
         #self.addButton(scriptsLayout, 'Apply group policies', self.applyPolicies)
         #self.addButton(scriptsLayout, 'Revert group policies', self.revertPolicies)
+        self.addButton(scriptsLayout, 'Check group policies', self.scanPolicies)
         self.addButton(scriptsLayout, 'Install python modules', self.installPythonModules)
 
     def initUninstallTab(self):
@@ -120,8 +119,8 @@ class App(QWidget):
         self.uninstallSelectAllCheckbox.stateChanged.connect(self.selectAllUninstall)
         uninstallLayout.addWidget(self.uninstallSelectAllCheckbox)
 
-        self.scriptsListWidget = QListWidget()
-        uninstallLayout.addWidget(self.scriptsListWidget)
+        self.uninstallProxy = PackageTabProxy(self.uninstallModel, 'uninstall', parent=self)
+        self.scriptsListView = self.addListView(uninstallLayout, self.uninstallProxy)
 
         self.uninstallButton = QPushButton('Uninstall Selected')
         self.uninstallButton.clicked.connect(self.uninstallSelected)
@@ -136,15 +135,13 @@ class App(QWidget):
         hLayout = QHBoxLayout()
         installLayout.addLayout(hLayout)
 
-        self.listWidget = QListWidget()
-        installLayout.addWidget(self.listWidget)
+        self.folderProxy = PackageTabProxy(self.folderModel, 'install', checkable_categories=True, parent=self)
+        self.listView = self.addListView(installLayout, self.folderProxy)
 
         self.selectAllCheckbox = QCheckBox('Select All')
         self.selectAllCheckbox.stateChanged.connect(self.selectAll)
         hLayout.addWidget(self.selectAllCheckbox)
 
-        self.listWidget.itemChanged.connect(self.onItemChanged)
-
         self.counterLabel = QLabel('Installed: 0/0')
         hLayout.addWidget(self.counterLabel)
 
@@ -165,14 +162,17 @@ class App(QWidget):
         wingetHLayout = QHBoxLayout()
         wingetLayout.addLayout(wingetHLayout)
 
-        self.listWidgetWinget = QListWidget()
-        wingetLayout.addWidget(self.listWidgetWinget)
+        self.wingetInstallProxy = PackageTabProxy(self.wingetModel, 'install', parent=self)
+        self.searchBoxWinget, self.stateFilterWinget = self.addFilterRow(wingetLayout, self.filterWinget)
+        self.listViewWinget = self.addListView(wingetLayout, self.wingetInstallProxy)
 
         self.selectAllCheckboxWinget = QCheckBox('Select All')
         self.selectAllCheckboxWinget.stateChanged.connect(self.selectAllWinget)
         wingetHLayout.addWidget(self.selectAllCheckboxWinget)
 
-        self.listWidgetWinget.itemChanged.connect(self.onItemChangedWinget)
+        self.bulkCheckboxWinget = QCheckBox('Bulk install (winget import)')
+        self.bulkCheckboxWinget.setChecked(True)
+        wingetHLayout.addWidget(self.bulkCheckboxWinget)
 
         self.counterLabelWinget = QLabel('Installed: 0/0')
         wingetHLayout.addWidget(self.counterLabelWinget)
@@ -195,16 +195,15 @@ class App(QWidget):
         wingetBUpdaUninsLayout = QHBoxLayout()
         wingetUpdaUninsLayout.addLayout(wingetHUpdaUninsLayout)
 
-        self.listWidgetWingetUpdaUnins = QListWidget()
-        wingetUpdaUninsLayout.addWidget(self.listWidgetWingetUpdaUnins)
+        self.wingetUpdaUninsProxy = PackageTabProxy(self.wingetModel, 'manage', parent=self)
+        self.searchBoxWingetUpdaUnins, self.stateFilterWingetUpdaUnins = self.addFilterRow(wingetUpdaUninsLayout, self.filterWingetUpdaUnins)
+        self.listViewWingetUpdaUnins = self.addListView(wingetUpdaUninsLayout, self.wingetUpdaUninsProxy)
         wingetUpdaUninsLayout.addLayout(wingetBUpdaUninsLayout)
 
         self.selectAllCheckboxWingetUpdaUnins = QCheckBox('Select All')
         self.selectAllCheckboxWingetUpdaUnins.stateChanged.connect(self.selectAllWingetUpdaUnins)
         wingetHUpdaUninsLayout.addWidget(self.selectAllCheckboxWingetUpdaUnins)
 
-        self.listWidgetWingetUpdaUnins.itemChanged.connect(self.onItemChangedWingetUpdaUnins)
-
         self.updateButtonWingetUpdaUnins = QPushButton('Update Selected')
         self.updateButtonWingetUpdaUnins.clicked.connect(self.updateSelectedWingetUpdaUnins)
         wingetBUpdaUninsLayout.addWidget(self.updateButtonWingetUpdaUnins)
@@ -219,6 +218,74 @@ class App(QWidget):
 
         self.wingetUpdaUninsTab.setLayout(wingetUpdaUninsLayout)
 
+    def initCatalogTab(self):
+        self.catalogTab = QWidget()
+        self.tabWidget.addTab(self.catalogTab, "Winget Catalog")
+        catalogLayout = QVBoxLayout()
+        catalogHLayout = QHBoxLayout()
+        catalogBLayout = QHBoxLayout()
+        catalogLayout.addLayout(catalogHLayout)
+
+        self.importCatalogButton = QPushButton('Import winget source')
+        self.importCatalogButton.clicked.connect(self.importCatalog)
+        catalogHLayout.addWidget(self.importCatalogButton)
+
+        self.importCatalogFileButton = QPushButton('Import from file...')
+        self.importCatalogFileButton.clicked.connect(self.importCatalogFile)
+        catalogHLayout.addWidget(self.importCatalogFileButton)
+
+        self.catalogStatusLabel = QLabel('No catalog imported yet')
+        catalogLayout.addWidget(self.catalogStatusLabel)
+
+        self.searchBoxCatalog = QLineEdit()
+        self.searchBoxCatalog.setPlaceholderText('Search name, Id, publisher or tag')
+        self.searchBoxCatalog.setClearButtonEnabled(True)
+        self.searchBoxCatalog.textChanged.connect(self.searchCatalog)
+        catalogLayout.addWidget(self.searchBoxCatalog)
+
+        self.catalogResultsModel = CatalogResultsModel(self)
+        self.catalogView = QTableView()
+        self.catalogView.setModel(self.catalogResultsModel)
+        self.catalogView.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.catalogView.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.catalogView.verticalHeader().setVisible(False)
+        self.catalogView.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        catalogLayout.addWidget(self.catalogView)
+        catalogLayout.addLayout(catalogBLayout)
+
+        catalogBLayout.addWidget(QLabel('Category'))
+        self.catalogCategoryBox = QComboBox()
+        self.catalogCategoryBox.setEditable(True)
+        catalogBLayout.addWidget(self.catalogCategoryBox)
+
+        self.addCatalogButton = QPushButton('Add to winget.json')
+        self.addCatalogButton.clicked.connect(self.addCatalogSelection)
+        catalogBLayout.addWidget(self.addCatalogButton)
+
+        self.catalogTab.setLayout(catalogLayout)
+
+    def addListView(self, layout, model):
+        view = QListView()
+        view.setUniformItemSizes(True)  # Lets the view skip measuring every row of a long catalog
+        view.setModel(model)
+        layout.addWidget(view)
+        return view
+
+    def addFilterRow(self, layout, callback):
+        # Search box and state filter above a package list; both call `callback` on every change
+        filterLayout = QHBoxLayout()
+        searchBox = QLineEdit()
+        searchBox.setPlaceholderText('Search name, Id or category')
+        searchBox.setClearButtonEnabled(True)
+        searchBox.textChanged.connect(callback)
+        filterLayout.addWidget(searchBox)
+        stateFilter = QComboBox()
+        stateFilter.addItems(list(STATE_FILTERS))
+        stateFilter.currentIndexChanged.connect(callback)
+        filterLayout.addWidget(stateFilter)
+        layout.addLayout(filterLayout)
+        return searchBox, stateFilter
+
     def addButton(self, layout, text, callback):
         button = QPushButton(text)
         button.clicked.connect(callback)
@@ -226,52 +293,89 @@ class App(QWidget):
 
     # Import methods from winget_manager (Update/Uninstall)
     selectAllWingetUpdaUnins = selectAllWingetUpdaUnins
-    categorySelectAllWingetUpdaUnins = categorySelectAllWingetUpdaUnins
-    onItemChangedWingetUpdaUnins = onItemChangedWingetUpdaUnins
     uninstallSelectedWingetUpdaUnins = uninstallSelectedWingetUpdaUnins
     uninstallNextWinget = uninstallNextWinget
     onUninstallFinishedWinget = onUninstallFinishedWinget
     updateSelectedWingetUpdaUnins = updateSelectedWingetUpdaUnins
     updateNextWinget = updateNextWinget
     onUpdateFinishedWinget = onUpdateFinishedWinget
+    startWingetUpdaUninsScheduler = startWingetUpdaUninsScheduler
+    onAllUninstallsFinishedWinget = onAllUninstallsFinishedWinget
+    onAllUpdatesFinishedWinget = onAllUpdatesFinishedWinget
+    onProgressWingetUpdaUnins = onProgressWingetUpdaUnins
+    filterWingetUpdaUnins = filterWingetUpdaUnins
 
     # Import methods from uninstall
     loadUninstallData = loadUninstallData
+    applyUninstallInventory = applyUninstallInventory
     uninstallSelected = uninstallSelected
     uninstallNext = uninstallNext
     onUninstallFinished = onUninstallFinished
 
     # Import methods from scripts
+    startScriptThread = startScriptThread
     applyPolicies = applyPolicies
     revertPolicies = revertPolicies
+    onPoliciesFinished = onPoliciesFinished
+    scanPolicies = scanPolicies
+    showPolicyResults = showPolicyResults
     installPythonModules = installPythonModules
+    onPythonModulesInstalled = onPythonModulesInstalled
 
     # Import methods from program_manager
     updateCounterLabel = updateCounterLabel
     loadFolders = loadFolders
+    applyFolderInventory = applyFolderInventory
     is_program_installed = is_program_installed
     is_program_installed_for_uninstall = is_program_installed_for_uninstall
     selectAll = selectAll
     selectAllUninstall = selectAllUninstall
     installSelected = installSelected
-    categorySelectAll = categorySelectAll
-    onItemChanged = onItemChanged
     installNext = installNext
+    onAllInstallsFinished = onAllInstallsFinished
     getCategoryForProgram = getCategoryForProgram
     onInstallFinished = onInstallFinished
 
     # Import methods from winget_manager
     loadWingetData = loadWingetData
+    applyWingetInventory = applyWingetInventory
     is_program_installed_winget = is_program_installed_winget
     selectAllWinget = selectAllWinget
-    categorySelectAllWinget = categorySelectAllWinget
-    onItemChangedWinget = onItemChangedWinget
     installSelectedWinget = installSelectedWinget
     installNextWinget = installNextWinget
     onInstallFinishedWinget = onInstallFinishedWinget
+    onAllInstallsFinishedWinget = onAllInstallsFinishedWinget
+    onProgressWinget = onProgressWinget
     updateCounterLabelWinget = updateCounterLabelWinget
+    filterWinget = filterWinget
+
+    # Import methods from catalog_browser
+    loadCatalogBrowser = loadCatalogBrowser
+    updateCatalogStatus = updateCatalogStatus
+    importCatalog = importCatalog
+    importCatalogFile = importCatalogFile
+    startCatalogImport = startCatalogImport
+    onCatalogImported = onCatalogImported
+    onCatalogImportFailed = onCatalogImportFailed
+    searchCatalog = searchCatalog
+    addCatalogSelection = addCatalogSelection
+
+    # Import methods from inventory_worker
+    startInventoryWorker = startInventoryWorker
+    rescanUninstallInventory = rescanUninstallInventory
+    onWingetInventoryReady = onWingetInventoryReady
+    onProgramsReady = onProgramsReady
+    onUninstallInventoryReady = onUninstallInventoryReady
+    onInventoryProbeFailed = onInventoryProbeFailed
 
 if __name__ == '__main__':
+    if not is_admin():
+        ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, __file__, None, 1)
+        sys.exit()
+
+    configure_logging()
+    check_and_install_requirements()
+
     app = QApplication(sys.argv)
     ex = App()
     ex.show()
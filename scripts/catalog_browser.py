@@ -0,0 +1,170 @@
+import logging
+import time
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QAbstractTableModel, QModelIndex
+from PyQt5.QtWidgets import QMessageBox, QFileDialog
+from scripts.core.winget_catalog import catalog_store, find_source_index, add_to_winget_catalog, categories
+from scripts.core.spans import timed
+from scripts.gui_bridge import handle_exception
+
+logger = logging.getLogger(__name__)
+
+try:
+    class CatalogImportThread(QThread):
+        imported = pyqtSignal(int)
+        failed = pyqtSignal(str)
+
+        def __init__(self, path):
+            super().__init__()
+            self.path = path
+
+        def run(self):
+            try:
+                self.imported.emit(catalog_store.import_source_index(self.path))
+            except Exception as e:
+                logger.error(f"***[Catalog]*** Import of {self.path} failed: {e}")
+                self.failed.emit(str(e))
+
+    class CatalogResultsModel(QAbstractTableModel):
+        # Search results, at most SEARCH_LIMIT rows; the tags show as a tooltip
+        HEADERS = ('Name', 'Id', 'Publisher', 'Version')
+        COLUMNS = ('name', 'id', 'publisher', 'version')
+
+        def __init__(self, parent=None):
+            super().__init__(parent)
+            self.packages = []
+
+        def set_packages(self, packages):
+            self.beginResetModel()
+            self.packages = packages
+            self.endResetModel()
+
+        def rowCount(self, parent=QModelIndex()):
+            return 0 if parent.isValid() else len(self.packages)
+
+        def columnCount(self, parent=QModelIndex()):
+            return 0 if parent.isValid() else len(self.COLUMNS)
+
+        def data(self, index, role=Qt.DisplayRole):
+            if not index.isValid():
+                return None
+            package = self.packages[index.row()]
+            if role == Qt.DisplayRole:
+                return package[self.COLUMNS[index.column()]]
+            if role == Qt.ToolTipRole and package['tags']:
+                return f"Tags: {package['tags']}"
+            return None
+
+        def headerData(self, section, orientation, role=Qt.DisplayRole):
+            if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+                return self.HEADERS[section]
+            return None
+
+    def loadCatalogBrowser(self):
+        try:
+            self.updateCatalogStatus()
+            # Offer the categories winget.json already uses, the box also takes a new one
+            current = self.catalogCategoryBox.currentText()
+            self.catalogCategoryBox.clear()
+            self.catalogCategoryBox.addItems(categories(self.winget_data))
+            if current:
+                self.catalogCategoryBox.setCurrentText(current)
+        except Exception as e:
+            handle_exception(e)
+
+    def updateCatalogStatus(self):
+        try:
+            metadata = catalog_store.metadata()
+            if metadata.get('imported'):
+                imported = time.strftime('%Y-%m-%d %H:%M', time.localtime(int(metadata['imported'])))
+                self.catalogStatusLabel.setText(f"{metadata.get('packages', 0)} packages, imported {imported} from {metadata.get('source', '')}")
+            else:
+                self.catalogStatusLabel.setText('No catalog imported yet')
+        except Exception as e:
+            handle_exception(e)
+
+    def importCatalog(self):
+        try:
+            path = find_source_index()
+            if path is None:
+                QMessageBox.information(self, 'Catalog', 'No winget source index found on this machine, pick an index.db or source.msix instead')
+                self.importCatalogFile()
+            else:
+                self.startCatalogImport(path)
+        except Exception as e:
+            handle_exception(e)
+
+    def importCatalogFile(self):
+        try:
+            path, _ = QFileDialog.getOpenFileName(self, 'winget source index', '', 'winget source index (*.db *.msix);;All files (*)')
+            if path:
+                self.startCatalogImport(path)
+        except Exception as e:
+            handle_exception(e)
+
+    def startCatalogImport(self, path):
+        try:
+            # Reading a full source takes a few seconds, it runs off the GUI thread
+            self.importCatalogButton.setEnabled(False)
+            self.importCatalogFileButton.setEnabled(False)
+            self.catalogStatusLabel.setText(f"Importing {path}...")
+            self.catalogImportThread = CatalogImportThread(path)
+            self.catalogImportThread.imported.connect(self.onCatalogImported)
+            self.catalogImportThread.failed.connect(self.onCatalogImportFailed)
+            self.catalogImportThread.start()
+        except Exception as e:
+            handle_exception(e)
+
+    def onCatalogImported(self, count):
+        try:
+            self.importCatalogButton.setEnabled(True)
+            self.importCatalogFileButton.setEnabled(True)
+            self.updateCatalogStatus()
+            self.searchCatalog()
+            QMessageBox.information(self, 'Catalog', f'Imported {count} packages')
+        except Exception as e:
+            handle_exception(e)
+
+    def onCatalogImportFailed(self, error):
+        try:
+            self.importCatalogButton.setEnabled(True)
+            self.importCatalogFileButton.setEnabled(True)
+            self.updateCatalogStatus()
+            QMessageBox.warning(self, 'Catalog', f'Could not import the winget source index: {error}')
+        except Exception as e:
+            handle_exception(e)
+
+    @timed('ui')
+    def searchCatalog(self, *args):
+        try:
+            self.catalogResultsModel.set_packages(catalog_store.search(self.searchBoxCatalog.text()))
+        except Exception as e:
+            handle_exception(e)
+
+    def addCatalogSelection(self):
+        try:
+            rows = sorted(index.row() for index in self.catalogView.selectionModel().selectedRows())
+            category = self.catalogCategoryBox.currentText().strip()
+            if not rows:
+                QMessageBox.warning(self, 'No Selection', 'Please select packages to add')
+            elif not category:
+                QMessageBox.warning(self, 'No Category', 'Please pick or type a category')
+            else:
+                packages = [self.catalogResultsModel.packages[row] for row in rows]
+                added = add_to_winget_catalog(packages, category)
+                if added:
+                    # Both winget tabs pick the new entries up; the counter is rebuilt with the inventory
+                    self.installedCountWinget = 0
+                    self.loadWingetData()
+                    if 'winget' in self.inventoryReady:
+                        self.applyWingetInventory()
+                    self.loadCatalogBrowser()
+                skipped = len(packages) - len(added)
+                message = f'Added {len(added)} packages to {category}'
+                if skipped:
+                    message += f', {skipped} already in winget.json'
+                QMessageBox.information(self, 'Catalog', message)
+        except Exception as e:
+            handle_exception(e)
+
+except Exception as e:
+    handle_exception(e)
@@ -0,0 +1,342 @@
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import threading
+
+# Headless entry point: python -m scripts.cli <command> ...
+# Prints one JSON object per line on stdout; everything the engines print goes to stderr.
+# Nothing in here (or in the modules it imports) may import PyQt5.
+from scripts.core.winget_inventory import load_catalog, package_ids, catalog_ids_by_name
+from scripts.core.inventory_cache import inventory_cache, get_installed_index
+from scripts.core.winget_scheduler import WingetScheduler, WINGET_MAX_PARALLEL, build_install_jobs, build_jobs
+from scripts.core.winget_import import WingetImportBatch
+from scripts.core.winget_progress import ProgressModel
+from scripts.core.program_catalog import program_catalog
+from scripts.core.local_scheduler import LocalInstallScheduler, LocalJob
+from scripts.core.uninstaller import load_uninstall_catalog, is_program_installed, is_appx_package_installed, uninstall_program
+from scripts.core.policy_engine import load_policies, plan_policies, run_policies
+from scripts.core.winget_catalog import catalog_store, find_source_index, add_to_winget_catalog, SEARCH_LIMIT
+from scripts.core.log_setup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_ERROR = 3
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class EventWriter:
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def emit(self, event, **fields):
+        # Scheduler callbacks arrive from worker threads
+        with self.lock:
+            self.stream.write(json.dumps({'event': event, **fields}, ensure_ascii=False) + '\n')
+            self.stream.flush()
+
+    def finished(self, name, success, source):
+        with self.lock:
+            if success:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+        self.emit('finished', name=name, success=success, source=source)
+
+    def skip(self, name, reason):
+        with self.lock:
+            self.skipped += 1
+        self.emit('skipped', name=name, reason=reason)
+
+    def not_found(self, name):
+        with self.lock:
+            self.failed += 1
+        self.emit('not_found', name=name)
+
+    def summary(self):
+        self.emit('summary', succeeded=self.succeeded, failed=self.failed, skipped=self.skipped)
+        return EXIT_FAILED if self.failed else EXIT_OK
+
+
+def read_selection(args):
+    # Names from the command line plus an optional file: a JSON array, or one name per line
+    names = list(args.names)
+    if args.selection:
+        with open(args.selection, 'r', encoding='utf-8-sig') as file:
+            text = file.read()
+        if text.lstrip().startswith('['):
+            names.extend(json.loads(text))
+        else:
+            names.extend(line.strip() for line in text.splitlines() if line.strip() and not line.lstrip().startswith('#'))
+    # Keep the order, drop duplicates
+    return list(dict.fromkeys(names))
+
+
+def progress_model(jobs, writer, args):
+    if not args.progress:
+        return None
+    return ProgressModel(jobs, on_change=lambda name, phase, percent: writer.emit('progress', name=name, phase=phase, percent=percent))
+
+
+def run_winget(jobs, action, writer, args, on_success, bulk=False, max_workers=WINGET_MAX_PARALLEL):
+    def on_job_finished(name, success):
+        if success:
+            on_success(name)
+        writer.finished(name, success, 'winget')
+
+    if not jobs:
+        return
+    scheduler_class = WingetImportBatch if bulk and len(jobs) > 1 else WingetScheduler
+    options = {} if scheduler_class is WingetImportBatch else {'action': action, 'max_workers': max_workers}
+    scheduler = scheduler_class(jobs, on_job_finished=on_job_finished, progress=progress_model(jobs, writer, args), **options)
+    scheduler.run()
+
+
+def command_install(args, writer):
+    catalog = load_catalog()
+    winget_names, local_names = [], []
+    for name in read_selection(args):
+        if name in catalog:
+            winget_names.append(name)
+        elif program_catalog.category_for(name) is not None:
+            local_names.append(name)
+        else:
+            writer.not_found(name)
+
+    if winget_names and not args.force:
+        installed_index = get_installed_index()
+        for name in list(winget_names):
+            if installed_index.is_installed(package_ids(catalog[name])):
+                winget_names.remove(name)
+                writer.skip(name, 'already_installed')
+    writer.emit('start', command='install', winget=len(winget_names), local=len(local_names))
+
+    run_winget(
+        build_install_jobs(winget_names, catalog), 'install', writer, args,
+        lambda name: inventory_cache.mark_installed(package_ids(catalog[name]), catalog[name]['Name']),
+        bulk=args.bulk, max_workers=args.parallel,
+    )
+
+    jobs = []
+    for name in local_names:
+        paths = program_catalog.installers(name)
+        if not paths:
+            writer.emit('error', name=name, message='No .exe, .msi, or .msix file found')
+            writer.finished(name, False, 'local')
+        else:
+            jobs.append(LocalJob(name, paths))
+    if jobs:
+        ids_by_name = catalog_ids_by_name(catalog)
+        jobs_by_name = {job.name: job for job in jobs}
+
+        def on_local_finished(name, success):
+            if jobs_by_name[name].error:
+                writer.emit('error', name=name, message=jobs_by_name[name].error.split('\n')[0])
+            if success and ids_by_name.get(name.lower()):
+                inventory_cache.mark_installed(ids_by_name[name.lower()], name)
+            writer.finished(name, success, 'local')
+
+        LocalInstallScheduler(jobs, on_job_finished=on_local_finished).run()
+    return writer.summary()
+
+
+def command_update(args, writer):
+    catalog = load_catalog()
+    names = []
+    for name in read_selection(args):
+        if name in catalog:
+            names.append(name)
+        else:
+            writer.not_found(name)
+    writer.emit('start', command='update', winget=len(names))
+    run_winget(
+        build_jobs(names, catalog), 'upgrade', writer, args,
+        lambda name: inventory_cache.mark_updated(package_ids(catalog[name])),
+        max_workers=1,
+    )
+    return writer.summary()
+
+
+def command_uninstall(args, writer):
+    catalog = load_catalog()
+    # uninstall.json entries can be selected by package name or by the name shown in the GUI
+    uninstall_names = {}
+    for entry in load_uninstall_catalog():
+        uninstall_names[entry['name']] = entry['name']
+        uninstall_names.setdefault(entry.get('name_program', entry['name']), entry['name'])
+
+    winget_names, local_names = [], []
+    for name in read_selection(args):
+        if name in catalog:
+            winget_names.append(name)
+        elif name in uninstall_names:
+            local_names.append(uninstall_names[name])
+        else:
+            writer.not_found(name)
+
+    if winget_names and not args.force:
+        installed_index = get_installed_index()
+        for name in list(winget_names):
+            if not any(package_id in installed_index for package_id in package_ids(catalog[name])):
+                winget_names.remove(name)
+                writer.skip(name, 'not_installed')
+    writer.emit('start', command='uninstall', winget=len(winget_names), local=len(local_names))
+
+    run_winget(
+        build_jobs(winget_names, catalog), 'uninstall', writer, args,
+        lambda name: inventory_cache.mark_uninstalled(package_ids(catalog[name])),
+        max_workers=1,
+    )
+    for name in local_names:
+        if not args.force and not is_program_installed(name):
+            writer.skip(name, 'not_installed')
+            continue
+        try:
+            success = uninstall_program(name, is_appx_package_installed(name))
+        except Exception as e:
+            writer.emit('error', name=name, message=str(e))
+            success = False
+        writer.finished(name, success, 'registry')
+    return writer.summary()
+
+
+def command_policies(args, writer):
+    if args.action == 'scan':
+        plan = plan_policies(load_policies(), 'apply')
+        for change in plan:
+            writer.emit('policy', name=change.name, path=change.policy['regPath'], compliant=change.operation == 'none')
+        drifted = sum(change.operation != 'none' for change in plan)
+        writer.emit('summary', compliant=len(plan) - drifted, drifted=drifted)
+        return EXIT_FAILED if drifted else EXIT_OK
+
+    results, refresh_error = run_policies(args.action)
+    for result in results:
+        writer.emit('policy', name=result.name, path=result.policy['regPath'], status=result.status, error=result.error)
+    if refresh_error:
+        writer.emit('error', name='gpupdate', message=refresh_error)
+    failed = sum(result.failed for result in results)
+    writer.emit('summary', succeeded=len(results) - failed, failed=failed)
+    return EXIT_FAILED if failed or refresh_error else EXIT_OK
+
+
+def command_inventory(args, writer):
+    index = inventory_cache.refresh() if args.refresh else get_installed_index()
+    for package in index.packages.values():
+        writer.emit('package', **package)
+    writer.emit('summary', packages=len(index))
+    return EXIT_OK
+
+
+def command_catalog(args, writer):
+    if args.action == 'import':
+        path = args.path or find_source_index()
+        if path is None:
+            writer.emit('error', message='No winget source index found on this machine, pass the path of an index.db or source.msix')
+            return EXIT_FAILED
+        writer.emit('summary', packages=catalog_store.import_source_index(path), source=path)
+        return EXIT_OK
+
+    if args.action == 'search':
+        results = catalog_store.search(' '.join(args.terms), limit=args.limit)
+        for package in results:
+            writer.emit('package', **package)
+        writer.emit('summary', packages=len(results))
+        return EXIT_OK
+
+    packages = []
+    for package_id in args.ids:
+        package = catalog_store.get(package_id)
+        if package is None:
+            writer.not_found(package_id)
+        else:
+            packages.append(package)
+    added = add_to_winget_catalog(packages, args.category)
+    for name in added:
+        writer.emit('added', name=name, category=args.category)
+    writer.emit('summary', added=len(added), skipped=len(packages) - len(added), failed=writer.failed)
+    return EXIT_FAILED if writer.failed else EXIT_OK
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m scripts.cli', description='Install, update and uninstall programs without the GUI.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_selection(subparser):
+        subparser.add_argument('names', nargs='*', help='Program names as they appear in winget.json, Programs/ or uninstall.json')
+        subparser.add_argument('--selection', help='File with program names, a JSON array or one name per line')
+        subparser.add_argument('--progress', action='store_true', help='Also print progress events')
+
+    install = subparsers.add_parser('install', help='Install winget packages and local installers')
+    add_selection(install)
+    install.add_argument('--bulk', action='store_true', help='Install all winget packages with a single winget import')
+    install.add_argument('--force', action='store_true', help="Don't skip packages that are already installed")
+    install.add_argument('--parallel', type=int, default=WINGET_MAX_PARALLEL, help='Number of winget installs run at once')
+    install.set_defaults(handler=command_install)
+
+    update = subparsers.add_parser('update', help='Upgrade winget packages')
+    add_selection(update)
+    update.set_defaults(handler=command_update)
+
+    uninstall = subparsers.add_parser('uninstall', help='Uninstall winget packages and programs from uninstall.json')
+    add_selection(uninstall)
+    uninstall.add_argument('--force', action='store_true', help="Don't skip programs that don't look installed")
+    uninstall.set_defaults(handler=command_uninstall)
+
+    policies = subparsers.add_parser('policies', help='Apply, revert or check the group policies')
+    policies.add_argument('action', choices=['apply', 'revert', 'scan'])
+    policies.set_defaults(handler=command_policies)
+
+    inventory = subparsers.add_parser('inventory', help='List installed winget packages')
+    inventory.add_argument('--refresh', action='store_true', help='Ask winget instead of using the cached snapshot')
+    inventory.set_defaults(handler=command_inventory)
+
+    catalog = subparsers.add_parser('catalog', help='Search the offline winget catalog and add packages to winget.json')
+    catalog_actions = catalog.add_subparsers(dest='action', required=True)
+    catalog_import = catalog_actions.add_parser('import', help="Read winget's source index into cache/catalog.db")
+    catalog_import.add_argument('path', nargs='?', help='index.db or source.msix, by default the one winget unpacked on this machine')
+    catalog_search = catalog_actions.add_parser('search', help='Search by name, Id, publisher, tag or moniker')
+    catalog_search.add_argument('terms', nargs='+')
+    catalog_search.add_argument('--limit', type=int, default=SEARCH_LIMIT)
+    catalog_add = catalog_actions.add_parser('add', help='Add catalog packages to winget.json by Id')
+    catalog_add.add_argument('ids', nargs='+')
+    catalog_add.add_argument('--category', required=True, help='winget.json category, an existing one or a new one')
+    catalog.set_defaults(handler=command_catalog)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command in ('install', 'update', 'uninstall') and not args.names and not args.selection:
+        print('No programs selected, pass names or --selection', file=sys.stderr)
+        return EXIT_USAGE
+
+    # The catalogs, Programs/ and cache/ are all relative to the project root
+    if getattr(args, 'selection', None):
+        args.selection = os.path.abspath(args.selection)
+    if getattr(args, 'path', None):
+        args.path = os.path.abspath(args.path)
+    os.chdir(PROJECT_ROOT)
+    # stdout carries the JSON events, so console logging goes to stderr
+    configure_logging(console=sys.stderr)
+    writer = EventWriter(sys.stdout)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            return args.handler(args, writer)
+    except Exception as e:
+        logger.error(f"{args.command} failed: {e}")
+        writer.emit('error', message=str(e))
+        return EXIT_ERROR
+
+
+if __name__ == '__main__':
+    sys.exit(main())
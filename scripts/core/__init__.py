@@ -0,0 +1,2 @@
+# Inventory, catalogs, job execution and results. Nothing under scripts.core may import PyQt5,
+# the GUI (scripts/*.py) and the CLI both sit on top of it.
@@ -0,0 +1,79 @@
+import json
+import fnmatch
+import threading
+import logging
+
+from scripts.core.executor import powershell
+
+logger = logging.getLogger(__name__)
+
+APPX_COMMAND = "Get-AppxPackage | Select-Object Name, PackageFullName, PackageFamilyName, Version | ConvertTo-Json -Compress"
+
+
+def parse_appx_json(text):
+    # ConvertTo-Json writes a bare object for a single package and nothing at all for none
+    text = text.strip()
+    if not text:
+        return []
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = [data]
+    return [package for package in data if package.get('Name')]
+
+
+class AppxIndex:
+    def __init__(self, packages):
+        self.packages = packages
+        self._names = [(package['Name'].lower(), package) for package in packages]
+
+    def __len__(self):
+        return len(self.packages)
+
+    def match(self, pattern):
+        # Same wildcard rules as `Get-AppxPackage <pattern>`, which is case insensitive
+        pattern = pattern.lower()
+        return [package for name, package in self._names if fnmatch.fnmatchcase(name, pattern)]
+
+    def is_installed(self, app_name):
+        return bool(self.match(f"*{app_name}*"))
+
+    def remove(self, app_name):
+        removed = self.match(f"*{app_name}*")
+        if removed:
+            self.packages = [package for package in self.packages if package not in removed]
+            self._names = [(name, package) for name, package in self._names if package not in removed]
+        return removed
+
+
+def fetch_appx_index():
+    logger.info("***[Appx]*** Fetching list of installed appx packages")
+    result = powershell(APPX_COMMAND)
+    return AppxIndex(parse_appx_json(result.stdout))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_appx_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = fetch_appx_index()
+        return _index
+
+
+def refresh_appx_index():
+    # Fetches outside the lock, lookups keep answering from the old snapshot until the new one is swapped in
+    global _index
+    index = fetch_appx_index()
+    with _index_lock:
+        _index = index
+    return index
+
+
+def invalidate_appx_index():
+    # The next lookup takes a fresh snapshot
+    global _index
+    with _index_lock:
+        _index = None
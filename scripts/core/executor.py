@@ -0,0 +1,185 @@
+import os
+import subprocess
+import threading
+import time
+import codecs
+import logging
+
+from scripts.core.spans import span, describe_command
+
+logger = logging.getLogger(__name__)
+
+# Every external command goes through run_command: a blocking subprocess call with reader threads
+# for the streams, made from the schedulers' and the inventory worker's threads, never the GUI's.
+# Not QProcess, because scripts.core has to import without PyQt5 (the CLI) and a QProcess needs a
+# running Qt event loop on its thread; not asyncio, because every caller is a plain thread and would
+# need a loop thread plus run_coroutine_threadsafe around each call, with the Proactor loop on Windows.
+
+# Exit codes we know how to interpret: winget HRESULTs and Windows Installer codes
+EXIT_CODES = {
+    0: ('success', 'Success'),
+    1641: ('reboot', 'Success, a restart was started'),
+    3010: ('reboot', 'Success, a restart is required'),
+    1602: ('cancelled', 'Cancelled by the user'),
+    1603: ('failed', 'Fatal error during installation'),
+    1618: ('busy', 'Another installation is already in progress'),
+    0x8A150008: ('failed', 'Download failed'),
+    0x8A150011: ('failed', 'Installer hash does not match the manifest'),
+    0x8A150014: ('not_found', 'No package found matching the input criteria'),
+    0x8A15002B: ('up_to_date', 'No applicable upgrade found'),
+    0x8A150061: ('already_installed', 'Package is already installed'),
+    0x8A150101: ('busy', 'Application is currently running'),
+    0x8A150102: ('busy', 'Another installation is already in progress'),
+    0x8A150103: ('busy', 'One or more files are in use'),
+    0x8A150104: ('failed', 'Missing dependency'),
+    0x8A150105: ('failed', 'Not enough disk space'),
+    0x8A150107: ('failed', 'No network connection'),
+    0x8A150109: ('reboot', 'Restart required to finish installation'),
+    0x8A15010A: ('failed', 'Restart required before installation'),
+    0x8A15010B: ('reboot', 'Restart initiated'),
+    0x8A15010C: ('cancelled', 'Cancelled by the user'),
+    0x8A15010D: ('already_installed', 'Another version is already installed'),
+    0x8A15010E: ('failed', 'A newer version is already installed'),
+    0x8A15010F: ('failed', 'Blocked by policy'),
+}
+
+SUCCESS_STATUSES = {'success', 'reboot'}
+
+
+def classify_exit_code(returncode):
+    # Windows hands HRESULTs back as unsigned 32-bit values, normalize in case we get a negative one
+    code = returncode & 0xFFFFFFFF if returncode is not None else None
+    if code in EXIT_CODES:
+        return EXIT_CODES[code]
+    return ('failed', f'Exit code {returncode}')
+
+
+class CommandResult:
+    def __init__(self, command, returncode, stdout='', stderr='', duration=0.0, cancelled=False, output_bytes=None):
+        self.command = command
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.duration = duration
+        self.cancelled = cancelled
+        if output_bytes is None:
+            output_bytes = len(stdout.encode('utf-8', errors='replace')) + len(stderr.encode('utf-8', errors='replace'))
+        self.output_bytes = output_bytes
+        self.status, self.message = ('cancelled', 'Cancelled') if cancelled else classify_exit_code(returncode)
+
+    @property
+    def success(self):
+        return self.status in SUCCESS_STATUSES
+
+    def __repr__(self):
+        return f"CommandResult({self.command!r}, returncode={self.returncode}, status={self.status!r})"
+
+
+# Tests and benchmarks install a fake here: runner(command, shell, on_output) -> CommandResult
+_runner = None
+
+
+def set_runner(runner):
+    global _runner
+    _runner = runner
+
+
+def _read_stream(stream, name, chunks, on_output, byte_counts):
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    while True:
+        data = stream.read1(4096) if hasattr(stream, 'read1') else stream.read(4096)
+        if not data:
+            break
+        byte_counts[name] = byte_counts.get(name, 0) + len(data)
+        text = decoder.decode(data)
+        if text:
+            chunks.append(text)
+            if on_output:
+                on_output(name, text)
+    text = decoder.decode(b'', final=True)
+    if text:
+        chunks.append(text)
+        if on_output:
+            on_output(name, text)
+    stream.close()
+
+
+def _kill(process):
+    if os.name == 'nt':
+        # Installers spawn children of their own, take the whole tree down
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)], capture_output=True)
+    else:
+        process.kill()
+
+
+def run_command(command, shell=False, on_output=None, cancel_event=None, timeout=None, cwd=None):
+    # Run `command` (an argv list, or a string with shell=True) and stream its output to
+    # on_output(stream_name, text) while it runs. Never raises for a non-zero exit code.
+    # Every call is recorded as a span, fakes included, so benchmarks see the same numbers.
+    kind, name, target = describe_command(command, shell)
+    with span(kind, name, target=target) as fields:
+        if _runner is not None:
+            result = _runner(command, shell, on_output)
+        else:
+            result = _run_process(command, shell, on_output, cancel_event, timeout, cwd)
+        fields.update(exit_code=result.returncode, status=result.status, bytes=result.output_bytes)
+        if result.cancelled:
+            fields['cancelled'] = True
+    return result
+
+
+def _run_process(command, shell, on_output, cancel_event, timeout, cwd):
+    started = time.monotonic()
+    creationflags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+    process = subprocess.Popen(
+        command, shell=shell, cwd=cwd, stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=creationflags
+    )
+    stdout_chunks, stderr_chunks, byte_counts = [], [], {}
+    readers = [
+        threading.Thread(target=_read_stream, args=(process.stdout, 'stdout', stdout_chunks, on_output, byte_counts), daemon=True),
+        threading.Thread(target=_read_stream, args=(process.stderr, 'stderr', stderr_chunks, on_output, byte_counts), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    cancelled = False
+    while True:
+        try:
+            process.wait(timeout=0.2)
+            break
+        except subprocess.TimeoutExpired:
+            timed_out = timeout is not None and time.monotonic() - started > timeout
+            if timed_out or (cancel_event is not None and cancel_event.is_set()):
+                logger.warning(f"***[Executor]*** Stopping {command!r}")
+                _kill(process)
+                process.wait()
+                cancelled = True
+                break
+    for reader in readers:
+        reader.join()
+
+    return CommandResult(
+        command, process.returncode, ''.join(stdout_chunks), ''.join(stderr_chunks),
+        time.monotonic() - started, cancelled, sum(byte_counts.values())
+    )
+
+
+def powershell(script, **kwargs):
+    # For the few things that really need PowerShell (Appx, registry providers)
+    return run_command(["powershell", "-NoProfile", "-NonInteractive", "-Command", script], **kwargs)
+
+
+def powershell_quote(text):
+    # Single-quoted PowerShell literal; the typographic single quotes close a string too, so they are doubled as well
+    for quote in ("'", "\u2018", "\u2019", "\u201a", "\u201b"):
+        text = text.replace(quote, quote * 2)
+    return f"'{text}'"
+
+
+def start_process(command):
+    # Fire and forget, for helpers that run next to another command (the pyautogui scripts)
+    if _runner is not None:
+        threading.Thread(target=_runner, args=(command, False, None), daemon=True).start()
+        return None
+    return subprocess.Popen(command, stdin=subprocess.DEVNULL)
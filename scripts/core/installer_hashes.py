@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from scripts.core.json_files import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+HASH_CACHE_PATH = os.path.join('cache', 'hashes.json')
+# Same format as `sha256sum` output: "<hex digest> *<file name>" per line
+MANIFEST_NAMES = ('SHA256SUMS', 'SHA256SUMS.txt')
+CHUNK_SIZE = 1024 * 1024
+# Hashing from the share is mostly I/O bound, more processes only fight over the link
+MAX_HASH_WORKERS = 4
+
+
+def sha256_file(path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(folder):
+    # {lowercase file name: hex digest}, or None when the program has no manifest
+    for manifest_name in MANIFEST_NAMES:
+        manifest_path = os.path.join(folder, manifest_name)
+        if os.path.isfile(manifest_path):
+            break
+    else:
+        return None
+    manifest = {}
+    with open(manifest_path, 'r', encoding='utf-8-sig') as file:
+        for line in file:
+            parts = line.strip().split(None, 1)
+            if len(parts) == 2:
+                manifest[parts[1].lstrip('*').strip().lower()] = parts[0].lower()
+    return manifest
+
+
+class HashCache:
+    # Hashes keyed by absolute path, only trusted while size and mtime still match
+    def __init__(self, path=HASH_CACHE_PATH):
+        self.path = path
+        self.entries = None
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        atomic_write_json(self.path, self.entries)
+
+    def get(self, path, stat):
+        if self.entries is None:
+            self.load()
+        entry = self.entries.get(os.path.abspath(path))
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            return entry['sha256']
+        return None
+
+    def put(self, path, stat, sha256):
+        if self.entries is None:
+            self.load()
+        self.entries[os.path.abspath(path)] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': sha256}
+
+
+hash_cache = HashCache()
+
+
+def hash_files(paths, cache=hash_cache, max_workers=MAX_HASH_WORKERS):
+    # {path: sha256}; unchanged files come from the cache, the rest are hashed in parallel processes.
+    # Files that can't be read are left out of the result.
+    hashes = {}
+    stats = {}
+    for path in paths:
+        try:
+            stats[path] = os.stat(path)
+        except OSError as e:
+            logger.error(f"***[Verify]*** Could not read {path}: {e}")
+            continue
+        cached = cache.get(path, stats[path])
+        if cached is not None:
+            hashes[path] = cached
+    pending = [path for path in stats if path not in hashes]
+    if not pending:
+        return hashes
+
+    logger.info(f"***[Verify]*** Hashing {len(pending)} installers")
+    if len(pending) == 1:
+        # Not worth starting a process pool for
+        _collect_hashes(pending, {}, hashes, stats, cache)
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+            futures = {path: pool.submit(sha256_file, path) for path in pending}
+            _collect_hashes(pending, futures, hashes, stats, cache)
+    cache.save()
+    return hashes
+
+
+def _collect_hashes(pending, futures, hashes, stats, cache):
+    for path in pending:
+        try:
+            sha256 = futures[path].result() if path in futures else sha256_file(path)
+        except OSError as e:
+            logger.error(f"***[Verify]*** Could not read {path}: {e}")
+            continue
+        hashes[path] = sha256
+        cache.put(path, stats[path], sha256)
+
+
+def verify_installers(paths, cache=hash_cache):
+    # {path: error message or None}; only folders with a manifest are hashed at all
+    manifests = {}
+    to_check = {}
+    for path in paths:
+        folder = os.path.dirname(path)
+        if folder not in manifests:
+            manifests[folder] = load_manifest(folder)
+        manifest = manifests[folder]
+        if manifest is None:
+            continue
+        expected = manifest.get(os.path.basename(path).lower())
+        if expected is None:
+            logger.warning(f"***[Verify]*** {path} is not listed in the SHA256SUMS of its folder")
+            continue
+        to_check[path] = expected
+
+    results = {path: None for path in paths}
+    hashes = hash_files(list(to_check), cache)
+    for path, expected in to_check.items():
+        if path not in hashes:
+            results[path] = f"Could not read {os.path.basename(path)}"
+        elif hashes[path] != expected:
+            results[path] = f"SHA-256 mismatch for {os.path.basename(path)}: expected {expected}, got {hashes[path]}"
+            logger.error(f"***[Verify]*** {results[path]}")
+    return results
@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+import time
+import logging
+
+from scripts.core.winget_inventory import InstalledIndex, fetch_installed_index
+from scripts.core.json_files import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.path.join('cache', 'inventory.json')
+# Snapshots older than this are still served, but a background refresh is started
+DEFAULT_TTL = 10 * 60
+
+
+class InventoryCache:
+    def __init__(self, path=CACHE_PATH, ttl=DEFAULT_TTL, fetch=fetch_installed_index):
+        self.path = path
+        self.ttl = ttl
+        self.fetch = fetch
+        self.index = None
+        self.timestamp = 0
+        self.lock = threading.RLock()
+        self.refresh_lock = threading.Lock()
+        self.refreshing = False
+        self.refresh_thread = None
+        # Changes made while a refresh is running, replayed on top of its result
+        self.pending_changes = []
+        self.listeners = []
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                snapshot = json.load(file)
+            with self.lock:
+                self.index = InstalledIndex(snapshot['packages'])
+                self.timestamp = snapshot['timestamp']
+            logger.info(f"***[Inventory]*** Loaded {len(self.index)} packages from {self.path}")
+            return True
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def save(self):
+        with self.lock:
+            snapshot = {'timestamp': self.timestamp, 'packages': dict(self.index.packages)}
+        atomic_write_json(self.path, snapshot)
+
+    def is_fresh(self):
+        return self.index is not None and time.time() - self.timestamp < self.ttl
+
+    def get(self):
+        # Serve the snapshot from disk on startup and refresh in the background when it is stale;
+        # only the very first run on a machine has to wait for winget
+        if self.index is None and not self.load():
+            return self.refresh()
+        if not self.is_fresh():
+            self.refresh_async()
+        return self.index
+
+    def snapshot(self):
+        # What the GUI thread reads: never loads or fetches, empty until the inventory worker has run get()
+        index = self.index
+        return index if index is not None else InstalledIndex()
+
+    def refresh(self):
+        # Every refresh goes through here. One winget fetch at a time, run outside self.lock so
+        # mark_* calls never wait for it, and the changes they make meanwhile are replayed on its result.
+        with self.refresh_lock:
+            with self.lock:
+                self.pending_changes = []
+                self.refreshing = True
+            try:
+                started = time.time()
+                index = self.fetch()
+                with self.lock:
+                    for change in self.pending_changes:
+                        change(index)
+                    self.index = index
+                    self.timestamp = started
+            finally:
+                with self.lock:
+                    self.pending_changes = []
+                    self.refreshing = False
+        self.save()
+        for listener in list(self.listeners):
+            listener(index)
+        return index
+
+    def refresh_async(self):
+        with self.lock:
+            if self.refresh_thread is not None and self.refresh_thread.is_alive():
+                return self.refresh_thread
+            self.refresh_thread = threading.Thread(target=self._refresh_in_background, daemon=True)
+            self.refresh_thread.start()
+            return self.refresh_thread
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"***[Inventory]*** Background refresh failed: {e}")
+
+    def _apply(self, change):
+        with self.lock:
+            if self.index is None:
+                return
+            change(self.index)
+            if self.refreshing:
+                self.pending_changes.append(change)
+        self.save()
+
+    def mark_installed(self, package_ids, name=''):
+        def change(index):
+            for package_id in package_ids:
+                if package_id not in index:
+                    index.add({'name': name, 'id': package_id, 'version': '', 'available': '', 'source': 'winget'})
+        self._apply(change)
+
+    def mark_uninstalled(self, package_ids):
+        def change(index):
+            for package_id in package_ids:
+                index.remove(package_id)
+        self._apply(change)
+
+    def mark_updated(self, package_ids):
+        def change(index):
+            for package_id in package_ids:
+                entry = index.get(package_id)
+                if entry is not None and entry.get('available'):
+                    entry['version'] = entry['available']
+                    entry['available'] = ''
+        self._apply(change)
+
+    def invalidate(self):
+        # Used when we can't tell which Ids changed (e.g. local installers)
+        with self.lock:
+            self.timestamp = 0
+        self.refresh_async()
+
+
+inventory_cache = InventoryCache()
+
+
+def get_installed_index():
+    return inventory_cache.get()
@@ -0,0 +1,19 @@
+import json
+import os
+import tempfile
+
+
+def atomic_write_json(path, data, **dump_options):
+    # Written to a scratch file next to `path` and swapped in, so a crash or a concurrent
+    # reader never sees half a file; each writer gets its own scratch file
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix='.tmp', dir=directory or '.')
+    try:
+        with os.fdopen(file_descriptor, 'w', encoding='utf-8') as file:
+            json.dump(data, file, **dump_options)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
@@ -0,0 +1,200 @@
+import os
+import sys
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from scripts.core.executor import run_command, start_process, powershell_quote
+from scripts.core.installer_hashes import verify_installers
+from scripts.core.winget_scheduler import is_installer_busy, INSTALLER_BUSY_RETRIES, INSTALLER_BUSY_DELAY
+from scripts.core.silent_install import install_profile, load_manifest
+
+logger = logging.getLogger(__name__)
+
+LOCAL_MAX_PARALLEL = 3
+
+# Windows Installer holds a machine wide mutex, a second msiexec only fails with 1618.
+# InstallShield setups hand over to an embedded msiexec (/v/qn), so they queue up the same way.
+EXCLUSIVE_EXTENSIONS = ('.msi', '.msix')
+EXCLUSIVE_FRAMEWORKS = ('msi', 'msix', 'installshield')
+
+AUTOMATION_PATH = os.path.join('functions', 'automate')
+
+
+def installer_command(program_path, args=()):
+    # Run installers directly instead of through the shell's file associations
+    extension = os.path.splitext(program_path)[1].lower()
+    if extension == '.msi':
+        return ["msiexec", "/i", program_path, *args]
+    if extension == '.msix':
+        # Folder names come from Programs/, the path must not end the quoted literal early
+        return ["powershell", "-NoProfile", "-Command", f"Add-AppxPackage -Path {powershell_quote(program_path)}"]
+    return [program_path, *args]
+
+
+def run_installer(profile, cancel_event=None):
+    return run_command(installer_command(profile.path, profile.silent_args), cancel_event=cancel_event)
+
+
+def automation_script(program_name):
+    script = os.path.join(AUTOMATION_PATH, f'auto_{program_name}.py')
+    return script if os.path.isfile(script) else None
+
+
+class LocalJob:
+    def __init__(self, name, installers):
+        self.name = name
+        self.installers = installers
+        self.profiles = None
+        self.success = None
+        # Why the job failed before it ran (e.g. a SHA256SUMS mismatch), for the caller to show
+        self.error = None
+
+    def resolve_profiles(self):
+        # Reads install.json and sniffs the installers, so it runs on the scheduler thread
+        if self.profiles is None:
+            manifest = load_manifest(os.path.dirname(self.installers[0])) if self.installers else {}
+            self.profiles = [install_profile(path, manifest) for path in self.installers]
+            for profile in self.profiles:
+                logger.info(f"{self.name}: {profile}")
+        return self.profiles
+
+    @property
+    def exclusive(self):
+        return (any(os.path.splitext(path)[1].lower() in EXCLUSIVE_EXTENSIONS for path in self.installers)
+                or any(profile.framework in EXCLUSIVE_FRAMEWORKS for profile in self.resolve_profiles()))
+
+    @property
+    def interactive(self):
+        # Wizards (and their pyautogui helpers) need the desktop to themselves
+        return any(profile.interactive for profile in self.resolve_profiles())
+
+
+class LocalInstallScheduler:
+    # Runs silent .exe installers side by side; Windows Installer jobs and interactive wizards one at a time
+    def __init__(self, jobs, run_installer=run_installer, max_workers=LOCAL_MAX_PARALLEL,
+                 on_job_finished=None, on_all_finished=None, verify=verify_installers,
+                 busy_retries=INSTALLER_BUSY_RETRIES, busy_delay=INSTALLER_BUSY_DELAY, on_job_started=None):
+        self.jobs = jobs
+        self.run_installer = run_installer
+        self.verify = verify
+        self.max_workers = max_workers
+        self.busy_retries = busy_retries
+        self.busy_delay = busy_delay
+        self.on_job_started = on_job_started
+        self.on_job_finished = on_job_finished
+        self.on_all_finished = on_all_finished
+        self.cancelled = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run_job(self, job):
+        # Called once a worker picks the job up, queued jobs may wait behind an exclusive one for a while
+        if self.on_job_started:
+            self.on_job_started(job.name)
+        for profile in job.resolve_profiles():
+            if self.cancelled.is_set():
+                return False
+            logger.info(f"Starting installation of {job.name}: {profile.path} {' '.join(profile.silent_args)}",
+                        extra={'program': job.name, 'framework': profile.framework})
+            if profile.interactive:
+                # Last resort for wizards without silent switches, the helper clicks through while the window is up
+                script = automation_script(job.name)
+                if script:
+                    start_process([sys.executable, script])
+                else:
+                    logger.warning(f"No silent switches or automation script for {profile.path}, waiting for the user")
+            for attempt in range(self.busy_retries + 1):
+                result = self.run_installer(profile, cancel_event=self.cancelled)
+                # An .exe that wraps an MSI we couldn't tell apart still runs into another msiexec
+                if not result.success and is_installer_busy(result) and attempt < self.busy_retries and not self.cancelled.is_set():
+                    logger.warning(f"Another installer is running, retrying {job.name} in {self.busy_delay}s", extra={'program': job.name})
+                    self.cancelled.wait(self.busy_delay)
+                    continue
+                break
+            if not result.success:
+                logger.error(f"Failed to install {job.name}: {result.message}", extra={'program': job.name, 'status': result.status})
+                return False
+        logger.info(f"Successfully installed {job.name}", extra={'program': job.name})
+        return True
+
+    def _next_jobs(self, pending, running):
+        # Queue order, skipping Windows Installer jobs and wizards while one of the same kind is running
+        exclusive_running = any(job.exclusive for job in running.values())
+        interactive_running = any(job.interactive for job in running.values())
+        ready = []
+        for job in pending:
+            if len(running) + len(ready) >= self.max_workers:
+                break
+            if (job.exclusive and exclusive_running) or (job.interactive and interactive_running):
+                continue
+            exclusive_running = exclusive_running or job.exclusive
+            interactive_running = interactive_running or job.interactive
+            ready.append(job)
+        return ready
+
+    def _verified(self, jobs):
+        # Hashing the selection can take minutes from a share, so it happens here and not before start()
+        if self.verify is None:
+            return list(jobs)
+        try:
+            results = self.verify([path for job in jobs for path in job.installers])
+        except Exception as e:
+            logger.error(f"Could not verify the installers: {e}")
+            results = {path: f"Could not verify {os.path.basename(path)}: {e}" for job in jobs for path in job.installers}
+        verified = []
+        for job in jobs:
+            errors = [results[path] for path in job.installers if results.get(path)]
+            if errors:
+                logger.error(f"Installer verification failed for {job.name}: {errors[0]}")
+                job.error = '\n'.join(errors)
+                self._finish(job, False)
+            else:
+                verified.append(job)
+        return verified
+
+    def run(self):
+        pending = self._verified(self.jobs)
+        for job in list(pending):
+            try:
+                job.resolve_profiles()
+            except Exception as e:
+                logger.error(f"Could not read the install profile of {job.name}: {e}")
+                job.profiles = []
+                pending.remove(job)
+                self._finish(job, False)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                if not self.cancelled.is_set():
+                    for job in self._next_jobs(pending, running):
+                        pending.remove(job)
+                        running[executor.submit(self.run_job, job)] = job
+                if not running:
+                    for job in pending:
+                        logger.error(f"Skipped {job.name}")
+                        self._finish(job, False)
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job = running.pop(future)
+                    try:
+                        success = future.result()
+                    except Exception as e:
+                        logger.error(f"Exception occurred while installing {job.name}: {e}")
+                        success = False
+                    self._finish(job, success)
+        if self.on_all_finished:
+            self.on_all_finished()
+
+    def _finish(self, job, success):
+        job.success = success
+        if self.on_job_finished:
+            self.on_job_finished(job.name, success)
@@ -0,0 +1,97 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+# One logging pipeline for the GUI, the CLI and the benchmarks.
+# Callers only put records on a queue; a listener thread does the file and console I/O,
+# so list population and the scheduler workers never wait on a disk or a slow console.
+LOG_PATH = 'log.txt'
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+CONSOLE_FORMAT = '%(message)s'
+
+# Per-component levels, by logger name (modules log through logging.getLogger(__name__)).
+# Overridden with PYTHONUTIL_LOG_LEVELS="scripts.core.executor=DEBUG,scripts.winget_manager=WARNING"
+COMPONENT_LEVELS = {
+    'scripts': logging.INFO,
+    'main': logging.INFO,
+}
+LEVELS_ENV = 'PYTHONUTIL_LOG_LEVELS'
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_listeners = []
+_lock = threading.Lock()
+
+
+class StructuredFormatter(logging.Formatter):
+    # Appends the fields passed as extra={'package': ..., 'attempt': ...} as key=value pairs
+    def format(self, record):
+        text = super().format(record)
+        fields = {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES and not key.startswith('_')}
+        if fields:
+            text += ' | ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+def parse_levels(text):
+    levels = {}
+    for item in (text or '').split(','):
+        name, _, level = item.partition('=')
+        if not level:
+            continue
+        value = logging.getLevelName(level.strip().upper())
+        if isinstance(value, int):
+            levels[name.strip()] = value
+    return levels
+
+
+def queued_handler(*handlers):
+    # Returns a QueueHandler whose records are written by `handlers` on a listener thread
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    with _lock:
+        if not _listeners:
+            atexit.register(stop_logging)
+        _listeners.append(listener)
+    return logging.handlers.QueueHandler(records)
+
+
+def stop_logging():
+    # Flushes whatever is still queued; registered with atexit by the first listener
+    with _lock:
+        listeners = list(_listeners)
+        _listeners.clear()
+    for listener in listeners:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def configure_logging(path=LOG_PATH, console=sys.stdout, levels=None):
+    # Replaces the old per-module basicConfig calls. console=None logs to the file only.
+    root = logging.getLogger()
+    if any(isinstance(handler, logging.handlers.QueueHandler) for handler in root.handlers):
+        return
+    file_handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8', delay=True
+    )
+    file_handler.setFormatter(StructuredFormatter(LOG_FORMAT))
+    handlers = [file_handler]
+    if console is not None:
+        console_handler = logging.StreamHandler(console)
+        console_handler.setLevel(logging.INFO)
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        handlers.append(console_handler)
+
+    root.setLevel(logging.WARNING)
+    root.addHandler(queued_handler(*handlers))
+    for name, level in {**COMPONENT_LEVELS, **(levels or {}), **parse_levels(os.environ.get(LEVELS_ENV))}.items():
+        logging.getLogger(name).setLevel(level)
@@ -0,0 +1,126 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Where every package in a list stands, keyed by package Id: the winget Id for winget.json
+# entries, the folder or uninstall.json name for lists that have no winget Id.
+# The GUI renders rows from these states; nothing is parsed back out of item text.
+UNKNOWN = 'unknown'  # the inventory isn't in yet
+NOT_INSTALLED = 'not_installed'
+QUEUED = 'queued'
+RUNNING = 'running'
+INSTALLED = 'installed'
+FAILED = 'failed'
+UPDATE_AVAILABLE = 'update_available'
+
+# States the inventory decides; queued and running packages keep theirs until their job reports back
+SETTLED_STATES = (NOT_INSTALLED, INSTALLED, UPDATE_AVAILABLE)
+BUSY_STATES = (QUEUED, RUNNING)
+
+TRANSITIONS = {
+    UNKNOWN: {NOT_INSTALLED, INSTALLED, UPDATE_AVAILABLE},
+    NOT_INSTALLED: {QUEUED, INSTALLED, UPDATE_AVAILABLE},
+    INSTALLED: {QUEUED, NOT_INSTALLED, UPDATE_AVAILABLE},
+    UPDATE_AVAILABLE: {QUEUED, NOT_INSTALLED, INSTALLED},
+    # A job can fail before it starts (e.g. a missing installer), and the bulk import finishes
+    # packages it never reported progress for
+    QUEUED: {RUNNING, FAILED, NOT_INSTALLED, INSTALLED, UPDATE_AVAILABLE},
+    RUNNING: {FAILED, NOT_INSTALLED, INSTALLED, UPDATE_AVAILABLE},
+    FAILED: {QUEUED, NOT_INSTALLED, INSTALLED, UPDATE_AVAILABLE},
+}
+
+
+def inventory_state(installed, update_available=False):
+    if installed is None:
+        return UNKNOWN
+    if not installed:
+        return NOT_INSTALLED
+    return UPDATE_AVAILABLE if update_available else INSTALLED
+
+
+class PackageEntry:
+    __slots__ = ('package_id', 'row', 'state', 'installed', 'update_available', 'action')
+
+    def __init__(self, package_id, row):
+        self.package_id = package_id
+        self.row = row
+        self.state = UNKNOWN
+        # What the inventory last said, kept apart from the state so a failed or running
+        # package still knows whether it is on the machine
+        self.installed = None
+        self.update_available = False
+        # 'install', 'upgrade' or 'uninstall' while queued/running, and after it finished until the next run
+        self.action = None
+
+
+class PackageStateStore:
+    def __init__(self):
+        self.entries = {}
+
+    def load(self, packages):
+        # packages: [(package_id, row), ...]; returns the entries in the same order
+        self.entries = {}
+        loaded = []
+        for package_id, row in packages:
+            entry = PackageEntry(package_id, row)
+            if package_id in self.entries:
+                logger.warning(f"***[Packages]*** {package_id} is listed more than once, only the last row is tracked")
+            self.entries[package_id] = entry
+            loaded.append(entry)
+        return loaded
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def get(self, package_id):
+        return self.entries.get(package_id)
+
+    def row_for(self, package_id):
+        entry = self.entries.get(package_id)
+        return None if entry is None else entry.row
+
+    def _move(self, entry, state, action):
+        if state != entry.state and state not in TRANSITIONS[entry.state]:
+            logger.warning(f"***[Packages]*** Ignoring {entry.package_id}: {entry.state} -> {state}")
+            return False
+        if state == entry.state and action == entry.action:
+            return False
+        entry.state = state
+        entry.action = action
+        return True
+
+    def set_inventory(self, package_id, installed, update_available=False):
+        # Returns the entry when anything visible changed, None otherwise
+        entry = self.entries.get(package_id)
+        if entry is None or (entry.installed == installed and entry.update_available == update_available):
+            return None
+        entry.installed = installed
+        entry.update_available = bool(update_available)
+        if entry.state not in BUSY_STATES and entry.state != FAILED:
+            # A refresh is news from outside, it replaces the marker of the last run
+            self._move(entry, inventory_state(installed, update_available), None)
+        return entry
+
+    def transition(self, package_id, state, action=None, installed=None, update_available=None):
+        # Moves a package along the state machine; a job's outcome also corrects the inventory flags
+        entry = self.entries.get(package_id)
+        if entry is None:
+            return None
+        if installed is not None:
+            entry.installed = installed
+        if update_available is not None:
+            entry.update_available = update_available
+        return entry if self._move(entry, state, entry.action if action is None else action) else None
+
+    def settle(self):
+        # Start of a new run: failed and finished markers go, every idle package shows the inventory again
+        changed = []
+        for entry in self.entries.values():
+            if entry.state in BUSY_STATES or entry.installed is None:
+                continue
+            if self._move(entry, inventory_state(entry.installed, entry.update_available), None):
+                changed.append(entry)
+        return changed
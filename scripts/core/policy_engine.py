@@ -0,0 +1,178 @@
+import json
+import logging
+
+from scripts.core import registry_backend
+from scripts.core.executor import run_command
+from scripts.core.registry_backend import VALUE_TYPES
+from scripts.core.spans import span
+
+logger = logging.getLogger(__name__)
+
+POLICIES_PATH = 'functions/policies/policies.json'
+
+
+# Marks a registry value that doesn't exist
+MISSING = object()
+
+
+class PolicyResult:
+    # status is one of: written, removed, unchanged, not_found, failed
+    def __init__(self, policy, action, status, error=None):
+        self.policy = policy
+        self.action = action
+        self.status = status
+        self.error = error
+
+    @property
+    def name(self):
+        return self.policy['regName']
+
+    @property
+    def failed(self):
+        return self.status == 'failed'
+
+    def __repr__(self):
+        return f"PolicyResult({self.policy['regPath']}\\{self.name}, {self.action}, {self.status})"
+
+
+def load_policies(path=POLICIES_PATH):
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def split_reg_path(reg_path):
+    # 'HKLM:\\SOFTWARE\\Policies\\...' -> ('HKLM', 'SOFTWARE\\Policies\\...')
+    hive, _, path = reg_path.partition(':')
+    return hive.upper(), path.strip('\\')
+
+
+def policy_value(policy, value):
+    value_type = VALUE_TYPES[policy['type']]
+    if value_type in (registry_backend.REG_DWORD, registry_backend.REG_QWORD):
+        return int(value), value_type
+    return str(value), value_type
+
+
+def read_current(policy, backend):
+    hive, path = split_reg_path(policy['regPath'])
+    try:
+        return backend.read_value(hive, path, policy['regName'])
+    except FileNotFoundError:
+        return MISSING
+
+
+class PolicyChange:
+    # operation is one of: set, delete, none
+    def __init__(self, policy, action, current, operation):
+        self.policy = policy
+        self.action = action
+        self.current = current
+        self.operation = operation
+
+    @property
+    def name(self):
+        return self.policy['regName']
+
+    def __repr__(self):
+        return f"PolicyChange({self.policy['regPath']}\\{self.name}, {self.action}, {self.operation})"
+
+
+def plan_policy(policy, action, backend):
+    # Read-only: work out what `action` would have to write for this policy
+    current = read_current(policy, backend)
+    if action == 'apply':
+        desired = policy_value(policy, policy['regValue'])
+        return PolicyChange(policy, action, current, 'none' if current == desired else 'set')
+    # Revert removes our value, unless it's already gone or already holds the revert value
+    if current is MISSING or current == policy_value(policy, policy['regValueRevert']):
+        return PolicyChange(policy, action, current, 'none')
+    return PolicyChange(policy, action, current, 'delete')
+
+
+def plan_policies(policies, action, backend=None):
+    backend = backend or registry_backend.default_backend()
+    plan = []
+    with span('registry', 'policy scan', policies=len(policies)):
+        for policy in policies:
+            try:
+                plan.append(plan_policy(policy, action, backend))
+            except Exception as e:
+                # Unreadable values are treated as drifted, the write will report the real error
+                logger.warning(f"Could not read policy '{policy.get('regName')}': {e}")
+                plan.append(PolicyChange(policy, action, MISSING, 'set' if action == 'apply' else 'delete'))
+    return plan
+
+
+def apply_policy(policy, backend):
+    hive, path = split_reg_path(policy['regPath'])
+    value, value_type = policy_value(policy, policy['regValue'])
+    logger.info(f"Setting policy: Path='{policy['regPath']}', Name='{policy['regName']}', Value='{value}' ({policy['type']})")
+    backend.write_value(hive, path, policy['regName'], value, value_type)
+    return PolicyResult(policy, 'apply', 'written')
+
+
+def revert_policy(policy, backend):
+    hive, path = split_reg_path(policy['regPath'])
+    try:
+        backend.delete_value(hive, path, policy['regName'])
+    except FileNotFoundError:
+        logger.info(f"Policy not found: Path='{policy['regPath']}', Name='{policy['regName']}'")
+        return PolicyResult(policy, 'revert', 'not_found')
+    logger.info(f"Removing policy: Path='{policy['regPath']}', Name='{policy['regName']}'")
+    return PolicyResult(policy, 'revert', 'removed')
+
+
+def execute_plan(plan, backend=None):
+    # Registry writes take microseconds, so one sequential pass beats a PowerShell process per policy
+    backend = backend or registry_backend.default_backend()
+    results = []
+    for change in plan:
+        if change.operation == 'none':
+            results.append(PolicyResult(change.policy, change.action, 'unchanged'))
+            continue
+        handler = apply_policy if change.operation == 'set' else revert_policy
+        try:
+            with span('registry', f"policy {change.operation}", target=change.name):
+                results.append(handler(change.policy, backend))
+        except Exception as e:
+            logger.error(f"Failed to {change.action} policy '{change.name}': {e}")
+            results.append(PolicyResult(change.policy, change.action, 'failed', str(e)))
+    return results
+
+
+def execute_policies(policies, action, backend=None):
+    # Only entries that drifted from the wanted state are written
+    backend = backend or registry_backend.default_backend()
+    return execute_plan(plan_policies(policies, action, backend), backend)
+
+
+def changed_anything(results):
+    return any(result.status in ('written', 'removed') for result in results)
+
+
+def refresh_group_policy():
+    # None when gpupdate went through, the error otherwise
+    logger.info("Refreshing group policy settings...")
+    try:
+        result = run_command(["gpupdate", "/force"])
+    except OSError as e:
+        error = str(e)
+    else:
+        if result.success:
+            return None
+        error = result.message
+    logger.error(f"gpupdate failed: {error}")
+    return f"gpupdate failed: {error}"
+
+
+def run_policies(action, backend=None):
+    # (results, gpupdate error or None); the registry writes stand even when gpupdate fails,
+    # so the per-policy results are returned either way
+    results = execute_policies(load_policies(), action, backend)
+    refresh_error = None
+    # gpupdate takes up to a minute on domain machines, skip it when nothing was written
+    if changed_anything(results):
+        refresh_error = refresh_group_policy()
+    else:
+        logger.info("No policy changes, skipping gpupdate.")
+    return results, refresh_error
@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+import logging
+
+from scripts.core.json_files import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+PROGRAMS_PATH = 'Programs'
+CATALOG_PATH = os.path.join('cache', 'programs.json')
+# Installers are run in this order when a program folder has more than one
+INSTALLER_EXTENSIONS = ('.exe', '.msi', '.msix')
+
+
+def _scan_directories(path):
+    # One scandir call -> {name: mtime_ns} of the subdirectories; on Windows DirEntry.stat()
+    # comes from the directory listing itself, so it costs no extra round trip to the share
+    directories = {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                directories[entry.name] = entry.stat().st_mtime_ns
+    return directories
+
+
+def _scan_installers(path):
+    installers = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            extension = os.path.splitext(entry.name)[1].lower()
+            if extension in INSTALLER_EXTENSIONS and entry.is_file():
+                stat = entry.stat()
+                installers.append({'name': entry.name, 'size': stat.st_size, 'mtime': stat.st_mtime_ns})
+    installers.sort(key=lambda installer: (INSTALLER_EXTENSIONS.index(os.path.splitext(installer['name'])[1].lower()), installer['name']))
+    return installers
+
+
+class ProgramCatalog:
+    # category -> program -> installers, cached on disk and revalidated by directory mtime:
+    # a folder only gets listed again when an entry inside it was added, removed or renamed
+    def __init__(self, root=PROGRAMS_PATH, path=CATALOG_PATH):
+        self.root = root
+        self.path = path
+        # {category: {program: {'mtime': ns, 'installers': [{'name', 'size', 'mtime'}]}}}
+        self.categories = None
+        self.program_categories = {}
+        # refresh() runs on the inventory worker while the GUI may look up installers
+        self.lock = threading.RLock()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                snapshot = json.load(file)
+            if snapshot['root'] != os.path.abspath(self.root):
+                return False
+            self.categories = snapshot['categories']
+            return True
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def save(self):
+        atomic_write_json(self.path, {'root': os.path.abspath(self.root), 'categories': self.categories})
+
+    def cached(self):
+        # What the last run saw, without touching the share; empty on a first run
+        with self.lock:
+            if self.categories is None:
+                self._set_categories(self.categories if self.load() else {})
+            return self.categories
+
+    def refresh(self):
+        # Lists the root and every category folder; program folders only when their mtime moved
+        with self.lock:
+            if self.categories is None:
+                self.load()
+            previous = self.categories or {}
+        categories = {}
+        rescanned = 0
+        for category in sorted(_scan_directories(self.root)):
+            known_programs = previous.get(category, {})
+            programs = {}
+            for program, mtime in sorted(_scan_directories(os.path.join(self.root, category)).items()):
+                known = known_programs.get(program)
+                if known is not None and known['mtime'] == mtime:
+                    programs[program] = known
+                else:
+                    programs[program] = {'mtime': mtime, 'installers': _scan_installers(os.path.join(self.root, category, program))}
+                    rescanned += 1
+            categories[category] = programs
+        with self.lock:
+            changed = categories != self.categories
+            self._set_categories(categories)
+            if changed:
+                self.save()
+        logger.info(f"***[Programs]*** Catalog of {len(self.program_categories)} programs, {rescanned} folders rescanned")
+        return self.categories
+
+    def _set_categories(self, categories):
+        self.categories = categories
+        self.program_categories = {
+            program: category for category, programs in categories.items() for program in programs
+        }
+
+    def ensure_loaded(self):
+        if self.categories is None:
+            self.refresh()
+        return self.categories
+
+    def category_for(self, program_name):
+        self.ensure_loaded()
+        return self.program_categories.get(program_name)
+
+    def program_folder(self, program_name):
+        category = self.category_for(program_name)
+        return os.path.join(self.root, category, program_name) if category is not None else None
+
+    def installers(self, program_name):
+        # Paths of the program's installers; re-lists the folder only if it changed since the catalog was built
+        category = self.category_for(program_name)
+        if category is None:
+            return []
+        folder = os.path.join(self.root, category, program_name)
+        entry = self.categories[category][program_name]
+        try:
+            mtime = os.stat(folder).st_mtime_ns
+        except OSError:
+            return []
+        if mtime != entry['mtime']:
+            installers = _scan_installers(folder)
+            with self.lock:
+                entry['mtime'] = mtime
+                entry['installers'] = installers
+                self.save()
+        return [os.path.join(folder, installer['name']) for installer in entry['installers']]
+
+
+program_catalog = ProgramCatalog()
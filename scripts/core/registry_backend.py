@@ -0,0 +1,126 @@
+try:
+    import winreg
+except ImportError:  # Not on Windows, only an injected backend is usable
+    winreg = None
+
+# Same numbers as winreg.REG_*, so callers don't need winreg to talk about value types
+REG_SZ = 1
+REG_EXPAND_SZ = 2
+REG_BINARY = 3
+REG_DWORD = 4
+REG_MULTI_SZ = 7
+REG_QWORD = 11
+
+# Names used by PowerShell's -Type / policies.json
+VALUE_TYPES = {
+    'String': REG_SZ,
+    'ExpandString': REG_EXPAND_SZ,
+    'Binary': REG_BINARY,
+    'DWORD': REG_DWORD,
+    'MultiString': REG_MULTI_SZ,
+    'QWORD': REG_QWORD,
+}
+
+
+class WinregBackend:
+    def __init__(self):
+        self.hives = {
+            'HKLM': winreg.HKEY_LOCAL_MACHINE,
+            'HKCU': winreg.HKEY_CURRENT_USER,
+        }
+        # Always use the 64-bit view so a 32-bit Python doesn't get redirected to WOW6432Node
+        self.view = winreg.KEY_WOW64_64KEY
+
+    def read_subkeys(self, hive, path, value_names):
+        # One pass over every subkey of `path`, returning [(subkey_name, {value_name: value})]
+        entries = []
+        access = winreg.KEY_READ | self.view
+        with winreg.OpenKey(self.hives[hive], path, 0, access) as key:
+            for i in range(winreg.QueryInfoKey(key)[0]):
+                sub_key_name = winreg.EnumKey(key, i)
+                values = {}
+                try:
+                    with winreg.OpenKey(key, sub_key_name, 0, access) as sub_key:
+                        for value_name in value_names:
+                            try:
+                                values[value_name] = winreg.QueryValueEx(sub_key, value_name)[0]
+                            except FileNotFoundError:
+                                pass
+                except OSError:
+                    continue
+                entries.append((sub_key_name, values))
+        return entries
+
+    def read_value(self, hive, path, name):
+        # Returns (value, type), raises FileNotFoundError when the key or value is missing
+        with winreg.OpenKey(self.hives[hive], path, 0, winreg.KEY_READ | self.view) as key:
+            return winreg.QueryValueEx(key, name)
+
+    def write_value(self, hive, path, name, value, value_type):
+        with winreg.CreateKeyEx(self.hives[hive], path, 0, winreg.KEY_SET_VALUE | self.view) as key:
+            winreg.SetValueEx(key, name, 0, value_type, value)
+
+    def delete_value(self, hive, path, name):
+        with winreg.OpenKey(self.hives[hive], path, 0, winreg.KEY_SET_VALUE | self.view) as key:
+            winreg.DeleteValue(key, name)
+
+
+class FakeRegistryBackend:
+    # hives = {'HKLM': {r'SOFTWARE\...\Uninstall\SubKey': {'DisplayName': 'App'}}}
+    # Key paths are case insensitive like the real registry.
+    def __init__(self, hives=None):
+        self.keys = {}
+        self.types = {}
+        for hive, keys in (hives or {}).items():
+            for path, values in keys.items():
+                self.keys[(hive, path.lower())] = (path, dict(values))
+
+    def read_subkeys(self, hive, path, value_names):
+        prefix = path.lower() + '\\'
+        entries = []
+        found = (hive, path.lower()) in self.keys
+        for (key_hive, key_path), (original_path, values) in self.keys.items():
+            if key_hive == hive and key_path.startswith(prefix) and '\\' not in key_path[len(prefix):]:
+                found = True
+                sub_key_name = original_path[len(prefix):]
+                entries.append((sub_key_name, {name: values[name] for name in value_names if name in values}))
+        if not found:
+            raise FileNotFoundError(f"{hive}\\{path}")
+        return entries
+
+    def read_value(self, hive, path, name):
+        key = self.keys.get((hive, path.lower()))
+        if key is None or name not in key[1]:
+            raise FileNotFoundError(f"{hive}\\{path}\\{name}")
+        value = key[1][name]
+        default_type = REG_DWORD if isinstance(value, int) else REG_SZ
+        return value, self.types.get((hive, path.lower(), name), default_type)
+
+    def write_value(self, hive, path, name, value, value_type):
+        self.keys.setdefault((hive, path.lower()), (path, {}))[1][name] = value
+        self.types[(hive, path.lower(), name)] = value_type
+
+    def delete_value(self, hive, path, name):
+        key = self.keys.get((hive, path.lower()))
+        if key is None or name not in key[1]:
+            raise FileNotFoundError(f"{hive}\\{path}\\{name}")
+        del key[1][name]
+
+
+_backend = None
+
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
+
+
+def default_backend():
+    # Tests and benchmarks inject a FakeRegistryBackend through set_backend; anywhere else
+    # a silent fake would report policies as written that never reached a registry
+    global _backend
+    if _backend is None:
+        if winreg is None:
+            raise RuntimeError("The Windows registry is not available on this platform")
+        _backend = WinregBackend()
+    return _backend
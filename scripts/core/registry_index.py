@@ -0,0 +1,116 @@
+import re
+import threading
+import logging
+
+from scripts.core import registry_backend
+from scripts.core.spans import span
+
+logger = logging.getLogger(__name__)
+
+UNINSTALL_KEY = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"
+UNINSTALL_KEY_WOW64 = r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall"
+
+# Scanned in this order, the first match wins when several entries share a name
+UNINSTALL_LOCATIONS = [
+    ('HKLM', UNINSTALL_KEY),
+    ('HKLM', UNINSTALL_KEY_WOW64),
+    ('HKCU', UNINSTALL_KEY),
+]
+
+UNINSTALL_VALUES = ('DisplayName', 'DisplayVersion', 'UninstallString', 'QuietUninstallString')
+
+_GUID_RE = re.compile(r'^\{[0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{12}\}$')
+
+
+def set_backend(backend):
+    # Tests and benchmarks swap in a FakeRegistryBackend here
+    registry_backend.set_backend(backend)
+    invalidate_uninstall_index()
+
+
+class UninstallIndex:
+    def __init__(self, entries):
+        self.entries = entries
+        self._matches = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def find_all(self, program_name):
+        key = program_name.lower()
+        return [entry for entry in self.entries if key in entry['display_name_lower']]
+
+    def find(self, program_name):
+        # Same matching rule as before: the program name is contained in DisplayName
+        key = program_name.lower()
+        if key not in self._matches:
+            self._matches[key] = next((entry for entry in self.entries if key in entry['display_name_lower']), None)
+        return self._matches[key]
+
+
+def build_uninstall_index(backend=None):
+    backend = backend or registry_backend.default_backend()
+    entries = []
+    # Installers that register in more than one root show up once: by product code, else by name
+    seen = {}
+    for hive, path in UNINSTALL_LOCATIONS:
+        try:
+            with span('registry', 'read uninstall key', target=f"{hive}\\{path}") as fields:
+                sub_keys = backend.read_subkeys(hive, path, UNINSTALL_VALUES)
+                fields['subkeys'] = len(sub_keys)
+        except FileNotFoundError:
+            continue
+        for sub_key_name, values in sub_keys:
+            display_name = values.get('DisplayName')
+            if not display_name:
+                continue
+            entry = {
+                'hive': hive,
+                'key': f"{path}\\{sub_key_name}",
+                'DisplayName': display_name,
+                'DisplayVersion': values.get('DisplayVersion', ''),
+                'UninstallString': values.get('UninstallString', ''),
+                'QuietUninstallString': values.get('QuietUninstallString', ''),
+                # Windows Installer entries are keyed by their product code
+                'ProductCode': sub_key_name if _GUID_RE.match(sub_key_name) else '',
+                'display_name_lower': display_name.lower(),
+            }
+            identity = entry['ProductCode'].lower() or entry['display_name_lower']
+            if identity in seen:
+                # The first root wins, later ones only fill in what it left empty
+                kept = seen[identity]
+                for name in ('DisplayVersion', 'UninstallString', 'QuietUninstallString'):
+                    kept[name] = kept[name] or entry[name]
+                continue
+            seen[identity] = entry
+            entries.append(entry)
+    logger.info(f"***[Registry]*** Indexed {len(entries)} uninstall entries")
+    return UninstallIndex(entries)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_uninstall_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = build_uninstall_index()
+        return _index
+
+
+def refresh_uninstall_index():
+    # Rescans outside the lock, lookups keep answering from the old snapshot until the new one is swapped in
+    global _index
+    index = build_uninstall_index()
+    with _index_lock:
+        _index = index
+    return index
+
+
+def invalidate_uninstall_index():
+    # The next lookup rescans the registry once
+    global _index
+    with _index_lock:
+        _index = None
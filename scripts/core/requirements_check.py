@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import site
+import logging
+from importlib import metadata
+
+from scripts.core.executor import run_command
+from scripts.core.json_files import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+try:
+    from packaging.requirements import Requirement, InvalidRequirement
+except ImportError:  # Without packaging we can still check that a distribution is installed
+    Requirement = None
+
+FINGERPRINT_PATH = os.path.join('cache', 'environment.json')
+
+_NAME_RE = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+
+def parse_requirements(path):
+    # Plain requirement lines only; comments, blank lines and pip options (-r, --index-url, ...) are skipped
+    requirements = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.split('#', 1)[0].strip()
+            if line and not line.startswith('-'):
+                requirements.append(line)
+    return requirements
+
+
+def is_satisfied(requirement):
+    if Requirement is not None:
+        try:
+            parsed = Requirement(requirement)
+        except InvalidRequirement:
+            parsed = None
+        if parsed is not None:
+            if parsed.marker is not None and not parsed.marker.evaluate():
+                return True
+            try:
+                installed_version = metadata.version(parsed.name)
+            except metadata.PackageNotFoundError:
+                return False
+            return not parsed.specifier or parsed.specifier.contains(installed_version, prereleases=True)
+    match = _NAME_RE.match(requirement)
+    if not match:
+        return False
+    try:
+        metadata.version(match.group(1))
+        return True
+    except metadata.PackageNotFoundError:
+        return False
+
+
+def missing_requirements(path):
+    return [requirement for requirement in parse_requirements(path) if not is_satisfied(requirement)]
+
+
+def _site_directories():
+    directories = set(site.getsitepackages()) if hasattr(site, 'getsitepackages') else set()
+    user_site = site.getusersitepackages() if hasattr(site, 'getusersitepackages') else None
+    if user_site:
+        directories.add(user_site)
+    return sorted(directories)
+
+
+def environment_fingerprint(requirements_path):
+    # Installing or removing a distribution touches the site-packages directory, so its mtime
+    # together with the interpreter and the requirements file tells us whether anything changed
+    digest = hashlib.sha256()
+    digest.update(sys.executable.encode())
+    digest.update(sys.version.encode())
+    with open(requirements_path, 'rb') as file:
+        digest.update(file.read())
+    for directory in _site_directories():
+        try:
+            digest.update(f"{directory}:{os.stat(directory).st_mtime_ns}".encode())
+        except OSError:
+            digest.update(f"{directory}:missing".encode())
+    return digest.hexdigest()
+
+
+def _load_fingerprints(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_fingerprints(path, fingerprints):
+    atomic_write_json(path, fingerprints, indent=4)
+
+
+def pip_install(requirements):
+    logger.info(f"Installing missing requirements: {', '.join(requirements)}")
+    result = run_command([sys.executable, '-m', 'pip', 'install', *requirements])
+    if not result.success:
+        raise RuntimeError(f"pip install failed: {result.stderr.strip() or result.message}")
+
+
+def ensure_requirements(requirements_path, install=pip_install, fingerprint_path=FINGERPRINT_PATH):
+    # Returns the requirements that had to be installed; an unchanged environment skips pip entirely
+    if not os.path.isfile(requirements_path):
+        return []
+    key = os.path.abspath(requirements_path)
+    fingerprints = _load_fingerprints(fingerprint_path)
+    if fingerprints.get(key) == environment_fingerprint(requirements_path):
+        logger.info(f"Requirements in {requirements_path} unchanged since the last check")
+        return []
+
+    missing = missing_requirements(requirements_path)
+    if missing:
+        install(missing)
+    fingerprints[key] = environment_fingerprint(requirements_path)
+    _save_fingerprints(fingerprint_path, fingerprints)
+    return missing
@@ -0,0 +1,46 @@
+import re
+
+# Incremental search over the package lists. Every prefix of every token of a package's
+# name, Id and category is a key of one dict, so each keystroke costs one lookup per query
+# term plus a set intersection, whatever the catalog size.
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    # "Mozilla.Firefox" -> ['mozilla', 'firefox']; a query is tokenized the same way,
+    # so "mozilla.fire" and "fire moz" both find it
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+class PrefixIndex:
+    def __init__(self, documents=()):
+        # documents: [(document_id, [text, ...]), ...]
+        self.prefixes = {}
+        for document_id, texts in documents:
+            self.add(document_id, texts)
+
+    def add(self, document_id, texts):
+        for text in texts:
+            for token in tokenize(text):
+                for end in range(1, len(token) + 1):
+                    self.prefixes.setdefault(token[:end], set()).add(document_id)
+
+    def __len__(self):
+        return len(self.prefixes)
+
+    def search(self, query):
+        # Documents matching every term of the query, None when the query has no terms (no filter)
+        terms = tokenize(query)
+        if not terms:
+            return None
+        sets = [self.prefixes.get(term) for term in set(terms)]
+        if not all(sets):
+            return set()
+        # Start from the smallest set, each intersection then only walks what is left
+        sets.sort(key=len)
+        result = set(sets[0])
+        for matches in sets[1:]:
+            result &= matches
+            if not result:
+                break
+        return result
@@ -0,0 +1,112 @@
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Optional file next to the installers:
+# {"silentArgs": ["/S"], "installers": {"setup.exe": {"silentArgs": [...]}, "other.exe": {"interactive": true}}}
+MANIFEST_NAME = 'install.json'
+
+SILENT_SWITCHES = {
+    'msi': ['/qn', '/norestart'],
+    'nsis': ['/S'],
+    'inno': ['/VERYSILENT', '/SUPPRESSMSGBOXES', '/NORESTART', '/SP-'],
+    # /v hands the rest to the embedded msiexec; unquoted so it survives argv quoting
+    'installshield': ['/s', '/v/qn'],
+}
+
+# Byte strings the frameworks leave in their stub or overlay, checked in this order
+SIGNATURES = [
+    ('inno', (b'Inno Setup Setup Data', b'JR.Inno.Setup')),
+    ('nsis', (b'NullsoftInst', b'Nullsoft.NSIS')),
+    ('installshield', (b'InstallShield',)),
+]
+# The markers sit in the PE resources or at the start of the overlay, well inside the first few MB
+SIGNATURE_SCAN_BYTES = 4 * 1024 * 1024
+_CHUNK_SIZE = 256 * 1024
+_OLE_HEADER = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+_detected = {}
+
+
+def detect_framework(path):
+    # 'msi', 'msix', 'nsis', 'inno', 'installshield' or None; cached per (path, size, mtime)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.msix':
+        return 'msix'
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key in _detected:
+        return _detected[key]
+
+    framework = None
+    overlap = max(len(marker) for _, markers in SIGNATURES for marker in markers)
+    with open(path, 'rb') as file:
+        head = file.read(len(_OLE_HEADER))
+        if extension == '.msi' or head == _OLE_HEADER:
+            framework = 'msi'
+        else:
+            found = set()
+            tail = head
+            scanned = len(head)
+            while scanned < SIGNATURE_SCAN_BYTES:
+                chunk = file.read(_CHUNK_SIZE)
+                if not chunk:
+                    break
+                scanned += len(chunk)
+                window = tail + chunk
+                for name, markers in SIGNATURES:
+                    if any(marker in window for marker in markers):
+                        found.add(name)
+                tail = window[-overlap:]
+            framework = next((name for name, _ in SIGNATURES if name in found), None)
+    _detected[key] = framework
+    return framework
+
+
+def load_manifest(folder):
+    manifest_path = os.path.join(folder, MANIFEST_NAME)
+    if not os.path.isfile(manifest_path):
+        return {}
+    with open(manifest_path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def _as_args(value):
+    return value.split() if isinstance(value, str) else list(value)
+
+
+class InstallProfile:
+    def __init__(self, path, framework, silent_args, interactive):
+        self.path = path
+        self.framework = framework
+        self.silent_args = silent_args
+        self.interactive = interactive
+
+    def __repr__(self):
+        return f"InstallProfile({os.path.basename(self.path)!r}, {self.framework}, interactive={self.interactive})"
+
+
+def install_profile(path, manifest=None):
+    # The manifest wins over detection; installers we can't make silent stay interactive
+    if manifest is None:
+        manifest = load_manifest(os.path.dirname(path))
+    entry = manifest.get('installers', {}).get(os.path.basename(path), {})
+    try:
+        framework = detect_framework(path)
+    except OSError as e:
+        logger.warning(f"Could not inspect {path}: {e}")
+        framework = None
+
+    if entry.get('interactive'):
+        return InstallProfile(path, framework, [], True)
+    if 'silentArgs' in entry:
+        return InstallProfile(path, framework, _as_args(entry['silentArgs']), False)
+    if 'silentArgs' in manifest:
+        return InstallProfile(path, framework, _as_args(manifest['silentArgs']), False)
+    if framework == 'msix':
+        return InstallProfile(path, framework, [], False)
+    if framework in SILENT_SWITCHES:
+        return InstallProfile(path, framework, list(SILENT_SWITCHES[framework]), False)
+    return InstallProfile(path, framework, [], True)
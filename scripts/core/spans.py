@@ -0,0 +1,144 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from scripts.core.log_setup import queued_handler
+
+logger = logging.getLogger(__name__)
+
+# Timing spans for every external command, registry pass and UI phase.
+# Each finished span is one JSON object per line in spans.jsonl (rotated like a log), and a
+# table of where the time went is logged (log.txt and the console) when the process exits.
+SPANS_PATH = 'spans.jsonl'
+SPANS_MAX_BYTES = 5 * 1024 * 1024
+SPANS_BACKUP_COUNT = 5
+SUMMARY_ROWS = 15
+
+INSTALLER_EXTENSIONS = ('.exe', '.msi', '.msix')
+
+
+class SpanRecorder:
+    def __init__(self, path=SPANS_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.totals = {}
+        self.slowest = []
+        self.logger = None
+
+    def _open(self):
+        # Opened on the first span, after the CLI/GUI have settled on their working directory
+        spans_logger = logging.getLogger('spans')
+        spans_logger.propagate = False
+        spans_logger.setLevel(logging.INFO)
+        handler = logging.handlers.RotatingFileHandler(
+            self.path, maxBytes=SPANS_MAX_BYTES, backupCount=SPANS_BACKUP_COUNT, encoding='utf-8', delay=True
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        # Written on the log listener thread, never by the command or UI code being timed
+        spans_logger.addHandler(queued_handler(handler))
+        atexit.register(self.print_summary)
+        return spans_logger
+
+    def record(self, kind, name, started, duration, fields):
+        span = {'ts': round(started, 3), 'kind': kind, 'name': name, 'duration': round(duration, 6), **fields}
+        with self.lock:
+            if self.logger is None:
+                self.logger = self._open()
+            count, total, longest, failed = self.totals.get((kind, name), (0, 0.0, 0.0, 0))
+            failed += bool(span.get('error')) or span.get('status') not in (None, 'success', 'reboot')
+            self.totals[(kind, name)] = (count + 1, total + duration, max(longest, duration), failed)
+            if span.get('target'):
+                self.slowest.append((duration, kind, name, span['target']))
+                if len(self.slowest) > SUMMARY_ROWS * 4:
+                    self.slowest = sorted(self.slowest, reverse=True)[:SUMMARY_ROWS]
+        try:
+            self.logger.info(json.dumps(span, ensure_ascii=False, default=str))
+        except Exception as e:
+            logger.warning(f"***[Spans]*** Could not write span {kind}/{name}: {e}")
+
+    def summary_lines(self):
+        with self.lock:
+            totals = sorted(self.totals.items(), key=lambda item: item[1][1], reverse=True)
+            slowest = sorted(self.slowest, reverse=True)[:SUMMARY_ROWS]
+        if not totals:
+            return []
+        lines = [f"{'kind':<11} {'name':<32} {'count':>6} {'total s':>9} {'mean s':>8} {'max s':>8} {'failed':>6}"]
+        for (kind, name), (count, total, longest, failed) in totals[:SUMMARY_ROWS]:
+            lines.append(f"{kind:<11} {name[:32]:<32} {count:>6} {total:>9.2f} {total / count:>8.3f} {longest:>8.3f} {failed:>6}")
+        if slowest:
+            lines.append('')
+            lines.append(f"{'slowest':<11} {'name':<32} {'target':<40} {'s':>8}")
+            for duration, kind, name, target in slowest:
+                lines.append(f"{kind:<11} {name[:32]:<32} {str(target)[-40:]:<40} {duration:>8.3f}")
+        return lines
+
+    def print_summary(self):
+        lines = self.summary_lines()
+        if not lines:
+            return
+        # Goes to log.txt and the console through the queued pipeline, before atexit stops it
+        logger.info('***[Spans]*** Timing summary\n' + '\n'.join(lines))
+
+
+recorder = SpanRecorder()
+
+
+@contextmanager
+def span(kind, name, **fields):
+    # with span('registry', 'uninstall index') as fields: ... fields['entries'] = n
+    started = time.time()
+    clock = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as e:
+        fields.setdefault('error', type(e).__name__)
+        raise
+    finally:
+        recorder.record(kind, name, started, time.perf_counter() - clock, fields)
+
+
+def timed(kind, name=None):
+    # Decorator for UI phases: @timed('ui') def loadFolders(self): ...
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(kind, name or function.__name__):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _argument_after(command, flag):
+    try:
+        return command[command.index(flag) + 1]
+    except (ValueError, IndexError):
+        return None
+
+
+def describe_command(command, shell=False):
+    # (kind, name, target) of a command as run_command sees it; the target is what the
+    # summary ranks by, e.g. the package id or installer path
+    if shell or isinstance(command, str):
+        text = command if isinstance(command, str) else ' '.join(command)
+        return 'shell', 'uninstall string', text
+    program = os.path.basename(str(command[0])).lower()
+    stem, extension = os.path.splitext(program)
+    if stem == 'winget':
+        verb = command[1] if len(command) > 1 else ''
+        return 'winget', f"winget {verb}".strip(), _argument_after(command, '--id') or _argument_after(command, '--import-file')
+    if stem == 'powershell':
+        script = str(command[-1])
+        return 'powershell', script.split(None, 1)[0] if script.strip() else 'powershell', None
+    if stem == 'msiexec':
+        return 'installer', 'msiexec', _argument_after(command, '/i') or _argument_after(command, '/x')
+    if extension in INSTALLER_EXTENSIONS:
+        return 'installer', program, command[0]
+    if len(command) > 2 and command[1:3] == ['-m', 'pip']:
+        return 'command', 'pip', None
+    return 'command', stem, None
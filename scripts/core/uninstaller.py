@@ -0,0 +1,82 @@
+import json
+import sys
+import logging
+
+from scripts.core.registry_index import get_uninstall_index
+from scripts.core.appx_inventory import get_appx_index
+from scripts.core.executor import run_command, powershell
+from scripts.core.log_setup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+UNINSTALL_CATALOG_PATH = 'functions/uninstall/uninstall.json'
+
+
+def load_uninstall_catalog(path=UNINSTALL_CATALOG_PATH):
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def get_uninstall_command(program_name):
+    # QuietUninstallString runs without the vendor's wizard, UninstallString is the fallback
+    for entry in get_uninstall_index().find_all(program_name):
+        command = entry['QuietUninstallString'] or entry['UninstallString']
+        if command:
+            return command
+    return None
+
+
+def is_appx_package_installed(app_name):
+    installed = get_appx_index().is_installed(app_name)
+    logger.debug(f"Checking if appx package {app_name} is installed: {installed}")
+    return installed
+
+
+def is_program_installed(program_name):
+    # Either a classic Win32 entry in the registry or an Appx package
+    return get_uninstall_index().find(program_name) is not None or is_appx_package_installed(program_name)
+
+
+def uninstall_appx_package(program_name):
+    ps_command = f"Get-AppxPackage *{program_name}* | Remove-AppxPackage"
+    result = powershell(ps_command)
+    return result.success and not result.stderr.strip()
+
+
+def uninstall_program(program_name, is_appx_package):
+    if is_appx_package:
+        success = uninstall_appx_package(program_name)
+        if success:
+            get_appx_index().remove(program_name)
+            logger.info(f"{program_name} uninstalled successfully.")
+        else:
+            logger.info(f"Failed to uninstall {program_name}.")
+        return success
+
+    uninstall_command = get_uninstall_command(program_name)
+    if not uninstall_command:
+        logger.info(f"Uninstall command for {program_name} not found.")
+        return False
+    # UninstallString is a full command line, often with its own quoting, so it goes through the shell
+    result = run_command(uninstall_command, shell=True)
+    if result.success:
+        logger.info(f"{program_name} uninstalled successfully.")
+        return True
+    logger.info(f"Failed to uninstall {program_name}: {result.message}")
+    return False
+
+
+def main():
+    configure_logging()
+    if len(sys.argv) > 2:
+        program_name = sys.argv[1]
+        is_appx_package = sys.argv[2].lower() == 'true'
+        success = uninstall_program(program_name, is_appx_package)
+        sys.exit(0 if success else 1)
+    else:
+        logger.info("No program name or package type provided.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
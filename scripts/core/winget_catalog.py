@@ -0,0 +1,313 @@
+import contextlib
+import glob
+import logging
+import os
+import pathlib
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import zipfile
+
+from scripts.core.search_index import tokenize
+from scripts.core.spans import span
+from scripts.core.winget_inventory import load_catalog, save_catalog, package_ids
+
+logger = logging.getLogger(__name__)
+
+# Offline copy of the winget community catalog.
+# winget keeps its source as a SQLite index (Public/index.db inside source.msix / source2.msix,
+# unpacked under WindowsApps); we read that once into cache/catalog.db, which has a full text
+# index over Id, name, publisher, tags and moniker, so searching never needs winget or a network.
+CATALOG_PATH = os.path.join('cache', 'catalog.db')
+SEARCH_LIMIT = 200
+SOURCE_INDEX_MEMBER = 'Public/index.db'
+SOURCE_INDEX_PATTERN = os.path.join('WindowsApps', 'Microsoft.Winget.Source_*', 'Public', 'index.db')
+
+# bm25 weights for id, name, publisher, tags, moniker: a hit in the name or Id ranks first
+FTS_WEIGHTS = (5.0, 10.0, 2.0, 1.0, 3.0)
+# bm25 scores every hit before LIMIT applies; a query matching more than this ("b" while typing)
+# gets the first hits by name instead, a fraction of the cost and no less useful
+RANK_LIMIT = 1000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS packages (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    publisher TEXT NOT NULL DEFAULT '',
+    moniker TEXT NOT NULL DEFAULT '',
+    version TEXT NOT NULL DEFAULT '',
+    tags TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+'''
+FTS_SCHEMA = '''
+CREATE VIRTUAL TABLE IF NOT EXISTS packages_fts USING fts5(
+    id, name, publisher, tags, moniker, content='packages', prefix='2 3'
+)
+'''
+COLUMNS = ('id', 'name', 'publisher', 'moniker', 'version', 'tags')
+
+
+def find_source_index():
+    # The newest unpacked winget source on this machine, None when there is none (or not on Windows)
+    root = os.environ.get('ProgramFiles')
+    if not root:
+        return None
+    candidates = glob.glob(os.path.join(root, SOURCE_INDEX_PATTERN))
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+@contextlib.contextmanager
+def _index_file(path):
+    # An .msix is a zip with the index inside; it is extracted to a scratch directory for sqlite
+    if not zipfile.is_zipfile(path):
+        yield path
+        return
+    directory = tempfile.mkdtemp(prefix='winget-source-')
+    try:
+        with zipfile.ZipFile(path) as archive:
+            yield archive.extract(SOURCE_INDEX_MEMBER, directory)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _tables(connection):
+    return {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def _read_map(connection, tables, values_table, value_column):
+    # winget stores tags, publishers, ... as a value table plus an <owner, value> map table
+    map_table = f"{values_table}_map"
+    if values_table not in tables or map_table not in tables:
+        return {}
+    columns = [row[1] for row in connection.execute(f"PRAGMA table_info({map_table})")]
+    value_reference = value_column if value_column in columns else columns[1]
+    owner = next(column for column in columns if column != value_reference)
+    values = {}
+    query = f"SELECT m.{owner}, v.{value_column} FROM {map_table} m JOIN {values_table} v ON v.rowid = m.{value_reference}"
+    for owner_id, value in connection.execute(query):
+        values.setdefault(owner_id, []).append(value)
+    return values
+
+
+def _version_key(version):
+    # 1.10.0 > 1.9.2; non numeric parts sort after numbers, then by text
+    return [(0, int(part), '') if part.isdigit() else (1, 0, part) for part in re.split(r'[.\-+_ ]', version or '') if part]
+
+
+def _package(package_id, name, moniker, version, publishers, tags):
+    return {
+        'id': package_id,
+        'name': name or package_id,
+        # The index only has normalized publishers; without one the Id's first part is the publisher
+        'publisher': publishers[0] if publishers else package_id.split('.', 1)[0],
+        'moniker': moniker or '',
+        'version': version or '',
+        'tags': ' '.join(tags),
+    }
+
+
+def _read_v2(connection, tables):
+    # Index 2.x (source2.msix): one row per package with its latest version
+    suffix = '2' if 'tags2' in tables or 'norm_publishers2' in tables else ''
+    tags = _read_map(connection, tables, f"tags{suffix}", 'tag')
+    publishers = _read_map(connection, tables, f"norm_publishers{suffix}", 'norm_publisher')
+    for rowid, package_id, name, moniker, version in connection.execute('SELECT rowid, id, name, moniker, latest_version FROM packages'):
+        yield _package(package_id, name, moniker, version, publishers.get(rowid), tags.get(rowid, ()))
+
+
+def _read_v1(connection, tables):
+    # Index 1.x (source.msix): one manifest row per package version, the latest one wins
+    tags = _read_map(connection, tables, 'tags', 'tag')
+    publishers = _read_map(connection, tables, 'norm_publishers', 'norm_publisher')
+    latest = {}
+    query = '''
+        SELECT m.rowid, i.id, n.name, mo.moniker, v.version FROM manifest m
+        JOIN ids i ON i.rowid = m.id
+        JOIN names n ON n.rowid = m.name
+        JOIN versions v ON v.rowid = m.version
+        LEFT JOIN monikers mo ON mo.rowid = m.moniker
+    '''
+    for row in connection.execute(query):
+        known = latest.get(row[1])
+        if known is None or _version_key(row[4]) > _version_key(known[4]):
+            latest[row[1]] = row
+    for rowid, package_id, name, moniker, version in latest.values():
+        yield _package(package_id, name, moniker, version, publishers.get(rowid), tags.get(rowid, ()))
+
+
+def read_source_index(path):
+    # [{id, name, publisher, moniker, version, tags}] from a winget source index (.db) or source .msix
+    with _index_file(path) as index_path:
+        connection = sqlite3.connect(pathlib.Path(os.path.abspath(index_path)).as_uri() + '?mode=ro', uri=True)
+        try:
+            tables = _tables(connection)
+            if 'packages' in tables:
+                return list(_read_v2(connection, tables))
+            if 'manifest' in tables:
+                return list(_read_v1(connection, tables))
+            raise ValueError(f"{path} is not a winget source index")
+        finally:
+            connection.close()
+
+
+class CatalogStore:
+    def __init__(self, path=CATALOG_PATH):
+        self.path = path
+        # Guards the connection searches use; an import only takes it to swap the new file in
+        self.lock = threading.Lock()
+        self.import_lock = threading.Lock()
+        self.connection = None
+        self.has_fts = False
+
+    def _make_directory(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _create_tables(connection):
+        # Returns whether the full text index could be created
+        connection.executescript(SCHEMA)
+        try:
+            connection.execute(FTS_SCHEMA)
+            return True
+        except sqlite3.OperationalError as e:
+            # sqlite built without FTS5, searching falls back to LIKE
+            logger.info(f"***[Catalog]*** Full text search unavailable, using LIKE: {e}")
+            return False
+
+    def _connect(self):
+        # Searches run on the GUI thread and an import closes the connection from its worker, hence the lock
+        if self.connection is None:
+            self._make_directory()
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.has_fts = self._create_tables(self.connection)
+        return self.connection
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def __len__(self):
+        with self.lock:
+            return self._connect().execute('SELECT COUNT(*) FROM packages').fetchone()[0]
+
+    def metadata(self):
+        with self.lock:
+            return dict(self._connect().execute('SELECT key, value FROM metadata'))
+
+    def import_packages(self, packages, source=''):
+        # The new catalog is built in a scratch file next to the old one and swapped in, so
+        # searches keep answering from the old one and only wait for the swap itself
+        with self.import_lock:
+            self._make_directory()
+            temp_path = f"{self.path}.tmp"
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            connection = sqlite3.connect(temp_path)
+            try:
+                with connection:
+                    has_fts = self._create_tables(connection)
+                    connection.executemany(
+                        f"INSERT OR REPLACE INTO packages ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                        ([package.get(column, '') or '' for column in COLUMNS] for package in packages),
+                    )
+                    if has_fts:
+                        connection.execute("INSERT INTO packages_fts(packages_fts) VALUES ('rebuild')")
+                    count = connection.execute('SELECT COUNT(*) FROM packages').fetchone()[0]
+                    connection.executemany('INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)', [
+                        ('source', source), ('imported', str(int(time.time()))), ('packages', str(count)),
+                    ])
+            except BaseException:
+                connection.close()
+                os.remove(temp_path)
+                raise
+            connection.close()
+            with self.lock:
+                # Windows can't replace a file sqlite still has open; the next query reconnects
+                if self.connection is not None:
+                    self.connection.close()
+                    self.connection = None
+                os.replace(temp_path, self.path)
+            return count
+
+    def import_source_index(self, path):
+        with span('catalog', 'import source index', target=path) as fields:
+            packages = read_source_index(path)
+            fields['packages'] = self.import_packages(packages, source=os.path.abspath(path))
+        logger.info(f"***[Catalog]*** Imported {fields['packages']} packages from {path}")
+        return fields['packages']
+
+    def get(self, package_id):
+        with self.lock:
+            row = self._connect().execute(f"SELECT {', '.join(COLUMNS)} FROM packages WHERE id = ? COLLATE NOCASE", (package_id,)).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        # Every term must match the start of a word in the Id, name, publisher, tags or moniker
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self.lock:
+            connection = self._connect()
+            if self.has_fts:
+                try:
+                    return self._search_fts(connection, terms, limit)
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"***[Catalog]*** Full text search failed, using LIKE: {e}")
+            return self._search_like(connection, terms, limit)
+
+    def _search_fts(self, connection, terms, limit):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        hits = connection.execute(
+            'SELECT COUNT(*) FROM (SELECT rowid FROM packages_fts WHERE packages_fts MATCH ? LIMIT ?)', (match, RANK_LIMIT + 1)
+        ).fetchone()[0]
+        ranked = hits <= RANK_LIMIT
+        query = f'''
+            SELECT {', '.join(f'p.{column}' for column in COLUMNS)} FROM packages_fts
+            JOIN packages p ON p.rowid = packages_fts.rowid
+            WHERE packages_fts MATCH ? {f"ORDER BY bm25(packages_fts, {', '.join(map(str, FTS_WEIGHTS))})" if ranked else ''} LIMIT ?
+        '''
+        results = [dict(zip(COLUMNS, row)) for row in connection.execute(query, (match, limit))]
+        return results if ranked else sorted(results, key=lambda package: package['name'].lower())
+
+    def _search_like(self, connection, terms, limit):
+        condition = '(id LIKE ? OR name LIKE ? OR publisher LIKE ? OR tags LIKE ? OR moniker LIKE ?)'
+        parameters = [f"%{term}%" for term in terms for _ in range(5)]
+        query = f"SELECT {', '.join(COLUMNS)} FROM packages WHERE {' AND '.join([condition] * len(terms))} ORDER BY name LIMIT ?"
+        return [dict(zip(COLUMNS, row)) for row in connection.execute(query, parameters + [limit])]
+
+
+catalog_store = CatalogStore()
+
+
+def categories(catalog):
+    return sorted({details['category'] for details in catalog.values()})
+
+
+def add_to_winget_catalog(packages, category, path='functions/install/winget.json'):
+    # Adds {id, name} search results to winget.json under `category`; Ids already listed are skipped.
+    # Returns the names of the new entries.
+    catalog = load_catalog(path)
+    known = {package_id.lower() for details in catalog.values() for package_id in package_ids(details)}
+    added = []
+    for package in packages:
+        if package['id'].lower() in known:
+            continue
+        name = package['name'] if package['name'] not in catalog else f"{package['name']} ({package['id']})"
+        catalog[name] = {'category': category, 'Name': name, 'winget': package['id']}
+        known.add(package['id'].lower())
+        added.append(name)
+    if added:
+        save_catalog(catalog, path)
+        logger.info(f"***[Catalog]*** Added {len(added)} packages to {path} under {category}")
+    return added
@@ -0,0 +1,133 @@
+import json
+import re
+import os
+import tempfile
+import threading
+import logging
+from datetime import datetime, timezone
+
+from scripts.core.inventory_cache import inventory_cache
+from scripts.core.executor import run_command
+
+logger = logging.getLogger(__name__)
+
+WINGET_SOURCE = {
+    "Argument": "https://cdn.winget.microsoft.com/cache",
+    "Identifier": "Microsoft.Winget.Source_8wekyb3d8bbwe",
+    "Name": "winget",
+    "Type": "Microsoft.PreIndexed.Package",
+}
+
+
+def order_jobs(jobs):
+    # winget import installs packages in file order, so write dependencies (runtimes) first
+    ordered = []
+    placed = set()
+    remaining = list(jobs)
+    while remaining:
+        ready = [job for job in remaining if job.depends_on <= placed] or remaining[:1]
+        for job in ready:
+            ordered.append(job)
+            placed.add(job.name)
+            remaining.remove(job)
+    return ordered
+
+
+def build_import_manifest(jobs):
+    packages = []
+    seen = set()
+    for job in order_jobs(jobs):
+        for package_id in job.package_ids:
+            if package_id.lower() not in seen:
+                seen.add(package_id.lower())
+                packages.append({"PackageIdentifier": package_id})
+    return {
+        "$schema": "https://aka.ms/winget-packages.schema.2.0.json",
+        "CreationDate": datetime.now(timezone.utc).isoformat(),
+        "Sources": [{"Packages": packages, "SourceDetails": WINGET_SOURCE}],
+        "WinGetVersion": "1.6.0",
+    }
+
+
+# winget import announces each package as "Found <name> [<Id>] Version <version>"
+_FOUND_RE = re.compile(r'^Found .*\[([^\]]+)\]')
+
+
+def run_import(manifest_path, on_output=None):
+    command = [
+        "winget", "import", "--import-file", manifest_path,
+        "--accept-package-agreements", "--accept-source-agreements", "--ignore-unavailable", "--ignore-versions",
+    ]
+    return run_command(command, on_output=on_output)
+
+
+class WingetImportBatch:
+    # Same callbacks as WingetScheduler, but the whole selection goes through one `winget import`
+    def __init__(self, jobs, run=run_import, refresh_index=inventory_cache.refresh,
+                 on_job_finished=None, on_all_finished=None, progress=None):
+        self.jobs = jobs
+        self.run_import = run
+        self.refresh_index = refresh_index
+        self.on_job_finished = on_job_finished
+        self.on_all_finished = on_all_finished
+        self.progress = progress
+        self.thread = None
+        # Package Id -> (job, index of the Id inside the job), to attribute streamed output
+        self.packages = {
+            package_id.lower(): (job, package_index)
+            for job in jobs for package_index, package_id in enumerate(job.package_ids)
+        }
+        self.current_job = None
+        self._buffer = ''
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def _on_output(self, stream, text):
+        if self.progress is None or stream != 'stdout':
+            return
+        self._buffer += text
+        lines = re.split(r'[\r\n]', self._buffer)
+        self._buffer = lines.pop()
+        for line in lines:
+            match = _FOUND_RE.match(line.strip())
+            if match and match.group(1).lower() in self.packages:
+                job, package_index = self.packages[match.group(1).lower()]
+                self.current_job = job
+                self.progress.start_package(job.name, package_index)
+            elif self.current_job is not None:
+                self.progress.feed(self.current_job.name, line + '\n')
+
+    def run(self):
+        manifest = build_import_manifest(self.jobs)
+        file_descriptor, manifest_path = tempfile.mkstemp(prefix='winget-import-', suffix='.json')
+        try:
+            with os.fdopen(file_descriptor, 'w', encoding='utf-8') as file:
+                json.dump(manifest, file, indent=4)
+            package_count = len(manifest["Sources"][0]["Packages"])
+            logger.info(f"***[Winget]*** Importing {package_count} packages from {manifest_path}")
+            result = self.run_import(manifest_path, on_output=self._on_output)
+            logger.info(f"***[Winget]*** winget import finished: {result.message}")
+            if not result.success:
+                logger.error(result.stdout)
+        except Exception as e:
+            logger.error(f"***[Winget]*** winget import failed: {e}")
+        finally:
+            os.remove(manifest_path)
+
+        # winget import doesn't report per package results in a stable format, so ask the inventory instead
+        try:
+            installed_index = self.refresh_index()
+        except Exception as e:
+            logger.error(f"***[Winget]*** Could not refresh the installed packages after import: {e}")
+            installed_index = None
+        for job in self.jobs:
+            job.success = installed_index is not None and installed_index.is_installed(job.package_ids)
+            if self.progress is not None:
+                self.progress.finish(job.name)
+            if self.on_job_finished:
+                self.on_job_finished(job.name, job.success)
+        if self.on_all_finished:
+            self.on_all_finished()
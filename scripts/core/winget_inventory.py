@@ -0,0 +1,260 @@
+import json
+import os
+import re
+import tempfile
+import unicodedata
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.core.executor import run_command
+from scripts.core.json_files import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# Columns we keep from `winget list`; anything else (e.g. "Available") is optional
+COLUMNS = ('name', 'id', 'version', 'available', 'source')
+
+_SEPARATOR_RE = re.compile(r'^-{10,}\s*$')
+# winget list cuts columns that don't fit the console and ends them with this
+TRUNCATION_MARK = '…'
+
+
+def package_ids(details):
+    # Catalog entries hold either a single Id, a comma separated list of Ids or a JSON list
+    value = details.get('winget', '')
+    if isinstance(value, (list, tuple)):
+        ids = value
+    else:
+        ids = value.split(',')
+    return [package_id.strip() for package_id in ids if package_id.strip()]
+
+
+def catalog_ids_by_name(catalog):
+    # Map the lowercased display name of each winget.json entry to its package Ids
+    return {details['Name'].lower(): package_ids(details) for details in catalog.values()}
+
+
+def load_catalog(path='functions/install/winget.json'):
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_catalog(catalog, path='functions/install/winget.json'):
+    atomic_write_json(path, catalog, indent=4, ensure_ascii=False)
+
+
+def _clean_lines(text):
+    # winget draws a spinner and progress bars using carriage returns before the table;
+    # only the text after the last \r of each line is what ends up on screen
+    lines = []
+    for raw_line in text.splitlines():
+        line = raw_line.rsplit('\r', 1)[-1]
+        lines.append(line.rstrip())
+    return lines
+
+
+def _header_offsets(header):
+    offsets = []
+    for match in re.finditer(r'\S+', header):
+        offsets.append((match.start(), match.group().lower()))
+    return offsets
+
+
+def _cell_slices(line, starts):
+    # winget pads columns by terminal cells, and wide (CJK) characters take two of them
+    pieces = [''] * len(starts)
+    column = 0
+    cell = 0
+    for char in line:
+        while column + 1 < len(starts) and cell >= starts[column + 1]:
+            column += 1
+        pieces[column] += char
+        cell += 2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1
+    return pieces
+
+
+def _split_row(line, offsets):
+    starts = [start for start, _ in offsets]
+    if line.isascii():
+        pieces = [line[start:end] for start, end in zip(starts, starts[1:] + [None])]
+    else:
+        pieces = _cell_slices(line, starts)
+    return {column: piece.strip() for (_, column), piece in zip(offsets, pieces)}
+
+
+def _normalize_row(row, header_names):
+    # Headers are localized on non English systems, so map columns by position:
+    # Name, Id, Version, [Available], Source. "Available" only shows up when upgrades exist.
+    entry = {column: '' for column in COLUMNS}
+    if len(header_names) == 4 and header_names[3] != 'available':
+        keys = ('name', 'id', 'version', 'source')
+    else:
+        keys = COLUMNS
+    for key, header in zip(keys, header_names):
+        entry[key] = row.get(header, '')
+    return entry
+
+
+def parse_winget_list(text):
+    # Turn the table printed by `winget list` into {Id: {name, id, version, available, source}}
+    index = {}
+    lines = _clean_lines(text)
+    position = 0
+    while position < len(lines):
+        line = lines[position]
+        # A table starts with a header line directly followed by a line of dashes
+        if position + 1 < len(lines) and _SEPARATOR_RE.match(lines[position + 1]) and line.strip():
+            offsets = _header_offsets(line)
+            header_names = [column for _, column in offsets]
+            position += 2
+            while position < len(lines) and lines[position].strip():
+                if position + 1 < len(lines) and _SEPARATOR_RE.match(lines[position + 1]):
+                    break
+                row = _split_row(lines[position], offsets)
+                entry = _normalize_row(row, header_names)
+                if entry['id']:
+                    index[entry['id']] = entry
+                position += 1
+            continue
+        position += 1
+    return index
+
+
+def parse_winget_export(text):
+    # Turn the JSON written by `winget export --include-versions` into the same index shape
+    data = json.loads(text) if isinstance(text, str) else text
+    index = {}
+    for source in data.get('Sources', []):
+        source_name = source.get('SourceDetails', {}).get('Name', '')
+        for package in source.get('Packages', []):
+            package_id = package.get('PackageIdentifier')
+            if not package_id:
+                continue
+            index[package_id] = {
+                'name': package.get('PackageName', ''),
+                'id': package_id,
+                'version': package.get('Version', ''),
+                'available': '',
+                'source': source_name,
+            }
+    return index
+
+
+def _resolve_truncated(package_id, exported_ids):
+    # "Microsoft.DotNet.SDK…" -> the one exported Id it stands for, None when it could be several
+    prefix = package_id[:-len(TRUNCATION_MARK)].lower()
+    matches = [exported_id for exported_id in exported_ids if exported_id.startswith(prefix)]
+    return exported_ids[matches[0]] if len(matches) == 1 else None
+
+
+def merge_inventory(exported, listed):
+    # Ids come from `winget export`, which never truncates; `winget list` adds the names, the
+    # Available column and the packages export leaves out (e.g. ARP entries without a source)
+    packages = {package_id: dict(entry) for package_id, entry in exported.items()}
+    exported_ids = {package_id.lower(): package_id for package_id in exported}
+    for package_id, row in listed.items():
+        if package_id.endswith(TRUNCATION_MARK):
+            # Unresolved rows stay under their cut Id: get() only matches whole Ids, so they can't pass
+            # for any of the packages they might be, but get_by_name still finds them
+            full_id = _resolve_truncated(package_id, exported_ids) or package_id
+        else:
+            full_id = exported_ids.get(package_id.lower(), package_id)
+        entry = packages.setdefault(full_id, dict(row, id=full_id))
+        if row['name'] and (not entry['name'] or not row['name'].endswith(TRUNCATION_MARK)):
+            entry['name'] = row['name']
+        entry['version'] = entry['version'] or row['version']
+        entry['available'] = row['available']
+        entry['source'] = entry['source'] or row['source']
+    return packages
+
+
+class InstalledIndex:
+    def __init__(self, packages=None):
+        self.packages = dict(packages or {})
+        self._rebuild()
+
+    def _rebuild(self):
+        # winget Ids are case insensitive
+        self._by_id = {package_id.lower(): entry for package_id, entry in self.packages.items()}
+        self._by_name = {}
+        for entry in self.packages.values():
+            if entry.get('name'):
+                self._by_name.setdefault(entry['name'].lower(), entry)
+
+    def __len__(self):
+        return len(self.packages)
+
+    def __contains__(self, package_id):
+        return self.get(package_id) is not None
+
+    def get(self, package_id):
+        return self._by_id.get(package_id.lower())
+
+    def add(self, entry):
+        self.remove(entry['id'])
+        self.packages[entry['id']] = entry
+        self._by_id[entry['id'].lower()] = entry
+        if entry.get('name'):
+            self._by_name.setdefault(entry['name'].lower(), entry)
+
+    def remove(self, package_id):
+        entry = self.get(package_id)
+        if entry is None:
+            return None
+        self.packages.pop(entry['id'], None)
+        self._by_id.pop(entry['id'].lower(), None)
+        if self._by_name.get(entry.get('name', '').lower()) is entry:
+            del self._by_name[entry['name'].lower()]
+        return entry
+
+    def get_by_name(self, name):
+        # Exact display names only, "Git" must not find "Git LFS"
+        return self._by_name.get(name.lower())
+
+    def is_installed(self, package_ids):
+        # Entries with several Ids count as installed only when every Id is present
+        return bool(package_ids) and all(package_id in self for package_id in package_ids)
+
+    def has_update(self, package_ids):
+        # winget fills the Available column only for packages with a newer version in the source
+        return any((self.get(package_id) or {}).get('available') for package_id in package_ids)
+
+
+def fetch_winget_export():
+    file_descriptor, export_path = tempfile.mkstemp(prefix='winget-export-', suffix='.json')
+    os.close(file_descriptor)
+    try:
+        result = run_command(["winget", "export", "--output", export_path, "--include-versions", "--accept-source-agreements"])
+        if not result.success:
+            raise RuntimeError(f"winget export failed: {result.message}")
+        with open(export_path, 'r', encoding='utf-8-sig') as file:
+            return parse_winget_export(file.read())
+    finally:
+        os.remove(export_path)
+
+
+def fetch_installed_index():
+    logger.info("***[Checking Installed Programs]*** Fetching list of installed programs using winget")
+    # Both only read the local state, so the export runs while winget list prints its table
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        export = executor.submit(fetch_winget_export)
+        result = run_command(["winget", "list", "--accept-source-agreements"])
+        try:
+            exported = export.result()
+        except (RuntimeError, OSError, ValueError) as e:
+            logger.warning(f"***[Checking Installed Programs]*** {e}, truncated Ids from winget list are left out")
+            exported = {}
+    if not result.success:
+        raise RuntimeError(f"winget list failed: {result.message}")
+    return InstalledIndex(merge_inventory(exported, parse_winget_list(result.stdout)))
+
+
+def refresh_sources_in_background():
+    # Keep winget's source index fresh without holding up startup
+    def refresh():
+        result = run_command(["winget", "source", "update"])
+        logger.info(f"Winget source update finished: {result.message}")
+    thread = threading.Thread(target=refresh, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,128 @@
+import re
+import threading
+
+# Share of a package's progress bar each phase covers, (start, end)
+PHASES = {
+    'queued': (0.0, 0.0),
+    'downloading': (0.0, 0.7),
+    'verifying': (0.7, 0.75),
+    'installing': (0.75, 1.0),
+    'uninstalling': (0.0, 1.0),
+    'done': (1.0, 1.0),
+}
+
+# Lines that move a package into the next phase
+PHASE_MARKERS = [
+    ('Downloading ', 'downloading'),
+    ('Successfully verified installer hash', 'verifying'),
+    ('Starting package install', 'installing'),
+    ('Starting package uninstall', 'uninstalling'),
+    ('Successfully installed', 'done'),
+    ('Successfully uninstalled', 'done'),
+]
+
+_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+_BYTES_RE = re.compile(r'([\d.,]+)\s*(B|KB|MB|GB)\s*/\s*([\d.,]+)\s*(B|KB|MB|GB)')
+_PERCENT_RE = re.compile(r'(\d{1,3})\s*%')
+
+
+def parse_fraction(line):
+    # "  ████▒▒▒▒  12.0 MB / 54.6 MB" or "  45%" -> 0.0..1.0, None if the line has no progress
+    match = _BYTES_RE.search(line)
+    if match:
+        try:
+            done = float(match.group(1).replace(',', '.')) * _UNITS[match.group(2)]
+            total = float(match.group(3).replace(',', '.')) * _UNITS[match.group(4)]
+        except ValueError:
+            return None
+        return min(done / total, 1.0) if total else None
+    match = _PERCENT_RE.search(line)
+    if match:
+        return min(int(match.group(1)), 100) / 100
+    return None
+
+
+class JobProgress:
+    def __init__(self, package_count=1):
+        self.package_count = max(package_count, 1)
+        self.completed_packages = 0
+        self.phase = 'queued'
+        self.phase_fraction = 0.0
+        self._buffer = ''
+
+    def start_package(self, package_index):
+        self.completed_packages = package_index
+        self.phase = 'queued'
+        self.phase_fraction = 0.0
+
+    def feed(self, text):
+        # winget redraws its progress bar with \r, so treat \r like a line break
+        self._buffer += text
+        lines = re.split(r'[\r\n]', self._buffer)
+        self._buffer = lines.pop()
+        for line in lines:
+            self._feed_line(line)
+
+    def _feed_line(self, line):
+        for marker, phase in PHASE_MARKERS:
+            if marker in line:
+                self.phase = phase
+                self.phase_fraction = 0.0
+                return
+        fraction = parse_fraction(line)
+        if fraction is not None and self.phase != 'done':
+            if self.phase == 'queued':
+                self.phase = 'downloading'
+            self.phase_fraction = fraction
+
+    def finish(self):
+        self.completed_packages = self.package_count
+        self.phase = 'done'
+        self.phase_fraction = 1.0
+
+    @property
+    def fraction(self):
+        start, end = PHASES[self.phase]
+        package_fraction = start + (end - start) * self.phase_fraction
+        return min((self.completed_packages + package_fraction) / self.package_count, 1.0)
+
+
+class ProgressModel:
+    # Overall progress of a batch, weighted by the number of packages in each job
+    def __init__(self, jobs, on_change=None):
+        self.lock = threading.Lock()
+        self.jobs = {job.name: JobProgress(len(job.package_ids)) for job in jobs}
+        self.weights = {job.name: max(len(job.package_ids), 1) for job in jobs}
+        self.total_weight = sum(self.weights.values()) or 1
+        self.on_change = on_change
+        self._last = None
+
+    def start_package(self, job_name, package_index):
+        with self.lock:
+            self.jobs[job_name].start_package(package_index)
+        self._notify(job_name)
+
+    def feed(self, job_name, text):
+        with self.lock:
+            self.jobs[job_name].feed(text)
+        self._notify(job_name)
+
+    def finish(self, job_name):
+        with self.lock:
+            self.jobs[job_name].finish()
+        self._notify(job_name)
+
+    def percent(self):
+        with self.lock:
+            total = sum(progress.fraction * self.weights[name] for name, progress in self.jobs.items())
+        return round(100 * total / self.total_weight)
+
+    def _notify(self, job_name):
+        # Only report when something visible changed, winget redraws its bar many times a second
+        percent = self.percent()
+        phase = self.jobs[job_name].phase
+        state = (job_name, phase, percent)
+        if state != self._last:
+            self._last = state
+            if self.on_change:
+                self.on_change(job_name, phase, percent)
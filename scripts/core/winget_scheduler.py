@@ -0,0 +1,165 @@
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from scripts.core.winget_inventory import package_ids
+from scripts.core.executor import run_command
+
+logger = logging.getLogger(__name__)
+
+# Runtimes (VC++, .NET, Java, ...) live in this category and are installed before everything else
+RUNTIME_CATEGORY = 'Instalacija dodataka'
+
+WINGET_MAX_PARALLEL = 3
+
+INSTALLER_BUSY_RETRIES = 5
+INSTALLER_BUSY_DELAY = 15
+
+
+class WingetJob:
+    def __init__(self, name, package_ids, depends_on=()):
+        self.name = name
+        self.package_ids = package_ids
+        self.depends_on = set(depends_on)
+        self.success = None
+
+
+def build_install_jobs(program_names, catalog):
+    # Explicit "dependsOn" entries in winget.json plus the implicit runtimes-first rule
+    selected = set(program_names)
+    runtimes = {name for name in program_names if catalog[name]['category'] == RUNTIME_CATEGORY}
+    jobs = []
+    for name in program_names:
+        details = catalog[name]
+        depends_on = {dependency for dependency in details.get('dependsOn', []) if dependency in selected}
+        if name not in runtimes:
+            depends_on |= runtimes
+        depends_on.discard(name)
+        jobs.append(WingetJob(name, package_ids(details), depends_on))
+    return jobs
+
+
+def build_jobs(program_names, catalog):
+    # Uninstall and upgrade don't need any ordering
+    return [WingetJob(name, package_ids(catalog[name])) for name in program_names]
+
+
+def is_installer_busy(result):
+    # winget's "another installation is already in progress" and the Windows Installer mutex (1618)
+    return result.status == 'busy' or 'another installation is already in progress' in result.stdout.lower()
+
+
+def install_package(package_id, cancel_event=None, on_output=None):
+    return run_command(
+        ["winget", "install", "--id", package_id, "--exact", "--accept-package-agreements", "--accept-source-agreements"],
+        cancel_event=cancel_event, on_output=on_output
+    )
+
+
+def uninstall_package(package_id, cancel_event=None, on_output=None):
+    return run_command(["winget", "uninstall", "--id", package_id, "--exact"], cancel_event=cancel_event, on_output=on_output)
+
+
+def upgrade_package(package_id, cancel_event=None, on_output=None):
+    result = run_command(
+        ["winget", "upgrade", "--id", package_id, "--exact", "--accept-package-agreements", "--accept-source-agreements"],
+        cancel_event=cancel_event, on_output=on_output
+    )
+    if "No newer package versions are available from the configured sources." in result.stdout:
+        result.status = 'up_to_date'
+    return result
+
+
+# action -> (command runner, verb for the log, extra statuses that count as success)
+ACTIONS = {
+    'install': (install_package, 'Installing', {'already_installed'}),
+    'uninstall': (uninstall_package, 'Uninstalling', set()),
+    'upgrade': (upgrade_package, 'Updating', {'up_to_date'}),
+}
+
+
+class WingetScheduler:
+    def __init__(self, jobs, action='install', run_package=None, max_workers=WINGET_MAX_PARALLEL,
+                 on_job_finished=None, on_all_finished=None, progress=None,
+                 busy_retries=INSTALLER_BUSY_RETRIES, busy_delay=INSTALLER_BUSY_DELAY):
+        self.jobs = {job.name: job for job in jobs}
+        default_runner, self.verb, self.accepted_statuses = ACTIONS[action]
+        self.run_package = run_package or default_runner
+        self.max_workers = max_workers
+        self.on_job_finished = on_job_finished
+        self.on_all_finished = on_all_finished
+        self.progress = progress
+        self.busy_retries = busy_retries
+        self.busy_delay = busy_delay
+        self.cancelled = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def cancel(self):
+        # Running winget processes are stopped and nothing new is started
+        self.cancelled.set()
+
+    def run_job(self, job):
+        on_output = None
+        if self.progress is not None:
+            on_output = lambda stream, text: self.progress.feed(job.name, text)
+        for package_index, package_id in enumerate(job.package_ids):
+            for attempt in range(self.busy_retries + 1):
+                logger.info(f"***[Winget]*** {self.verb} {package_id} for {job.name} (attempt {attempt + 1})",
+                            extra={'package': package_id, 'attempt': attempt + 1})
+                if self.progress is not None:
+                    self.progress.start_package(job.name, package_index)
+                result = self.run_package(package_id, cancel_event=self.cancelled, on_output=on_output)
+                if result.success or result.status in self.accepted_statuses:
+                    logger.info(f"***[Winget]*** {package_id}: {result.message}", extra={'package': package_id, 'status': result.status})
+                    break
+                if is_installer_busy(result) and attempt < self.busy_retries and not self.cancelled.is_set():
+                    logger.warning(f"***[Winget]*** Another installer is running, retrying {package_id} in {self.busy_delay}s")
+                    self.cancelled.wait(self.busy_delay)
+                    continue
+                logger.error(f"***[Winget]*** {package_id} failed: {result.message}", extra={'package': package_id, 'status': result.status})
+                logger.error(result.stdout)
+                return False
+        return True
+
+    def run(self):
+        pending = dict(self.jobs)
+        running = {}
+        done = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                if not self.cancelled.is_set():
+                    ready = [job for job in pending.values() if job.depends_on <= done]
+                    for job in ready[:self.max_workers - len(running)]:
+                        del pending[job.name]
+                        running[executor.submit(self.run_job, job)] = job
+                if not running:
+                    # Cancelled, or the remaining jobs depend on each other in a cycle
+                    for job in pending.values():
+                        logger.error(f"***[Winget]*** Skipped {job.name}")
+                        self._finish(job, False)
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job = running.pop(future)
+                    try:
+                        success = future.result()
+                    except Exception as e:
+                        logger.error(f"***[Winget]*** Exception while processing {job.name}: {e}")
+                        success = False
+                    # Dependents still run after a failed runtime, the ordering is what matters here
+                    done.add(job.name)
+                    self._finish(job, success)
+        if self.on_all_finished:
+            self.on_all_finished()
+
+    def _finish(self, job, success):
+        job.success = success
+        if self.progress is not None:
+            self.progress.finish(job.name)
+        if self.on_job_finished:
+            self.on_job_finished(job.name, success)
@@ -0,0 +1,47 @@
+import os
+import sys
+import threading
+import logging
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QMessageBox
+
+logger = logging.getLogger(__name__)
+
+
+# Carries scheduler callbacks from core worker threads back to the GUI thread
+class SchedulerSignals(QObject):
+    job_started = pyqtSignal(str)
+    job_finished = pyqtSignal(str, bool)
+    all_finished = pyqtSignal()
+    progress_changed = pyqtSignal(str, str, int)
+
+
+class ErrorSignals(QObject):
+    error_raised = pyqtSignal(str)
+
+
+def show_error(error_message):
+    if QApplication.instance() is not None:
+        QMessageBox.critical(None, "Error", error_message)
+
+
+# Created on import, i.e. on the GUI thread, so queued emits from workers are delivered there
+error_signals = ErrorSignals()
+error_signals.error_raised.connect(show_error)
+
+
+def handle_exception(e):
+    exc_type, exc_obj, exc_tb = sys.exc_info()
+    if exc_tb is not None:
+        fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+        error_message = f"An error occurred in {fname} at line {exc_tb.tb_lineno}: {e}"
+    else:
+        error_message = f"An error occurred: {e}"
+
+    logger.error(error_message)
+    # Widgets may only be touched from the GUI thread; from anywhere else the box is queued over to it.
+    # Never exits the process, a failed job must not take the rest of the queue down with it.
+    if threading.current_thread() is threading.main_thread():
+        show_error(error_message)
+    else:
+        error_signals.error_raised.emit(error_message)
@@ -0,0 +1,119 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtWidgets import QMessageBox
+
+from scripts.core.inventory_cache import inventory_cache, get_installed_index
+from scripts.core.registry_index import get_uninstall_index, refresh_uninstall_index
+from scripts.core.appx_inventory import get_appx_index, refresh_appx_index
+from scripts.core.program_catalog import program_catalog
+from scripts.gui_bridge import handle_exception
+
+logger = logging.getLogger(__name__)
+
+
+STARTUP_PROBES = {
+    'winget': get_installed_index,
+    'registry': get_uninstall_index,
+    'appx': get_appx_index,
+    'programs': program_catalog.refresh,
+}
+
+# After an uninstall batch; both snapshots are rebuilt here and swapped in, never on the GUI thread
+UNINSTALL_RESCAN_PROBES = {
+    'registry': refresh_uninstall_index,
+    'appx': refresh_appx_index,
+}
+
+
+try:
+    # Runs the winget, registry, Appx and Programs/ probes in parallel and reports each one as soon as it is done
+    class InventoryWorker(QThread):
+        winget_ready = pyqtSignal(object)
+        registry_ready = pyqtSignal(object)
+        appx_ready = pyqtSignal(object)
+        programs_ready = pyqtSignal(object)
+        probe_failed = pyqtSignal(str, str)
+
+        def __init__(self, probes=None):
+            super().__init__()
+            self.probes = probes or STARTUP_PROBES
+
+        def run(self):
+            with ThreadPoolExecutor(max_workers=len(self.probes)) as executor:
+                futures = {executor.submit(probe): name for name, probe in self.probes.items()}
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        result = future.result()
+                        logger.info(f"***[Inventory]*** {name} probe finished", extra={'probe': name})
+                        getattr(self, f'{name}_ready').emit(result)
+                    except Exception as e:
+                        logger.error(f"***[Inventory]*** {name} probe failed: {e}", extra={'probe': name})
+                        self.probe_failed.emit(name, str(e))
+
+    def startInventoryWorker(self):
+        try:
+            self.inventoryReady = set()
+            self.inventoryWorker = InventoryWorker()
+            self.inventoryWorker.winget_ready.connect(self.onWingetInventoryReady)
+            self.inventoryWorker.registry_ready.connect(lambda index: self.onUninstallInventoryReady('registry'))
+            self.inventoryWorker.appx_ready.connect(lambda index: self.onUninstallInventoryReady('appx'))
+            self.inventoryWorker.programs_ready.connect(self.onProgramsReady)
+            self.inventoryWorker.probe_failed.connect(self.onInventoryProbeFailed)
+            # A background refresh of a stale winget snapshot re-renders the lists when it lands
+            inventory_cache.listeners.append(self.inventoryWorker.winget_ready.emit)
+            self.inventoryWorker.start()
+        except Exception as e:
+            handle_exception(e)
+
+    def rescanUninstallInventory(self):
+        try:
+            # A rescan started by the previous batch is long done by now, let it return before it is replaced
+            if getattr(self, 'uninstallRescanWorker', None) is not None:
+                self.uninstallRescanWorker.wait()
+            self.inventoryReady -= {'registry', 'appx'}
+            self.uninstallRescanWorker = InventoryWorker(UNINSTALL_RESCAN_PROBES)
+            self.uninstallRescanWorker.registry_ready.connect(lambda index: self.onUninstallInventoryReady('registry'))
+            self.uninstallRescanWorker.appx_ready.connect(lambda index: self.onUninstallInventoryReady('appx'))
+            self.uninstallRescanWorker.probe_failed.connect(self.onInventoryProbeFailed)
+            self.uninstallRescanWorker.start()
+        except Exception as e:
+            handle_exception(e)
+
+    def onWingetInventoryReady(self, installed_index):
+        try:
+            self.inventoryReady.add('winget')
+            # Called again after every background refresh; the models only repaint rows whose state changed
+            self.applyFolderInventory()
+            self.applyWingetInventory()
+        except Exception as e:
+            handle_exception(e)
+
+    def onProgramsReady(self, categories):
+        try:
+            self.inventoryReady.add('programs')
+            if [(category, list(programs)) for category, programs in categories.items()] != self.folderPrograms:
+                self.loadFolders(categories)
+                if 'winget' in self.inventoryReady:
+                    self.applyFolderInventory()
+        except Exception as e:
+            handle_exception(e)
+
+    def onUninstallInventoryReady(self, probe):
+        try:
+            self.inventoryReady.add(probe)
+            # The Uninstall tab needs both the registry and the Appx snapshot
+            if {'registry', 'appx'} <= self.inventoryReady:
+                self.applyUninstallInventory()
+        except Exception as e:
+            handle_exception(e)
+
+    def onInventoryProbeFailed(self, probe, error):
+        try:
+            QMessageBox.warning(self, 'Inventory', f'Could not check installed programs ({probe}): {error}')
+        except Exception as e:
+            handle_exception(e)
+
+except Exception as e:
+    handle_exception(e)
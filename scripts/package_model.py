@@ -0,0 +1,394 @@
+from bisect import bisect_left, bisect_right
+from PyQt5.QtCore import Qt, QAbstractListModel, QAbstractProxyModel, QModelIndex
+from PyQt5.QtGui import QBrush
+from scripts.core.search_index import PrefixIndex, tokenize
+from scripts.core.package_state import (
+    PackageStateStore, BUSY_STATES, UNKNOWN, NOT_INSTALLED, QUEUED, RUNNING, INSTALLED, FAILED, UPDATE_AVAILABLE,
+)
+
+# Row roles shared by every list. KeyRole is the name the engines know the program by
+# (winget.json key, Programs/ folder, uninstall.json name), the display text is only a label.
+KeyRole = Qt.UserRole
+CategoryRole = Qt.UserRole + 1
+IsCategoryRole = Qt.UserRole + 2
+InstalledRole = Qt.UserRole + 3  # None until the inventory is in
+StateRole = Qt.UserRole + 4
+PackageIdRole = Qt.UserRole + 5
+ActionRole = Qt.UserRole + 6
+
+CATEGORY_BRUSH = QBrush(Qt.lightGray)
+
+
+class PackageRow:
+    __slots__ = ('key', 'label', 'category', 'is_category', 'entry')
+
+    def __init__(self, key, label, category, is_category=False):
+        self.key = key
+        self.label = label
+        self.category = category
+        self.is_category = is_category
+        self.entry = None  # the PackageEntry in the model's store, None for category headers
+
+
+class PackageListModel(QAbstractListModel):
+    # One row per category header and per program; several tabs can show the same model
+    # through their own PackageTabProxy, each with its own check states.
+    # The installed/state of each program lives in a PackageStateStore keyed by package Id.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.rows_by_key = {}
+        self.category_ranges = {}
+        self.header_rows = []  # row -> row of its category header, -1 when it has none
+        self.store = PackageStateStore()
+        self.search_index = None
+
+    def load(self, groups):
+        # groups: [(category or None, [(key, label) or (key, label, package_id), ...]), ...] in display order;
+        # without a package Id the key is the Id
+        self.beginResetModel()
+        self.rows = []
+        self.category_ranges = {}
+        self.header_rows = []
+        packages = []
+        for category, programs in groups:
+            header = -1
+            if category is not None:
+                header = len(self.rows)
+                self.rows.append(PackageRow(category, category, category, is_category=True))
+                self.header_rows.append(header)
+            start = len(self.rows)
+            for program in programs:
+                packages.append((program[2] if len(program) > 2 else program[0], len(self.rows)))
+                self.rows.append(PackageRow(program[0], program[1], category))
+                self.header_rows.append(header)
+            if category is not None:
+                self.category_ranges[category] = (start, len(self.rows))
+        for entry in self.store.load(packages):
+            self.rows[entry.row].entry = entry
+        self.rows_by_key = {row.key: index for index, row in enumerate(self.rows) if not row.is_category}
+        self.search_index = None
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            return row.label
+        if role == KeyRole:
+            return row.key
+        if role == CategoryRole:
+            return row.category
+        if role == IsCategoryRole:
+            return row.is_category
+        if row.entry is None:
+            return None
+        if role == InstalledRole:
+            return row.entry.installed
+        if role == StateRole:
+            return row.entry.state
+        if role == PackageIdRole:
+            return row.entry.package_id
+        if role == ActionRole:
+            return row.entry.action
+        return None
+
+    def row_for(self, key):
+        return self.rows_by_key.get(key)
+
+    def entry(self, key):
+        index = self.rows_by_key.get(key)
+        return None if index is None else self.rows[index].entry
+
+    def packages(self):
+        return (row for row in self.rows if not row.is_category)
+
+    def search(self, query):
+        # Source rows whose name, package Id or category match every term, None for an empty query.
+        # The index is built on the first search, lists nobody searches never pay for it.
+        if not tokenize(query):
+            return None
+        if self.search_index is None:
+            self.search_index = PrefixIndex(
+                (index, (row.label, row.entry.package_id, row.category or '')) for index, row in enumerate(self.rows) if not row.is_category
+            )
+        return self.search_index.search(query)
+
+    def _emit_changed(self, entries):
+        # One dataChanged covering every touched row instead of one per row
+        rows = [entry.row for entry in entries if entry is not None]
+        if rows:
+            self.dataChanged.emit(self.index(min(rows)), self.index(max(rows)), [InstalledRole, StateRole, ActionRole, Qt.DisplayRole])
+        return len(rows)
+
+    def update_inventory(self, changes):
+        # changes: {key: (installed, update_available)} from the inventory
+        entries = []
+        for key, (installed, update_available) in changes.items():
+            entry = self.entry(key)
+            if entry is not None:
+                entries.append(self.store.set_inventory(entry.package_id, installed, update_available))
+        return self._emit_changed(entries)
+
+    def set_state(self, key, state, action=None, installed=None, update_available=None):
+        entry = self.entry(key)
+        if entry is None:
+            return
+        self._emit_changed([self.store.transition(entry.package_id, state, action, installed, update_available)])
+
+    def queue(self, keys, action):
+        entries = [self.entry(key) for key in keys]
+        self._emit_changed([self.store.transition(entry.package_id, QUEUED, action) for entry in entries if entry is not None])
+
+    def mark_running(self, key):
+        # Called from progress reports, which keep coming while the job runs
+        entry = self.entry(key)
+        if entry is not None and entry.state == QUEUED:
+            self.set_state(key, RUNNING)
+
+    def settle(self):
+        # Drops failed/finished markers from the previous run, the rows go back to what the inventory says
+        self._emit_changed(self.store.settle())
+
+
+def _lookup(table, entry):
+    # Per (state, action) first, e.g. installed after an upgrade shows "Updated", then per state
+    return table.get((entry.state, entry.action), table.get(entry.state))
+
+
+COMMON_SUFFIXES = {
+    UNKNOWN: ' (checking…)',
+    QUEUED: ' (Queued)',
+    FAILED: ' (Failed)',
+    (RUNNING, 'install'): ' (Installing...)',
+    (RUNNING, 'upgrade'): ' (Updating...)',
+    (RUNNING, 'uninstall'): ' (Uninstalling...)',
+}
+
+# Choices of the state filter next to a search box, tested against each package's store entry
+STATE_FILTERS = {
+    'All': None,
+    'Installed only': lambda entry: entry.installed is True,
+    'Not installed': lambda entry: entry.installed is False,
+    'Update available': lambda entry: entry.installed is True and entry.update_available,
+}
+
+# Per tab presentation: which rows can be ticked, and how each state is colored and labelled
+TAB_STYLES = {
+    # Install tabs: only programs that aren't installed yet can be ticked
+    'install': {
+        'wants_installed': False,
+        'brushes': {INSTALLED: QBrush(Qt.green), UPDATE_AVAILABLE: QBrush(Qt.green), RUNNING: QBrush(Qt.yellow), FAILED: QBrush(Qt.red)},
+        'suffixes': {**COMMON_SUFFIXES, INSTALLED: ' (Installed)', UPDATE_AVAILABLE: ' (Installed)'},
+    },
+    # Winget Update/Uninstall: only installed programs
+    'manage': {
+        'wants_installed': True,
+        'brushes': {
+            NOT_INSTALLED: QBrush(Qt.yellow), (NOT_INSTALLED, 'uninstall'): QBrush(Qt.gray), (INSTALLED, 'upgrade'): QBrush(Qt.green),
+            UPDATE_AVAILABLE: QBrush(Qt.cyan), RUNNING: QBrush(Qt.yellow), FAILED: QBrush(Qt.red),
+        },
+        'suffixes': {
+            **COMMON_SUFFIXES, INSTALLED: ' (Installed)', (INSTALLED, 'upgrade'): ' (Updated)',
+            UPDATE_AVAILABLE: ' (Update available)', (NOT_INSTALLED, 'uninstall'): ' (Uninstalled)',
+        },
+    },
+    # Uninstall Programs: entries from uninstall.json that are present on this machine
+    'uninstall': {
+        'wants_installed': True,
+        'brushes': {NOT_INSTALLED: QBrush(Qt.green), QUEUED: QBrush(Qt.yellow), RUNNING: QBrush(Qt.yellow), FAILED: QBrush(Qt.red)},
+        'suffixes': {**COMMON_SUFFIXES, NOT_INSTALLED: ' (Not Installed)', (NOT_INSTALLED, 'uninstall'): ' (Uninstalled)'},
+    },
+}
+
+
+class PackageTabProxy(QAbstractProxyModel):
+    # A tab's view of a PackageListModel. Check states live here, keyed by source row,
+    # so two tabs over the same model are ticked independently.
+    # Filtering keeps an explicit sorted list of the visible source rows: a keystroke costs the
+    # search plus one layoutChanged, instead of a Python filterAcceptsRow call for every row.
+    def __init__(self, source, style, checkable_categories=False, parent=None):
+        super().__init__(parent)
+        self.style = TAB_STYLES[style]
+        self.checkable_categories = checkable_categories
+        self.checked = set()
+        self.query = ''
+        self.matches = None  # source rows found by the search, None when there is no query
+        self.state_filter = None
+        self.visible = []
+        self.setSourceModel(source)
+        source.modelAboutToBeReset.connect(self.beginResetModel)
+        source.modelReset.connect(self._on_source_reset)
+        source.dataChanged.connect(self._on_source_data_changed)
+        self.visible = self._visible_rows()
+
+    def is_enabled(self, row):
+        # Rows with a job in flight, or whose inventory isn't in yet, can't be ticked
+        entry = row.entry
+        return entry.state != UNKNOWN and entry.state not in BUSY_STATES and entry.installed == self.style['wants_installed']
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.visible)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 1
+
+    def index(self, row, column=0, parent=QModelIndex()):
+        if parent.isValid() or column != 0 or not 0 <= row < len(self.visible):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        if index is None:
+            return super().parent()
+        return QModelIndex()
+
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self.visible[index.row()])
+
+    def mapFromSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        row = bisect_left(self.visible, index.row())
+        if row < len(self.visible) and self.visible[row] == index.row():
+            return self.index(row)
+        return QModelIndex()
+
+    def set_filter(self, query=None, state_filter=None):
+        # Hidden rows keep their check states; Select All and category ticks only touch visible rows
+        self.query = query or ''
+        self.matches = self.sourceModel().search(self.query)
+        self.state_filter = state_filter
+        self._refilter()
+
+    def is_filtered(self):
+        return self.matches is not None or self.state_filter is not None
+
+    def shows(self, source_row):
+        if self.matches is not None and source_row not in self.matches:
+            return False
+        return self.state_filter is None or bool(self.state_filter(self.sourceModel().rows[source_row].entry))
+
+    def _visible_rows(self):
+        model = self.sourceModel()
+        if not self.is_filtered():
+            return list(range(len(model.rows)))
+        if self.state_filter is None:
+            shown = self.matches  # the search index only holds program rows
+        else:
+            candidates = range(len(model.rows)) if self.matches is None else self.matches
+            shown = {source for source in candidates if not model.rows[source].is_category and self.state_filter(model.rows[source].entry)}
+        # A header stays while any of its programs is shown
+        headers = set(map(model.header_rows.__getitem__, shown))
+        headers.discard(-1)
+        return sorted(shown | headers)
+
+    def _refilter(self):
+        visible = self._visible_rows()
+        if visible == self.visible:
+            return
+        # A layout change rather than a reset, so the view keeps its scroll position and current row
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        sources = [self.visible[index.row()] for index in persistent]
+        self.visible = visible
+        self.changePersistentIndexList(persistent, [self.mapFromSource(self.sourceModel().index(source)) for source in sources])
+        self.layoutChanged.emit()
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        row = self.sourceModel().rows[self.mapToSource(index).row()]
+        if row.is_category:
+            return Qt.ItemIsEnabled | (Qt.ItemIsUserCheckable if self.checkable_categories else Qt.NoItemFlags)
+        flags = Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+        return flags | Qt.ItemIsEnabled if self.is_enabled(row) else flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        source_row = self.mapToSource(index).row()
+        row = self.sourceModel().rows[source_row]
+        if role == Qt.DisplayRole:
+            if row.is_category:
+                return row.label
+            return row.label + (_lookup(self.style['suffixes'], row.entry) or '')
+        if role == Qt.CheckStateRole:
+            if row.is_category:
+                if not self.checkable_categories:
+                    return None
+                start, end = self.sourceModel().category_ranges[row.category]
+                enabled = [source for source in range(start, end) if self.shows(source) and self.is_enabled(self.sourceModel().rows[source])]
+                return Qt.Checked if enabled and all(source in self.checked for source in enabled) else Qt.Unchecked
+            return Qt.Checked if source_row in self.checked and self.is_enabled(row) else Qt.Unchecked
+        if role == Qt.BackgroundRole:
+            if row.is_category:
+                return CATEGORY_BRUSH
+            return _lookup(self.style['brushes'], row.entry)
+        return super().data(index, role)
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or not index.isValid():
+            return super().setData(index, value, role)
+        row = self.sourceModel().rows[self.mapToSource(index).row()]
+        if row.is_category:
+            # Ticking a category header ticks every selectable program shown under it
+            start, end = self.sourceModel().category_ranges[row.category]
+            self.set_checked([source for source in range(start, end) if self.shows(source)], value == Qt.Checked)
+        else:
+            self.set_checked([self.mapToSource(index).row()], value == Qt.Checked)
+        return True
+
+    def set_checked(self, source_rows, checked):
+        rows = self.sourceModel().rows
+        source_rows = [source for source in source_rows if not rows[source].is_category and self.is_enabled(rows[source])]
+        if checked:
+            self.checked.update(source_rows)
+        else:
+            self.checked.difference_update(source_rows)
+        self._emit_check_changed()
+
+    def set_all_checked(self, checked):
+        # Select All: one pass over the source rows and one dataChanged, whatever the list size
+        rows = self.sourceModel().rows
+        self.set_checked([source for source in range(len(rows)) if not rows[source].is_category and self.shows(source)], checked)
+
+    def uncheck(self, key):
+        source = self.sourceModel().row_for(key)
+        if source in self.checked:
+            self.checked.discard(source)
+            self._emit_check_changed()
+
+    def clear_checks(self):
+        self.checked.clear()
+        self._emit_check_changed()
+
+    def checked_keys(self):
+        rows = self.sourceModel().rows
+        return [rows[source].key for source in sorted(self.checked) if self.is_enabled(rows[source])]
+
+    def _on_source_reset(self):
+        self.checked.clear()
+        self.matches = self.sourceModel().search(self.query)
+        self.visible = self._visible_rows()
+        self.endResetModel()
+
+    def _on_source_data_changed(self, top_left, bottom_right, roles=()):
+        first = bisect_left(self.visible, top_left.row())
+        last = bisect_right(self.visible, bottom_right.row()) - 1
+        if first <= last:
+            # Flags, colors and suffixes all follow the state, so every role of these rows changed
+            self.dataChanged.emit(self.index(first), self.index(last), [])
+        # A package's state can move it in or out of a state filter, and its category header with it
+        if self.state_filter is not None:
+            self._refilter()
+
+    def _emit_check_changed(self):
+        if self.rowCount():
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, 0), [Qt.CheckStateRole])
@@ -1,37 +1,48 @@
-import json
-import subprocess
-import sys
-import os
-from concurrent.futures import ThreadPoolExecutor
 import logging
+from PyQt5.QtCore import QThread, pyqtSignal
 from PyQt5.QtWidgets import QMessageBox
-import pkg_resources
+from scripts.core.policy_engine import load_policies, plan_policies, run_policies
+from scripts.core.requirements_check import missing_requirements, pip_install
+from scripts.gui_bridge import handle_exception
 
-# Configure logging
-logging.basicConfig(filename='log.txt', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-def handle_exception(e):
-    exc_type, exc_obj, exc_tb = sys.exc_info()
-    fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
-    line_number = exc_tb.tb_lineno
-    error_message = f"An error occurred in {fname} at line {line_number}: {e}"
-    
-    logging.error(error_message)
-    print(error_message)
-    QMessageBox.critical(None, "Error", error_message)
+logger = logging.getLogger(__name__)
 
 try:
+    # gpupdate and pip can take a minute, so they run here and report back through the signals
+    class ScriptThread(QThread):
+        script_finished = pyqtSignal(object)
+        script_failed = pyqtSignal(str)
+
+        def __init__(self, script, *args):
+            super().__init__()
+            self.script = script
+            self.args = args
+
+        def run(self):
+            try:
+                self.script_finished.emit(self.script(*self.args))
+            except Exception as e:
+                logger.error(f"{self.script.__name__} failed: {e}")
+                self.script_failed.emit(str(e))
+
+    def startScriptThread(self, on_finished, script, *args):
+        try:
+            if getattr(self, 'scriptThread', None) is not None and self.scriptThread.isRunning():
+                QMessageBox.warning(self, 'Busy', 'Please wait for the running script to finish')
+                return
+            self.scriptThread = ScriptThread(script, *args)
+            self.scriptThread.script_finished.connect(on_finished)
+            self.scriptThread.script_failed.connect(lambda error: QMessageBox.warning(self, 'Error', error))
+            self.scriptThread.start()
+        except Exception as e:
+            handle_exception(e)
+
     def applyPolicies(self):
         try:
             reply = QMessageBox.question(self, 'Confirm', 'Are you sure you want to apply policies?', QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
             if reply == QMessageBox.Yes:
-                logging.info("Applying policies")
-                print("Applying policies")
-                action = 'apply'
-                executePolicies(action)
-                QMessageBox.information(None, 'Policies Applied', 'Policies have been successfully applied.')
-                logging.info("Policies applied successfully")
-                print("Policies applied successfully")
+                logger.info("Applying policies")
+                self.startScriptThread(lambda outcome: self.onPoliciesFinished('Policies Applied', outcome), run_policies, 'apply')
         except Exception as e:
             handle_exception(e)
 
@@ -39,79 +50,71 @@ try:
         try:
             reply = QMessageBox.question(self, 'Confirm', 'Are you sure you want to revert policies?', QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
             if reply == QMessageBox.Yes:
-                logging.info("Reverting policies")
-                print("Reverting policies")
-                action = 'revert'
-                executePolicies(action)
-                QMessageBox.information(None, 'Policies Reverted', 'Policies have been successfully reverted.')
-                logging.info("Policies reverted successfully")
-                print("Policies reverted successfully")
+                logger.info("Reverting policies")
+                self.startScriptThread(lambda outcome: self.onPoliciesFinished('Policies Reverted', outcome), run_policies, 'revert')
         except Exception as e:
             handle_exception(e)
 
-    def executePolicies(action):
+    def onPoliciesFinished(self, title, outcome):
         try:
-            # Load policies from JSON file
-            with open('functions/policies/policies.json', 'r') as file:
-                policies = json.load(file)
-
-            def set_policy(policy):
-                try:
-                    reg_path = policy['regPath']
-                    reg_name = policy['regName']
-                    if action == 'apply':
-                        reg_value = policy['regValue']
-                        type = policy['type']
-                        command = f"Set-ItemProperty -Path '{reg_path}' -Name '{reg_name}' -Value '{reg_value}' -Type {type} -Force"
-                        logging.info(f"Setting policy: Path='{reg_path}', Name='{reg_name}', Value='{reg_value}' ({type})")
-                        print(f"Setting policy: Path='{reg_path}', Name='{reg_name}', Value='{reg_value}' ({type})")
-                        subprocess.run(["powershell", "-Command", command], check=True)
-                    else:
-                        # Check if the item exists before attempting to remove it
-                        check_command = f"Test-Path -Path '{reg_path}' -Name '{reg_name}'"
-                        result = subprocess.run(["powershell", "-Command", check_command], capture_output=True, text=True)
-                        if result.stdout.strip() == 'True':
-                            command = f"Remove-ItemProperty -Path '{reg_path}' -Name '{reg_name}' -Force"
-                            logging.info(f"Removing policy: Path='{reg_path}', Name='{reg_name}'")
-                            print(f"Removing policy: Path='{reg_path}', Name='{reg_name}'")
-                            subprocess.run(["powershell", "-Command", command], check=True)
-                        else:
-                            logging.info(f"Policy not found: Path='{reg_path}', Name='{reg_name}'")
-                            print(f"Policy not found: Path='{reg_path}', Name='{reg_name}'")
-                except Exception as e:
-                    handle_exception(e)
+            logger.info(title)
+            self.showPolicyResults(title, *outcome)
+        except Exception as e:
+            handle_exception(e)
 
-            # Apply each policy using multithreading
-            with ThreadPoolExecutor() as executor:
-                executor.map(set_policy, policies)
+    def scanPolicies(self):
+        try:
+            # Read-only compliance check against the "apply" state
+            plan = plan_policies(load_policies(), 'apply')
+            drifted = [change for change in plan if change.operation != 'none']
+            logger.info(f"Policy scan: {len(plan) - len(drifted)} of {len(plan)} policies compliant")
+            if drifted:
+                details = '\n'.join(change.name for change in drifted)
+                QMessageBox.information(self, 'Policy Compliance', f'{len(drifted)} of {len(plan)} policies differ:\n{details}')
+            else:
+                QMessageBox.information(self, 'Policy Compliance', f'All {len(plan)} policies are applied.')
+        except Exception as e:
+            handle_exception(e)
 
-            # Refresh group policy settings
-            logging.info("Refreshing group policy settings...")
-            print("Refreshing group policy settings...")
-            subprocess.run(["gpupdate", "/force"], check=True)
-            logging.info("Finished applying policies.")
-            print("Finished applying policies.")
+    def showPolicyResults(self, title, results, refresh_error=None):
+        try:
+            failed = [result for result in results if result.failed]
+            changed = sum(1 for result in results if result.status in ('written', 'removed'))
+            summary = f'{changed} of {len(results)} policies changed.'
+            if failed:
+                details = '\n'.join(f'{result.name}: {result.error}' for result in failed)
+                summary += f'\n{len(failed)} failed:\n{details}'
+            if refresh_error:
+                summary += f'\n{refresh_error}, the changes take effect after the next policy refresh or a restart.'
+            if failed or refresh_error:
+                QMessageBox.warning(self, title, summary)
+            else:
+                QMessageBox.information(self, title, summary)
         except Exception as e:
             handle_exception(e)
 
+    def install_python_modules():
+        # Returns what pip had to install
+        missing_packages = missing_requirements('functions/python/modules.txt')
+        if missing_packages:
+            pip_install(missing_packages)
+        return missing_packages
+
     def installPythonModules(self):
         try:
-            logging.info("Starting installation of Python modules.")
-            print("Starting installation of Python modules.")
-            
-            with open('functions/python/modules.txt', 'r') as file:
-                requirements = file.read().splitlines()
-                
-                installed_packages = {pkg.key for pkg in pkg_resources.working_set}
-                missing_packages = [pkg for pkg in requirements if pkg not in installed_packages]
-
-                if missing_packages:
-                    subprocess.check_call([sys.executable, '-m', 'pip', 'install', *missing_packages])
-            
-            logging.info("Finished installation of Python modules.")
-            print("Finished installation of Python modules.")
+            logger.info("Starting installation of Python modules.")
+            self.startScriptThread(self.onPythonModulesInstalled, install_python_modules)
+        except Exception as e:
+            handle_exception(e)
 
-        except Exception as e:  
+    def onPythonModulesInstalled(self, installed):
+        try:
+            logger.info("Finished installation of Python modules.")
+            if installed:
+                QMessageBox.information(self, 'Python Modules', f'Installed: {", ".join(installed)}')
+            else:
+                QMessageBox.information(self, 'Python Modules', 'All Python modules are already installed.')
+        except Exception as e:
             handle_exception(e)
 
 except Exception as e:
@@ -1,170 +1,107 @@
 import json
-import subprocess
 import logging
-import os
-import sys
-from PyQt5.QtWidgets import QListWidgetItem, QMessageBox
+from PyQt5.QtWidgets import QMessageBox
 from PyQt5.QtCore import Qt
+from scripts.core.winget_inventory import package_ids
+from scripts.core.inventory_cache import inventory_cache
+from scripts.core.winget_scheduler import WingetScheduler, build_install_jobs, build_jobs
+from scripts.core.winget_import import WingetImportBatch
+from scripts.core.winget_progress import ProgressModel
+from scripts.core.package_state import NOT_INSTALLED, INSTALLED, FAILED
+from scripts.core.spans import timed
+from scripts.package_model import STATE_FILTERS
+from scripts.gui_bridge import handle_exception, SchedulerSignals
 
-# Configure logging
-logging.basicConfig(filename='log.txt', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-def handle_exception(e):
-    exc_type, exc_obj, exc_tb = sys.exc_info()
-    fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
-    line_number = exc_tb.tb_lineno
-    error_message = f"An error occurred in {fname} at line {line_number}: {e}"
-    
-    logging.error(error_message)
-    print(error_message)
-    QMessageBox.critical(None, "Error", error_message)
-    sys.exit(1)
+logger = logging.getLogger(__name__)
 
 try:
+    @timed('ui')
     def loadWingetData(self):
         try:
             with open('functions/install/winget.json', 'r', encoding='utf-8') as file:
                 self.winget_data = json.load(file)
                 self.totalProgramsWinget = len(self.winget_data)
                 self.updateCounterLabelWinget()
-                
+
                 categories = {}
                 for program, details in self.winget_data.items():
-                    category = details['category']
-                    if category not in categories:
-                        categories[category] = []
-                    categories[category].append(details)
-                
-                for category, programs in categories.items():
-                    category_item = QListWidgetItem(category)
-                    category_item.setFlags(category_item.flags() & ~Qt.ItemIsUserCheckable)  # Disable the checkbox for the category item
-                    category_item.setBackground(Qt.lightGray)
-                    self.listWidgetWinget.addItem(category_item)
-                    
-                    # Create a new category item for the second list
-                    category_item_copy = QListWidgetItem(category)
-                    category_item_copy.setFlags(category_item.flags() & ~Qt.ItemIsUserCheckable)
-                    category_item_copy.setBackground(Qt.lightGray)
-                    self.listWidgetWingetUpdaUnins.addItem(category_item_copy)
-                    
-                    for details in programs:
-                        list_item = QListWidgetItem(details['Name'])
-                        list_item.setFlags(list_item.flags() | Qt.ItemIsUserCheckable)  # Enable the checkbox for the item
-                        list_item.setCheckState(Qt.Unchecked)
-                        list_item.setData(Qt.UserRole, details['Name'])  # Store the actual program name for installation
+                    categories.setdefault(details['category'], []).append((program, details['Name'], ','.join(package_ids(details))))
 
-                        # Create a new list item for the second list
-                        list_item_copy = QListWidgetItem(details['Name'])
-                        list_item_copy.setFlags(list_item.flags() | Qt.ItemIsUserCheckable)
-                        list_item_copy.setCheckState(Qt.Unchecked)
-                        list_item_copy.setData(Qt.UserRole, details['Name'])
-
-                        if self.is_program_installed_winget(details['Name']): 
-                            list_item.setBackground(Qt.green)
-                            list_item.setFlags(list_item.flags() & ~Qt.ItemIsEnabled)
-                            list_item.setText(f"{details['Name']} (Installed)")
-
-                            list_item_copy.setFlags(list_item.flags() | Qt.ItemIsEnabled)
-                            list_item_copy.setText(f"{details['Name']} (Installed)")
+                # Both winget tabs show this model; rows stay disabled until the background inventory is in
+                self.wingetModel.load(list(categories.items()))
+        except Exception as e:
+            handle_exception(e)
 
-                            self.installedCountWinget += 1
-                            self.updateCounterLabelWinget()
-                        else:
-                            list_item_copy.setBackground(Qt.yellow)
-                            list_item_copy.setFlags(list_item.flags() & ~Qt.ItemIsEnabled)
-                        
-                        self.listWidgetWinget.addItem(list_item)
-                        self.listWidgetWingetUpdaUnins.addItem(list_item_copy)                
+    @timed('ui')
+    def applyWingetInventory(self):
+        try:
+            index = inventory_cache.snapshot()
+            changes = {}
+            for row in self.wingetModel.packages():
+                installed = self.is_program_installed_winget(row.key)
+                update_available = bool(installed) and index.has_update(package_ids(self.winget_data[row.key]))
+                if row.entry.installed == installed and row.entry.update_available == update_available:
+                    continue
+                if installed and not row.entry.installed:
+                    self.installedCountWinget += 1
+                elif row.entry.installed and not installed:
+                    self.installedCountWinget -= 1
+                changes[row.key] = (installed, update_available)
+            self.wingetModel.update_inventory(changes)
+            self.updateCounterLabelWinget()
         except Exception as e:
             handle_exception(e)
 
     def is_program_installed_winget(self, program_name):
         try:
-            if not hasattr(self, 'installed_programs'):
-                print("***[Checking Installed Programs]*** Fetching list of installed programs using winget")
-                logging.info("***[Checking Installed Programs]*** Fetching list of installed programs using winget")
-                result = subprocess.run(["winget", "list"], capture_output=True, text=True, check=True, encoding='utf-8')
-                self.installed_programs = result.stdout.lower()
-            
-            if program_name.lower() in self.installed_programs:
-                print(f"***[Checking Installed Programs]*** {program_name} is installed")
-                logging.info(f"***[Checking Installed Programs]*** {program_name} is installed")
+            installed = inventory_cache.snapshot().is_installed(package_ids(self.winget_data[program_name]))
+            if installed:
+                logger.debug(f"***[Checking Installed Programs]*** {program_name} is installed")
             else:
-                print(f"***[Checking Installed Programs]*** {program_name} is not installed")
-                logging.info(f"***[Checking Installed Programs]*** {program_name} is not installed")
-            return program_name.lower() in self.installed_programs
+                logger.debug(f"***[Checking Installed Programs]*** {program_name} is not installed")
+            return installed
         except Exception as e:
             handle_exception(e)
 
+    @timed('ui')
     def selectAllWinget(self, state):
         try:
-            for i in range(self.listWidgetWinget.count()):
-                item = self.listWidgetWinget.item(i)
-                if item.background() == Qt.lightGray:  # Check if the item is a category
-                    self.categorySelectAllWinget(item, state)
-                elif item.background() != Qt.green and item.flags() & Qt.ItemIsEnabled:
-                    item.setCheckState(Qt.Checked if state == Qt.Checked else Qt.Unchecked)
+            self.wingetInstallProxy.set_all_checked(state == Qt.Checked)
         except Exception as e:
             handle_exception(e)
 
+    @timed('ui')
     def selectAllWingetUpdaUnins(self, state):
         try:
-            for i in range(self.listWidgetWingetUpdaUnins.count()):
-                item = self.listWidgetWingetUpdaUnins.item(i)
-                if item.background() == Qt.lightGray:  # Check if the item is a category
-                    self.categorySelectAllWingetUpdaUnins(item, state)
-                elif item.background() == Qt.green and item.flags() & Qt.ItemIsEnabled:
-                    item.setCheckState(Qt.Checked if state == Qt.Checked else Qt.Unchecked)
-        except Exception as e:
-            handle_exception(e)
-
-    def categorySelectAllWinget(self, category_item, state):
-        try:
-            category_index = self.listWidgetWinget.row(category_item)
-            for i in range(category_index + 1, self.listWidgetWinget.count()):
-                item = self.listWidgetWinget.item(i)
-                if item.background() != Qt.lightGray:  # Stop if another category is encountered
-                    break
-                if item.background() == Qt.green and item.flags() & Qt.ItemIsEnabled:
-                    item.setCheckState(Qt.Checked if state == Qt.Checked else Qt.Unchecked)
+            self.wingetUpdaUninsProxy.set_all_checked(state == Qt.Checked)
         except Exception as e:
             handle_exception(e)
 
-    def categorySelectAllWingetUpdaUnins(self, category_item2, state):
+    # Both run on every keystroke; the model's prefix index answers the query, the proxy hides the rest
+    @timed('ui')
+    def filterWinget(self, *args):
         try:
-            category_index_2= self.listWidgetWingetUpdaUnins.row(category_item2)
-            for i in range(category_index_2 + 1, self.listWidgetWingetUpdaUnins.count()):
-                item = self.listWidgetWingetUpdaUnins.item(i)
-                if item.background() == Qt.lightGray:  # Stop if another category is encountered
-                    break
-                if item.background() != Qt.green and item.flags() & Qt.ItemIsEnabled:
-                    item.setCheckState(Qt.Checked if state == Qt.Checked else Qt.Unchecked)
+            self.wingetInstallProxy.set_filter(self.searchBoxWinget.text(), STATE_FILTERS[self.stateFilterWinget.currentText()])
         except Exception as e:
             handle_exception(e)
 
-    def onItemChangedWinget(self, item):
+    @timed('ui')
+    def filterWingetUpdaUnins(self, *args):
         try:
-            if item.background() == Qt.lightGray:  # Check if the item is a category
-                self.categorySelectAllWinget(item)
-        except Exception as e:
-            handle_exception(e)
-
-    def onItemChangedWingetUpdaUnins(self, item):
-        try:
-            if item.background() == Qt.lightGray:  # Check if the item is a category
-                self.categorySelectAllWingetUpdaUnins(item)
+            self.wingetUpdaUninsProxy.set_filter(self.searchBoxWingetUpdaUnins.text(), STATE_FILTERS[self.stateFilterWingetUpdaUnins.currentText()])
         except Exception as e:
             handle_exception(e)
 
     def installSelectedWinget(self):
         try:
-            selected_items = [self.listWidgetWinget.item(i) for i in range(self.listWidgetWinget.count()) if self.listWidgetWinget.item(i).checkState() == Qt.Checked]
-            
+            self.wingetModel.settle()
+            selected_items = self.wingetInstallProxy.checked_keys()
+
             if selected_items:
+                self.wingetModel.queue(selected_items, 'install')
                 self.installQueueWinget = selected_items
                 self.progressBarWinget.setMaximum(100)
                 self.progressBarWinget.setValue(0)
-                self.incrementWinget = 100 / len(selected_items)  # Calculate increment based on the number of selected items
                 self.installedCountWinget = 0  # Initialize the installed count
                 self.totalSelectedWinget = len(selected_items)  # Total number of selected items
                 self.updateCounterLabelWinget()  # Update the counter label initially
@@ -176,47 +113,65 @@ try:
 
     def installNextWinget(self):
         try:
-            if self.installQueueWinget:
-                item = self.installQueueWinget.pop(0)
-                program_name = item.data(Qt.UserRole)  # Retrieve the actual program name for installation
-                winget_command = self.winget_data[program_name]['winget']
-                ps_command = f"winget install {winget_command} --accept-package-agreements --accept-source-agreements"
-                try:
-                    logging.info(f"***[Winget]*** Installing {program_name} using winget")
-                    print(f"***[Winget]*** Installing {program_name} using winget")
-                    subprocess.run(["powershell", "-Command", ps_command], check=True, encoding='utf-8')
-                    logging.info(f"***[Winget]*** Successfully installed {program_name}")
-                    print(f"***[Winget]*** Successfully installed {program_name}")
-                    self.onInstallFinishedWinget(program_name, True)
-                except subprocess.CalledProcessError:
-                    logging.error(f"***[Winget]*** Failed to install {program_name}")
-                    print(f"***[Winget]*** Failed to install {program_name}")
-                    self.onInstallFinishedWinget(program_name, False)
+            # Hand the whole queue to the scheduler, which runs several winget jobs at once off the GUI thread
+            program_names = self.installQueueWinget
+            self.installQueueWinget = []
+            self.installButtonWinget.setEnabled(False)
+            self.wingetSchedulerSignals = SchedulerSignals()
+            self.wingetSchedulerSignals.job_finished.connect(self.onInstallFinishedWinget)
+            self.wingetSchedulerSignals.all_finished.connect(self.onAllInstallsFinishedWinget)
+            self.wingetSchedulerSignals.progress_changed.connect(self.onProgressWinget)
+            jobs = build_install_jobs(program_names, self.winget_data)
+            self.wingetProgress = ProgressModel(jobs, on_change=self.wingetSchedulerSignals.progress_changed.emit)
+            # Bulk mode pays for winget's source loading once for the whole selection
+            if self.bulkCheckboxWinget.isChecked() and len(jobs) > 1:
+                scheduler_class = WingetImportBatch
             else:
-                QMessageBox.information(self, 'Install', 'All selected programs have been installed')
-                self.progressBarWinget.setValue(100)  # Ensure progress bar is set to 100% when done
+                scheduler_class = WingetScheduler
+            self.wingetScheduler = scheduler_class(
+                jobs,
+                on_job_finished=self.wingetSchedulerSignals.job_finished.emit,
+                on_all_finished=self.wingetSchedulerSignals.all_finished.emit,
+                progress=self.wingetProgress,
+            )
+            self.wingetScheduler.start()
+        except Exception as e:
+            handle_exception(e)
+
+    def onProgressWinget(self, program_name, phase, percent):
+        try:
+            if phase != 'done':
+                self.wingetModel.mark_running(program_name)
+            self.progressBarWinget.setValue(percent)
+            self.progressBarWinget.setFormat(f"{program_name}: {phase} - %p%")
+        except Exception as e:
+            handle_exception(e)
+
+    def onAllInstallsFinishedWinget(self):
+        try:
+            self.installButtonWinget.setEnabled(True)
+            QMessageBox.information(self, 'Install', 'All selected programs have been installed')
+            self.progressBarWinget.setValue(100)  # Ensure progress bar is set to 100% when done
+            self.progressBarWinget.setFormat('%p%')
         except Exception as e:
             handle_exception(e)
 
     def onInstallFinishedWinget(self, program_name, success):
         try:
-            for i in range(self.listWidgetWinget.count()):
-                item = self.listWidgetWinget.item(i)
-                item_text = item.text().strip()  # Remove leading and trailing spaces
-                if item_text == self.winget_data[program_name]['Name']:
-                    if success:
-                        item.setBackground(Qt.green)
-                        item.setCheckState(Qt.Unchecked)
-                        item.setFlags(item.flags() & ~Qt.ItemIsEnabled)
-                        item.setText(f"{item.text()} (Installed)")
-                        self.installedCountWinget += 1  # Increment the counter by 1
-                    else:
-                        item.setBackground(Qt.red)
-                        item.setText(f"{item.text()} (Failed)")
-                    break
-            self.progressBarWinget.setValue(self.progressBarWinget.value() + int(self.incrementWinget))
+            if success:
+                # A bulk import refreshes the inventory before reporting, which may have counted it already
+                entry = self.wingetModel.entry(program_name)
+                if entry is not None and not entry.installed:
+                    self.installedCountWinget += 1  # Increment the counter by 1
+                self.wingetInstallProxy.uncheck(program_name)
+                self.wingetModel.set_state(program_name, INSTALLED, installed=True, update_available=False)
+                inventory_cache.mark_installed(package_ids(self.winget_data[program_name]), self.winget_data[program_name]['Name'])
+                logger.info(f"***[Winget]*** Successfully installed {program_name}")
+            else:
+                self.wingetModel.set_state(program_name, FAILED)
+                logger.error(f"***[Winget]*** Failed to install {program_name}")
+            self.progressBarWinget.setValue(self.wingetProgress.percent())
             self.updateCounterLabelWinget()  # Update the counter label after each installation
-            self.installNextWinget()  # Continue with the next item
         except Exception as e:
             handle_exception(e)
 
@@ -230,22 +185,15 @@ try:
     # ------- Uninstall section -------
     def uninstallSelectedWingetUpdaUnins(self):
         try:
-            selected_items = [self.listWidgetWingetUpdaUnins.item(i) for i in range(self.listWidgetWingetUpdaUnins.count()) if self.listWidgetWingetUpdaUnins.item(i).checkState() == Qt.Checked]
-            
-            # Reset text for items marked as failed
-            for i in range(self.listWidgetWingetUpdaUnins.count()):
-                item = self.listWidgetWingetUpdaUnins.item(i)
-                if "(Installed)" in item.text():
-                    item.setText(item.text().replace(" (Installed)", ""))
-                elif "(Failed)" in item.text():
-                    item.setText(item.text().replace(" (Failed)", ""))
-            
+            # Markers from the previous run go away, the rows show what the inventory says again
+            self.wingetModel.settle()
+            selected_items = self.wingetUpdaUninsProxy.checked_keys()
 
             if selected_items:
+                self.wingetModel.queue(selected_items, 'uninstall')
                 self.uninstallQueueWinget = selected_items
                 self.progressBarWingetUpdaUnins.setMaximum(100)
                 self.progressBarWingetUpdaUnins.setValue(0)
-                self.incrementWingetUpdaUnins = 100 / len(selected_items)  # Calculate increment based on the number of selected items
                 self.uninstallNextWinget()
             else:
                 QMessageBox.warning(self, 'No Selection', 'Please select programs to uninstall')
@@ -254,46 +202,65 @@ try:
 
     def uninstallNextWinget(self):
         try:
-            if self.uninstallQueueWinget:
-                item = self.uninstallQueueWinget.pop(0)
-                program_name = item.data(Qt.UserRole)  # Retrieve the actual program name for uninstallation
-                winget_command = self.winget_data[program_name]['winget']
-                ps_command = f"winget uninstall {winget_command}"
-                try:
-                    logging.info(f"***[Winget]*** Uninstalling {program_name} using winget")
-                    print(f"***[Winget]*** Uninstalling {program_name} using winget")
-                    subprocess.run(["powershell", "-Command", ps_command], check=True, encoding='utf-8')
-                    logging.info(f"***[Winget]*** Successfully uninstalled {program_name}")
-                    print(f"***[Winget]*** Successfully uninstalled {program_name}")
-                    self.onUninstallFinishedWinget(program_name, True)
-                except subprocess.CalledProcessError:
-                    logging.error(f"***[Winget]*** Failed to uninstall {program_name}")
-                    print(f"***[Winget]*** Failed to uninstall {program_name}")
-                    self.onUninstallFinishedWinget(program_name, False)
-            else:
-                QMessageBox.information(self, 'Uninstall', 'All selected programs have been uninstalled')
-                self.progressBarWingetUpdaUnins.setValue(100)  # Ensure progress bar is set to 100% when done
+            # Uninstalls run one at a time, but off the GUI thread
+            program_names = self.uninstallQueueWinget
+            self.uninstallQueueWinget = []
+            self.startWingetUpdaUninsScheduler(program_names, 'uninstall', self.onUninstallFinishedWinget, self.onAllUninstallsFinishedWinget)
         except Exception as e:
             handle_exception(e)
 
-    def onUninstallFinishedWinget(self, program_name, success):
+    def startWingetUpdaUninsScheduler(self, program_names, action, on_job_finished, on_all_finished):
+        try:
+            self.uninstallButtonWingetUpdaUnins.setEnabled(False)
+            self.updateButtonWingetUpdaUnins.setEnabled(False)
+            self.wingetUpdaUninsSignals = SchedulerSignals()
+            self.wingetUpdaUninsSignals.job_finished.connect(on_job_finished)
+            self.wingetUpdaUninsSignals.all_finished.connect(on_all_finished)
+            self.wingetUpdaUninsSignals.progress_changed.connect(self.onProgressWingetUpdaUnins)
+            jobs = build_jobs(program_names, self.winget_data)
+            self.wingetUpdaUninsProgress = ProgressModel(jobs, on_change=self.wingetUpdaUninsSignals.progress_changed.emit)
+            self.wingetUpdaUninsScheduler = WingetScheduler(
+                jobs,
+                action=action,
+                max_workers=1,
+                on_job_finished=self.wingetUpdaUninsSignals.job_finished.emit,
+                on_all_finished=self.wingetUpdaUninsSignals.all_finished.emit,
+                progress=self.wingetUpdaUninsProgress,
+            )
+            self.wingetUpdaUninsScheduler.start()
+        except Exception as e:
+            handle_exception(e)
+
+    def onProgressWingetUpdaUnins(self, program_name, phase, percent):
+        try:
+            if phase != 'done':
+                self.wingetModel.mark_running(program_name)
+            self.progressBarWingetUpdaUnins.setValue(percent)
+            self.progressBarWingetUpdaUnins.setFormat(f"{program_name}: {phase} - %p%")
+        except Exception as e:
+            handle_exception(e)
+
+    def onAllUninstallsFinishedWinget(self):
         try:
-            for i in range(self.listWidgetWingetUpdaUnins.count()):
-                item = self.listWidgetWingetUpdaUnins.item(i)
-                item_text = item.text().strip()  # Remove leading and trailing spaces
-                if item_text == self.winget_data[program_name]['Name']:
-                    if success:
-                        item.setBackground(Qt.grey)
-                        item.setCheckState(Qt.Unchecked)
-                        item.setFlags(item.flags() & ~Qt.ItemIsEnabled)
-                        item.setText(f"{item.text()} (Uninstalled)")
-                    else:
-                        item.setBackground(Qt.red)
-                        item.setText(f"{item.text()} (Failed)")
+            self.uninstallButtonWingetUpdaUnins.setEnabled(True)
+            self.updateButtonWingetUpdaUnins.setEnabled(True)
+            QMessageBox.information(self, 'Uninstall', 'All selected programs have been uninstalled')
+            self.progressBarWingetUpdaUnins.setValue(100)  # Ensure progress bar is set to 100% when done
+            self.progressBarWingetUpdaUnins.setFormat('%p%')
+        except Exception as e:
+            handle_exception(e)
 
-                    break
-            self.progressBarWingetUpdaUnins.setValue(self.progressBarWingetUpdaUnins.value() + int(self.incrementWingetUpdaUnins))
-            self.uninstallNextWinget()  # Continue with the next item
+    def onUninstallFinishedWinget(self, program_name, success):
+        try:
+            if success:
+                self.wingetUpdaUninsProxy.uncheck(program_name)
+                self.wingetModel.set_state(program_name, NOT_INSTALLED, installed=False, update_available=False)
+                inventory_cache.mark_uninstalled(package_ids(self.winget_data[program_name]))
+                logger.info(f"***[Winget]*** Successfully uninstalled {program_name}")
+            else:
+                self.wingetModel.set_state(program_name, FAILED)
+                logger.error(f"***[Winget]*** Failed to uninstall {program_name}")
+            self.progressBarWingetUpdaUnins.setValue(self.wingetUpdaUninsProgress.percent())
         except Exception as e:
             handle_exception(e)
 
@@ -301,28 +268,14 @@ try:
 # ------- Update section -------
     def updateSelectedWingetUpdaUnins(self):
         try:
-            selected_items = [self.listWidgetWingetUpdaUnins.item(i) for i in range(self.listWidgetWingetUpdaUnins.count()) if self.listWidgetWingetUpdaUnins.item(i).checkState() == Qt.Checked]
-            
-            # Reset text for items marked as failed
-            for i in range(self.listWidgetWingetUpdaUnins.count()):
-                item = self.listWidgetWingetUpdaUnins.item(i)
-                if "(Installed)" in item.text():
-                    item.setText(item.text().replace(" (Installed)", ""))
-                elif "(Failed)" in item.text():
-                    item.setText(item.text().replace(" (Failed)", ""))
-                elif "(Installed) (Update available)" in item.text():
-                    item.setText(item.text().replace(" (Installed) (Update available)", ""))
-                elif "(Updated)" in item.text():
-                    item.setText(item.text().replace(" (Updated)", ""))
-                elif "(Failed) (Update available)" in item.text():
-                    item.setText(item.text().replace(" (Failed) (Update available)", ""))
-            
+            self.wingetModel.settle()
+            selected_items = self.wingetUpdaUninsProxy.checked_keys()
 
             if selected_items:
+                self.wingetModel.queue(selected_items, 'upgrade')
                 self.updateQueueWinget = selected_items
                 self.progressBarWingetUpdaUnins.setMaximum(100)
                 self.progressBarWingetUpdaUnins.setValue(0)
-                self.incrementWingetUpdaUnins = 100 / len(selected_items)  # Calculate increment based on the number of selected items
                 self.updateNextWinget()
             else:
                 QMessageBox.warning(self, 'No Selection', 'Please select programs to update')
@@ -331,50 +284,32 @@ try:
 
     def updateNextWinget(self):
         try:
-            if self.updateQueueWinget:
-                item = self.updateQueueWinget.pop(0)
-                program_name = item.data(Qt.UserRole)  # Retrieve the actual program name for uninstallation
-                winget_command = self.winget_data[program_name]['winget']
-                ps_command = f"winget upgrade {winget_command}"
-                try:
-                    logging.info(f"***[Winget]*** Updating {program_name} using winget")
-                    print(f"***[Winget]*** Updating {program_name} using winget")
-                    subprocess.run(["powershell", "-Command", ps_command], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True, encoding='utf-8')
-                    logging.info(f"***[Winget]*** Successfully updated {program_name}")
-                    print(f"***[Winget]*** Successfully updated {program_name}")
-                    self.onUpdateFinishedWinget(program_name, True)
-                except subprocess.CalledProcessError as e:
-                    if "No newer package versions are available from the configured sources." in e.stdout:
-                        logging.info(f"***[Winget]*** {program_name} is already up-to-date")
-                        print(f"***[Winget]*** {program_name} is already up-to-date")
-                        self.onUpdateFinishedWinget(program_name, True)
-                    else:
-                        logging.error(f"***[Winget]*** Failed to update {program_name}")
-                        print(f"***[Winget]*** Failed to update {program_name}")
-                        logging.error(e.stdout)
-                        self.onUpdateFinishedWinget(program_name, False)
-            else:
-                QMessageBox.information(self, 'Update', 'All selected programs have been updated')
-                self.progressBarWingetUpdaUnins.setValue(100)  # Ensure progress bar is set to 100% when done
+            program_names = self.updateQueueWinget
+            self.updateQueueWinget = []
+            self.startWingetUpdaUninsScheduler(program_names, 'upgrade', self.onUpdateFinishedWinget, self.onAllUpdatesFinishedWinget)
         except Exception as e:
             handle_exception(e)
 
-    def onUpdateFinishedWinget(self, program_name, success):
+    def onAllUpdatesFinishedWinget(self):
         try:
-            for i in range(self.listWidgetWingetUpdaUnins.count()):
-                item = self.listWidgetWingetUpdaUnins.item(i)
-                item_text = item.text().strip()  # Remove leading and trailing spaces
-                if item_text == self.winget_data[program_name]['Name']:
-                    if success:
-                        item.setBackground(Qt.green)
-                        item.setText(f"{item.text()} (Updated)")
-                    else:
-                        item.setBackground(Qt.red)
-                        item.setText(f"{item.text()} (Failed)")
+            self.uninstallButtonWingetUpdaUnins.setEnabled(True)
+            self.updateButtonWingetUpdaUnins.setEnabled(True)
+            QMessageBox.information(self, 'Update', 'All selected programs have been updated')
+            self.progressBarWingetUpdaUnins.setValue(100)  # Ensure progress bar is set to 100% when done
+            self.progressBarWingetUpdaUnins.setFormat('%p%')
+        except Exception as e:
+            handle_exception(e)
 
-                    break
-            self.progressBarWingetUpdaUnins.setValue(self.progressBarWingetUpdaUnins.value() + int(self.incrementWingetUpdaUnins))
-            self.updateNextWinget()  # Continue with the next item
+    def onUpdateFinishedWinget(self, program_name, success):
+        try:
+            if success:
+                self.wingetModel.set_state(program_name, INSTALLED, update_available=False)
+                inventory_cache.mark_updated(package_ids(self.winget_data[program_name]))
+                logger.info(f"***[Winget]*** Successfully updated {program_name}")
+            else:
+                self.wingetModel.set_state(program_name, FAILED)
+                logger.error(f"***[Winget]*** Failed to update {program_name}")
+            self.progressBarWingetUpdaUnins.setValue(self.wingetUpdaUninsProgress.percent())
         except Exception as e:
             handle_exception(e)
 
@@ -0,0 +1,9 @@
+import pytest
+
+from scripts.core.spans import recorder
+
+
+@pytest.fixture(autouse=True, scope='session')
+def spans_outside_the_tree(tmp_path_factory):
+    # run_command records a span for every (fake) command; keep spans.jsonl out of the checkout
+    recorder.path = str(tmp_path_factory.mktemp('spans') / 'spans.jsonl')
@@ -0,0 +1,31 @@
+-- Trimmed winget source index, schema 1.x (source.msix): one manifest row per package version
+CREATE TABLE ids(id TEXT NOT NULL);
+CREATE TABLE names(name TEXT NOT NULL);
+CREATE TABLE monikers(moniker TEXT NOT NULL);
+CREATE TABLE versions(version TEXT NOT NULL);
+CREATE TABLE channels(channel TEXT NOT NULL);
+CREATE TABLE pathparts(parent INT64, pathpart TEXT NOT NULL);
+CREATE TABLE manifest(id INT64 NOT NULL, name INT64 NOT NULL, moniker INT64 NOT NULL, version INT64 NOT NULL,
+                      channel INT64 NOT NULL, pathpart INT64 NOT NULL, hash BLOB);
+CREATE TABLE tags(tag TEXT NOT NULL);
+CREATE TABLE tags_map(manifest INT64 NOT NULL, tag INT64 NOT NULL);
+CREATE TABLE norm_publishers(norm_publisher TEXT NOT NULL);
+CREATE TABLE norm_publishers_map(manifest INT64 NOT NULL, norm_publisher INT64 NOT NULL);
+
+INSERT INTO ids(rowid, id) VALUES (1, 'Mozilla.Firefox'), (2, 'Git.Git'), (3, 'Microsoft.VisualStudioCode'), (4, '7zip.7zip');
+INSERT INTO names(rowid, name) VALUES (1, 'Mozilla Firefox'), (2, 'Git'), (3, 'Microsoft Visual Studio Code'), (4, '7-Zip');
+INSERT INTO monikers(rowid, moniker) VALUES (1, 'firefox'), (2, 'git'), (3, 'vscode'), (4, '7zip');
+INSERT INTO versions(rowid, version) VALUES (1, '124.0.2'), (2, '125.0.1'), (3, '2.9.0'), (4, '2.44.0'), (5, '1.88.1'), (6, '23.01');
+INSERT INTO channels(rowid, channel) VALUES (1, '');
+INSERT INTO pathparts(rowid, parent, pathpart) VALUES (1, NULL, 'manifests');
+-- Firefox and Git have two versions each; 2.44.0 is newer than 2.9.0
+INSERT INTO manifest(rowid, id, name, moniker, version, channel, pathpart) VALUES
+    (1, 1, 1, 1, 1, 1, 1), (2, 1, 1, 1, 2, 1, 1),
+    (3, 2, 2, 2, 4, 1, 1), (4, 2, 2, 2, 3, 1, 1),
+    (5, 3, 3, 3, 5, 1, 1),
+    (6, 4, 4, 4, 6, 1, 1);
+INSERT INTO tags(rowid, tag) VALUES (1, 'browser'), (2, 'web'), (3, 'vcs'), (4, 'editor'), (5, 'developer-tools');
+INSERT INTO tags_map(manifest, tag) VALUES (1, 1), (2, 1), (2, 2), (3, 3), (4, 3), (5, 4), (5, 5);
+INSERT INTO norm_publishers(rowid, norm_publisher) VALUES (1, 'mozilla'), (2, 'the git development community'), (3, 'microsoft');
+-- 7-Zip has no publisher row, its Id names the publisher
+INSERT INTO norm_publishers_map(manifest, norm_publisher) VALUES (1, 1), (2, 1), (3, 2), (4, 2), (5, 3);
@@ -0,0 +1,17 @@
+-- Trimmed winget source index, schema 2.x (source2.msix): one row per package, latest version only
+CREATE TABLE packages(id TEXT NOT NULL, name TEXT NOT NULL, moniker TEXT, latest_version TEXT NOT NULL,
+                      arp_min_version TEXT, arp_max_version TEXT, hash BLOB);
+CREATE TABLE tags2(tag TEXT NOT NULL);
+CREATE TABLE tags2_map(package INT64 NOT NULL, tag INT64 NOT NULL);
+CREATE TABLE norm_publishers2(norm_publisher TEXT NOT NULL);
+CREATE TABLE norm_publishers2_map(package INT64 NOT NULL, norm_publisher INT64 NOT NULL);
+
+INSERT INTO packages(rowid, id, name, moniker, latest_version) VALUES
+    (1, 'Mozilla.Firefox', 'Mozilla Firefox', 'firefox', '125.0.1'),
+    (2, 'Git.Git', 'Git', 'git', '2.44.0'),
+    (3, 'Microsoft.VisualStudioCode', 'Microsoft Visual Studio Code', 'vscode', '1.88.1'),
+    (4, '7zip.7zip', '7-Zip', '7zip', '23.01');
+INSERT INTO tags2(rowid, tag) VALUES (1, 'browser'), (2, 'web'), (3, 'vcs'), (4, 'editor'), (5, 'developer-tools');
+INSERT INTO tags2_map(package, tag) VALUES (1, 1), (1, 2), (2, 3), (3, 4), (3, 5);
+INSERT INTO norm_publishers2(rowid, norm_publisher) VALUES (1, 'mozilla'), (2, 'the git development community'), (3, 'microsoft');
+INSERT INTO norm_publishers2_map(package, norm_publisher) VALUES (1, 1), (2, 2), (3, 3);
@@ -0,0 +1,35 @@
+import hashlib
+
+from scripts.core.installer_hashes import HashCache, verify_installers
+
+
+def test_verify_installers(tmp_path):
+    folder = tmp_path / 'Firefox'
+    folder.mkdir()
+    paths = []
+    for name in ('good.exe', 'bad.msi', 'unlisted.exe'):
+        (folder / name).write_bytes(name.encode() * 1000)
+        paths.append(str(folder / name))
+    good_hash = hashlib.sha256(b'good.exe' * 1000).hexdigest()
+    (folder / 'SHA256SUMS').write_text(f"{good_hash} *good.exe\n{'0' * 64} *bad.msi\n", encoding='utf-8')
+    cache = HashCache(str(tmp_path / 'cache' / 'hashes.json'))
+
+    results = verify_installers(paths, cache)
+
+    assert results[paths[0]] is None
+    assert results[paths[1]].startswith('SHA-256 mismatch for bad.msi')
+    assert results[paths[2]] is None
+    # Hashed in the process pool, remembered for the next run
+    reloaded = HashCache(cache.path)
+    assert reloaded.get(paths[0], (folder / 'good.exe').stat()) == good_hash
+
+
+def test_missing_installer_is_reported(tmp_path):
+    folder = tmp_path / 'Git'
+    folder.mkdir()
+    (folder / 'SHA256SUMS').write_text(f"{'0' * 64} *git.exe\n", encoding='utf-8')
+    path = str(folder / 'git.exe')
+
+    results = verify_installers([path], HashCache(str(tmp_path / 'hashes.json')))
+
+    assert results[path] == 'Could not read git.exe'
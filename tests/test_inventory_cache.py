@@ -0,0 +1,93 @@
+import threading
+
+from scripts.core.inventory_cache import InventoryCache
+from scripts.core.winget_inventory import InstalledIndex
+
+
+def package(package_id):
+    return {'name': package_id, 'id': package_id, 'version': '1', 'available': '', 'source': 'winget'}
+
+
+class BlockingFetch:
+    # Stands in for winget: each call waits until the test lets it return
+    def __init__(self, *package_ids):
+        self.package_ids = list(package_ids)
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        return InstalledIndex({package_id: package(package_id) for package_id in self.package_ids})
+
+
+def make_cache(tmp_path, fetch):
+    cache = InventoryCache(path=str(tmp_path / 'inventory.json'), fetch=fetch)
+    cache.index = InstalledIndex({'Git.Git': package('Git.Git')})
+    return cache
+
+
+def test_mark_calls_do_not_wait_for_a_running_refresh(tmp_path):
+    fetch = BlockingFetch('Git.Git')
+    cache = make_cache(tmp_path, fetch)
+    thread = cache.refresh_async()
+    assert fetch.started.wait(5)
+
+    marked = threading.Thread(target=cache.mark_installed, args=(['Mozilla.Firefox'],))
+    marked.start()
+    marked.join(1)
+    assert not marked.is_alive()
+    assert cache.get().is_installed(['Mozilla.Firefox'])
+
+    fetch.release.set()
+    thread.join(5)
+    # The fetch started before the install finished, the change is replayed on its result
+    assert cache.index.is_installed(['Mozilla.Firefox'])
+
+
+def test_refresh_during_a_background_refresh_fetches_again(tmp_path):
+    fetch = BlockingFetch('Git.Git')
+    cache = make_cache(tmp_path, fetch)
+    background = cache.refresh_async()
+    assert fetch.started.wait(5)
+
+    # Like WingetImportBatch after `winget import`: the running fetch may predate the import
+    refreshed = []
+    importer = threading.Thread(target=lambda: refreshed.append(cache.refresh()))
+    importer.start()
+    cache.mark_uninstalled(['Git.Git'])
+    fetch.package_ids.append('Microsoft.PowerToys')
+    fetch.release.set()
+    background.join(5)
+    importer.join(5)
+
+    assert fetch.calls == 2
+    assert refreshed[0].is_installed(['Microsoft.PowerToys'])
+    assert cache.index is refreshed[0]
+
+
+def test_snapshot_never_fetches(tmp_path):
+    fetch = BlockingFetch('Git.Git')
+    cache = InventoryCache(path=str(tmp_path / 'inventory.json'), fetch=fetch)
+
+    assert len(cache.snapshot()) == 0
+    assert fetch.calls == 0
+
+
+def test_first_fetch_does_not_hold_the_lock(tmp_path):
+    fetch = BlockingFetch('Git.Git')
+    cache = InventoryCache(path=str(tmp_path / 'inventory.json'), fetch=fetch)
+    first = threading.Thread(target=cache.get)
+    first.start()
+    assert fetch.started.wait(5)
+
+    marked = threading.Thread(target=cache.mark_updated, args=(['Git.Git'],))
+    marked.start()
+    marked.join(1)
+    assert not marked.is_alive()
+
+    fetch.release.set()
+    first.join(5)
+    assert cache.index.is_installed(['Git.Git'])
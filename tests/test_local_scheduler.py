@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+
+import pytest
+
+from scripts.core import executor
+from scripts.core.executor import CommandResult
+from scripts.core.local_scheduler import LocalInstallScheduler, LocalJob, installer_command
+
+
+class StandInInstaller:
+    # Plugged into executor.set_runner: records how many installers of each kind run at once
+    def __init__(self, duration=0.05, busy_once=()):
+        self.duration = duration
+        self.busy_once = set(busy_once)
+        self.lock = threading.Lock()
+        self.running = []
+        self.calls = []
+        self.max_exes = 0
+        self.exclusive_overlaps = 0
+
+    def __call__(self, command, shell, on_output):
+        path = command[2] if command[0] == 'msiexec' else command[0]
+        exclusive = command[0] == 'msiexec' or os.path.basename(path).startswith('installshield')
+        with self.lock:
+            self.calls.append(os.path.basename(path))
+            if exclusive and any(running_exclusive for running_exclusive in self.running):
+                self.exclusive_overlaps += 1
+            self.running.append(exclusive)
+            self.max_exes = max(self.max_exes, self.running.count(False))
+            busy = path in self.busy_once
+            self.busy_once.discard(path)
+        time.sleep(self.duration)
+        with self.lock:
+            self.running.remove(exclusive)
+        # 1618: another msiexec holds the Windows Installer mutex
+        return CommandResult(command, 1618 if busy else 0)
+
+
+@pytest.fixture
+def installers(tmp_path):
+    def make(name, content=b'MZ'):
+        folder = tmp_path / os.path.splitext(name)[0]
+        folder.mkdir()
+        path = folder / name
+        path.write_bytes(content)
+        return str(path)
+    paths = [make(f'nsis{index}.exe', b'MZ' + b'\0' * 64 + b'NullsoftInst') for index in range(6)]
+    paths += [make(f'msi{index}.msi', b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1') for index in range(3)]
+    paths += [make(f'installshield{index}.exe', b'MZ' + b'\0' * 64 + b'InstallShield') for index in range(2)]
+    return paths
+
+
+def run_scheduler(paths, runner, events=None, **options):
+    finished = {}
+    events = events if events is not None else []
+
+    def on_job_finished(name, success):
+        events.append(('finished', name))
+        finished[name] = success
+
+    executor.set_runner(runner)
+    try:
+        jobs = [LocalJob(os.path.basename(path), [path]) for path in paths]
+        LocalInstallScheduler(jobs, on_job_started=lambda name: events.append(('started', name)),
+                              on_job_finished=on_job_finished, verify=None, **options).run()
+    finally:
+        executor.set_runner(None)
+    return finished
+
+
+def test_exclusive_installers_never_overlap(installers):
+    runner = StandInInstaller()
+    finished = run_scheduler(installers, runner, max_workers=3)
+
+    assert all(finished.values()) and len(finished) == len(installers)
+    assert runner.exclusive_overlaps == 0
+
+
+def test_exe_parallelism_is_capped(installers):
+    runner = StandInInstaller()
+    run_scheduler(installers, runner, max_workers=2)
+
+    assert runner.max_exes == 2
+
+
+def test_busy_installer_is_retried(installers):
+    busy = installers[0]
+    runner = StandInInstaller(busy_once=[busy])
+    finished = run_scheduler(installers[:2], runner, busy_delay=0)
+
+    assert runner.calls.count(os.path.basename(busy)) == 2
+    assert finished[os.path.basename(busy)] is True
+
+
+def test_busy_installer_gives_up_after_the_retries(installers):
+    busy = installers[0]
+
+    class AlwaysBusy(StandInInstaller):
+        def __call__(self, command, shell, on_output):
+            self.busy_once.add(busy)
+            return super().__call__(command, shell, on_output)
+
+    runner = AlwaysBusy(duration=0)
+    finished = run_scheduler([busy], runner, busy_retries=2, busy_delay=0)
+
+    assert runner.calls.count(os.path.basename(busy)) == 3
+    assert finished[os.path.basename(busy)] is False
+
+
+def test_jobs_report_when_they_actually_start(installers):
+    msis = [path for path in installers if path.endswith('.msi')]
+    events = []
+    run_scheduler(msis, StandInInstaller(), events=events, max_workers=3)
+
+    # One msiexec at a time: each start only comes after the previous job finished
+    names = [os.path.basename(path) for path in msis]
+    assert events == [(event, name) for name in names for event in ('started', 'finished')]
+
+
+@pytest.mark.parametrize('path, literal', [
+    ('C:\\Programs\\Tools\\app.msix', "'C:\\Programs\\Tools\\app.msix'"),
+    ("C:\\Programs\\O'Brien's Tools\\app.msix", "'C:\\Programs\\O''Brien''s Tools\\app.msix'"),
+    ("C:\\Programs\\x'; Remove-Item C:\\ -Recurse; '\\app.msix", "'C:\\Programs\\x''; Remove-Item C:\\ -Recurse; ''\\app.msix'"),
+    ('C:\\Programs\\It\u2019s\\app.msix', "'C:\\Programs\\It\u2019\u2019s\\app.msix'"),
+])
+def test_msix_path_stays_one_literal(path, literal):
+    assert installer_command(path) == ['powershell', '-NoProfile', '-Command', f'Add-AppxPackage -Path {literal}']
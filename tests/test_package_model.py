@@ -0,0 +1,118 @@
+import os
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication
+
+from scripts.package_model import PackageListModel, PackageTabProxy, STATE_FILTERS, KeyRole
+
+GROUPS = [
+    ('Browsers', [('Firefox', 'Firefox', 'Mozilla.Firefox'), ('Chrome', 'Chrome', 'Google.Chrome'), ('Brave', 'Brave', 'Brave.Brave')]),
+    ('Development', [('Git', 'Git', 'Git.Git'), ('VS Code', 'Visual Studio Code', 'Microsoft.VisualStudioCode')]),
+]
+
+# key -> (installed, update available)
+INVENTORY = {
+    'Firefox': (True, True),
+    'Chrome': (False, False),
+    'Brave': (False, False),
+    'Git': (True, False),
+    'VS Code': (False, False),
+}
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def model(app):
+    model = PackageListModel()
+    model.load(GROUPS)
+    model.update_inventory(INVENTORY)
+    return model
+
+
+def shown(proxy):
+    return [proxy.data(proxy.index(row), KeyRole) for row in range(proxy.rowCount())]
+
+
+def row_of(proxy, key):
+    return shown(proxy).index(key)
+
+
+def tick(proxy, key, checked=True):
+    proxy.setData(proxy.index(row_of(proxy, key)), Qt.Checked if checked else Qt.Unchecked, Qt.CheckStateRole)
+
+
+def test_state_filter_combines_with_the_search(model):
+    proxy = PackageTabProxy(model, 'manage')
+
+    proxy.set_filter('', STATE_FILTERS['Installed only'])
+    assert shown(proxy) == ['Browsers', 'Firefox', 'Development', 'Git']
+
+    proxy.set_filter('fire', STATE_FILTERS['Installed only'])
+    assert shown(proxy) == ['Browsers', 'Firefox']
+
+    proxy.set_filter('visual', STATE_FILTERS['Not installed'])
+    assert shown(proxy) == ['Development', 'VS Code']
+
+    proxy.set_filter('visual', STATE_FILTERS['Installed only'])
+    assert shown(proxy) == []
+
+    proxy.set_filter('', STATE_FILTERS['Update available'])
+    assert shown(proxy) == ['Browsers', 'Firefox']
+
+
+def test_state_filter_follows_inventory_changes(model):
+    proxy = PackageTabProxy(model, 'manage')
+    proxy.set_filter('', STATE_FILTERS['Installed only'])
+
+    model.update_inventory({'Git': (False, False), 'Brave': (True, False)})
+
+    assert shown(proxy) == ['Browsers', 'Firefox', 'Brave']
+
+
+def test_hidden_rows_keep_their_check_state(model):
+    proxy = PackageTabProxy(model, 'install')
+    tick(proxy, 'Chrome')
+    tick(proxy, 'VS Code')
+
+    proxy.set_filter('chrome')
+    assert shown(proxy) == ['Browsers', 'Chrome']
+    assert proxy.checked_keys() == ['Chrome', 'VS Code']
+
+    # Select All and unticking only touch what is shown
+    proxy.set_filter('brave')
+    proxy.set_all_checked(True)
+    proxy.set_filter('chrome')
+    tick(proxy, 'Chrome', False)
+
+    proxy.set_filter('')
+    assert proxy.checked_keys() == ['Brave', 'VS Code']
+    assert proxy.data(proxy.index(row_of(proxy, 'VS Code')), Qt.CheckStateRole) == Qt.Checked
+
+
+def test_category_tick_reaches_the_shown_selectable_programs(model):
+    proxy = PackageTabProxy(model, 'install', checkable_categories=True)
+    browsers = proxy.index(row_of(proxy, 'Browsers'))
+
+    proxy.setData(browsers, Qt.Checked, Qt.CheckStateRole)
+    # Firefox is installed, so the install tab can't tick it
+    assert proxy.checked_keys() == ['Chrome', 'Brave']
+    assert proxy.data(browsers, Qt.CheckStateRole) == Qt.Checked
+
+    proxy.setData(browsers, Qt.Unchecked, Qt.CheckStateRole)
+    proxy.set_filter('brave')
+    proxy.setData(proxy.index(row_of(proxy, 'Browsers')), Qt.Checked, Qt.CheckStateRole)
+    assert proxy.checked_keys() == ['Brave']
+
+    # The header shows checked once every program under it that is visible and selectable is
+    proxy.set_filter('')
+    assert proxy.data(proxy.index(row_of(proxy, 'Browsers')), Qt.CheckStateRole) == Qt.Unchecked
+    tick(proxy, 'Chrome')
+    assert proxy.data(proxy.index(row_of(proxy, 'Browsers')), Qt.CheckStateRole) == Qt.Checked
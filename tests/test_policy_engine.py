@@ -0,0 +1,53 @@
+import pytest
+
+from scripts.core import executor, policy_engine, registry_backend
+from scripts.core.executor import CommandResult
+from scripts.core.registry_backend import FakeRegistryBackend
+
+POLICY = {
+    'regPath': 'HKLM:\\SOFTWARE\\Policies\\Microsoft\\Windows\\Windows Search',
+    'regName': 'AllowCortana', 'regValue': 0, 'regValueRevert': 1, 'type': 'DWORD',
+}
+
+
+def run_with_gpupdate(monkeypatch, backend, returncode):
+    commands = []
+
+    def runner(command, shell, on_output):
+        commands.append(command)
+        return CommandResult(command, returncode)
+
+    monkeypatch.setattr(policy_engine, 'load_policies', lambda: [POLICY])
+    executor.set_runner(runner)
+    try:
+        return policy_engine.run_policies('apply', backend), commands
+    finally:
+        executor.set_runner(None)
+
+
+def test_failed_gpupdate_keeps_the_policy_results(monkeypatch):
+    backend = FakeRegistryBackend()
+    (results, refresh_error), commands = run_with_gpupdate(monkeypatch, backend, 1)
+
+    assert [result.status for result in results] == ['written']
+    assert refresh_error == 'gpupdate failed: Exit code 1'
+    assert commands == [['gpupdate', '/force']]
+    assert backend.read_value('HKLM', 'SOFTWARE\\Policies\\Microsoft\\Windows\\Windows Search', 'AllowCortana')[0] == 0
+
+
+def test_gpupdate_is_skipped_when_nothing_changed(monkeypatch):
+    backend = FakeRegistryBackend({'HKLM': {'SOFTWARE\\Policies\\Microsoft\\Windows\\Windows Search': {'AllowCortana': 0}}})
+    (results, refresh_error), commands = run_with_gpupdate(monkeypatch, backend, 1)
+
+    assert [result.status for result in results] == ['unchanged']
+    assert refresh_error is None
+    assert commands == []
+
+
+def test_no_registry_is_an_error_not_a_fake(monkeypatch):
+    monkeypatch.setattr(registry_backend, 'winreg', None)
+    monkeypatch.setattr(registry_backend, '_backend', None)
+    monkeypatch.setattr(policy_engine, 'load_policies', lambda: [POLICY])
+
+    with pytest.raises(RuntimeError, match='registry is not available'):
+        policy_engine.run_policies('apply')
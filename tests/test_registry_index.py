@@ -0,0 +1,73 @@
+from scripts.core import registry_index, uninstaller
+from scripts.core.registry_backend import FakeRegistryBackend
+from scripts.core.registry_index import UNINSTALL_KEY, UNINSTALL_KEY_WOW64, build_uninstall_index
+
+PRODUCT_CODE = '{23170F69-40C1-2702-2301-000001000000}'
+
+HIVES = {
+    'HKLM': {
+        # 64-bit view
+        f'{UNINSTALL_KEY}\\{PRODUCT_CODE}': {
+            'DisplayName': '7-Zip 23.01 (x64 edition)', 'DisplayVersion': '23.01.00.0',
+            'UninstallString': f'MsiExec.exe /I{PRODUCT_CODE}',
+        },
+        f'{UNINSTALL_KEY}\\Mozilla Firefox 125.0.1 (x64 en-US)': {
+            'DisplayName': 'Mozilla Firefox (x64 en-US)', 'DisplayVersion': '125.0.1',
+            'UninstallString': '"C:\\Program Files\\Mozilla Firefox\\uninstall\\helper.exe"',
+            'QuietUninstallString': '"C:\\Program Files\\Mozilla Firefox\\uninstall\\helper.exe" /S',
+        },
+        f'{UNINSTALL_KEY}\\KB5034441': {'UninstallString': 'no DisplayName, not listed'},
+        # 32-bit view
+        f'{UNINSTALL_KEY_WOW64}\\{PRODUCT_CODE.lower()}': {
+            'DisplayName': '7-Zip 23.01 (x64 edition)',
+            'QuietUninstallString': f'MsiExec.exe /X{PRODUCT_CODE} /qn',
+        },
+        f'{UNINSTALL_KEY_WOW64}\\Notepad++': {
+            'DisplayName': 'Notepad++ (32-bit x86)', 'DisplayVersion': '8.6.5',
+            'UninstallString': '"C:\\Program Files (x86)\\Notepad++\\uninstall.exe"',
+        },
+    },
+    'HKCU': {
+        f'{UNINSTALL_KEY}\\Spotify': {
+            'DisplayName': 'Spotify', 'DisplayVersion': '1.2.31',
+            'UninstallString': '"C:\\Users\\me\\AppData\\Roaming\\Spotify\\Spotify.exe" /uninstall',
+        },
+        # Per-user copy of a machine-wide install, listed under the same name
+        f'{UNINSTALL_KEY}\\Mozilla Firefox': {
+            'DisplayName': 'Mozilla Firefox (x64 en-US)', 'DisplayVersion': '124.0.2',
+            'UninstallString': 'per-user uninstaller',
+        },
+    },
+}
+
+
+def test_index_covers_all_three_roots():
+    index = build_uninstall_index(FakeRegistryBackend(HIVES))
+
+    by_name = {entry['DisplayName']: entry for entry in index.entries}
+    assert set(by_name) == {'7-Zip 23.01 (x64 edition)', 'Mozilla Firefox (x64 en-US)', 'Notepad++ (32-bit x86)', 'Spotify'}
+    assert by_name['Notepad++ (32-bit x86)']['key'] == f'{UNINSTALL_KEY_WOW64}\\Notepad++'
+    assert (by_name['Spotify']['hive'], by_name['Spotify']['ProductCode']) == ('HKCU', '')
+
+
+def test_duplicates_are_merged_by_product_code_then_name():
+    index = build_uninstall_index(FakeRegistryBackend(HIVES))
+
+    assert len(index) == 4
+    seven_zip = index.find('7-Zip')
+    # The 64-bit entry wins, the WOW6432Node copy only fills in what it lacks
+    assert seven_zip['key'] == f'{UNINSTALL_KEY}\\{PRODUCT_CODE}'
+    assert seven_zip['ProductCode'] == PRODUCT_CODE
+    assert seven_zip['QuietUninstallString'] == f'MsiExec.exe /X{PRODUCT_CODE} /qn'
+    firefox = index.find_all('Firefox')
+    assert [(entry['hive'], entry['DisplayVersion']) for entry in firefox] == [('HKLM', '125.0.1')]
+
+
+def test_quiet_uninstall_string_is_preferred():
+    registry_index.set_backend(FakeRegistryBackend(HIVES))
+    try:
+        assert uninstaller.get_uninstall_command('Firefox') == '"C:\\Program Files\\Mozilla Firefox\\uninstall\\helper.exe" /S'
+        assert uninstaller.get_uninstall_command('7-Zip') == f'MsiExec.exe /X{PRODUCT_CODE} /qn'
+        assert uninstaller.get_uninstall_command('Spotify') == HIVES['HKCU'][f'{UNINSTALL_KEY}\\Spotify']['UninstallString']
+    finally:
+        registry_index.set_backend(None)
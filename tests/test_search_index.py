@@ -0,0 +1,43 @@
+from scripts.core.search_index import PrefixIndex, tokenize
+
+DOCUMENTS = [
+    (0, ('Mozilla Firefox', 'Mozilla.Firefox', 'Browsers')),
+    (1, ('Mozilla Thunderbird', 'Mozilla.Thunderbird', 'Communication')),
+    (2, ('Google Chrome', 'Google.Chrome', 'Browsers')),
+    (3, ('Visual Studio Code', 'Microsoft.VisualStudioCode', 'Development')),
+    (4, ('Microsoft Visual C++ 2015-2022 Redistributable (x64)', 'Microsoft.VCRedist.2015+.x64', 'Runtimes')),
+]
+
+
+def test_tokenize_splits_ids_and_punctuation():
+    assert tokenize('Mozilla.Firefox') == ['mozilla', 'firefox']
+    assert tokenize('  Visual_C++ 2015-2022 ') == ['visual', 'c', '2015', '2022']
+    assert tokenize('') == []
+
+
+def test_every_term_has_to_match():
+    index = PrefixIndex(DOCUMENTS)
+
+    assert index.search('mozilla') == {0, 1}
+    assert index.search('moz fire') == {0}
+    # Terms are prefixes in any order, across name, Id and category
+    assert index.search('brow goo') == {2}
+    assert index.search('mozilla.thun') == {1}
+    assert index.search('micro visual 2015') == {4}
+    assert index.search('microsoft visualstudio') == {3}
+
+
+def test_unmatched_and_empty_queries():
+    index = PrefixIndex(DOCUMENTS)
+
+    assert index.search('mozilla chrome') == set()
+    assert index.search('zzz') == set()
+    # No terms means no filter, not an empty result
+    assert index.search('') is None
+    assert index.search(' .- ') is None
+
+
+def test_repeated_terms_count_once():
+    index = PrefixIndex(DOCUMENTS)
+
+    assert index.search('fire fire FIREFOX') == {0}
@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import threading
+import zipfile
+
+import pytest
+
+from scripts.core.winget_catalog import CatalogStore, SOURCE_INDEX_MEMBER, read_source_index
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+EXPECTED = {
+    'Mozilla.Firefox': {'name': 'Mozilla Firefox', 'publisher': 'mozilla', 'moniker': 'firefox', 'version': '125.0.1', 'tags': 'browser web'},
+    'Git.Git': {'name': 'Git', 'publisher': 'the git development community', 'moniker': 'git', 'version': '2.44.0', 'tags': 'vcs'},
+    'Microsoft.VisualStudioCode': {
+        'name': 'Microsoft Visual Studio Code', 'publisher': 'microsoft', 'moniker': 'vscode', 'version': '1.88.1', 'tags': 'editor developer-tools',
+    },
+    '7zip.7zip': {'name': '7-Zip', 'publisher': '7zip', 'moniker': '7zip', 'version': '23.01', 'tags': ''},
+}
+
+
+def build_index(tmp_path, schema):
+    path = str(tmp_path / f'index_v{schema}.db')
+    with open(os.path.join(FIXTURES, f'source_index_v{schema}.sql'), 'r', encoding='utf-8') as file:
+        script = file.read()
+    connection = sqlite3.connect(path)
+    connection.executescript(script)
+    connection.close()
+    return path
+
+
+@pytest.fixture(params=[1, 2])
+def source_index(request, tmp_path):
+    return build_index(tmp_path, request.param)
+
+
+@pytest.fixture
+def store(tmp_path, source_index):
+    store = CatalogStore(str(tmp_path / 'cache' / 'catalog.db'))
+    store.import_source_index(source_index)
+    yield store
+    store.close()
+
+
+def test_read_source_index(source_index):
+    packages = {package.pop('id'): package for package in read_source_index(source_index)}
+
+    assert packages == EXPECTED
+
+
+def test_read_source_index_from_msix(tmp_path):
+    msix = str(tmp_path / 'source2.msix')
+    with zipfile.ZipFile(msix, 'w') as archive:
+        archive.write(build_index(tmp_path, 2), SOURCE_INDEX_MEMBER)
+
+    assert {package['id'] for package in read_source_index(msix)} == set(EXPECTED)
+
+
+def test_read_rejects_other_databases(tmp_path):
+    path = str(tmp_path / 'other.db')
+    sqlite3.connect(path).execute('CREATE TABLE unrelated(x)')
+
+    with pytest.raises(ValueError):
+        read_source_index(path)
+
+
+def test_search(store):
+    assert len(store) == 4
+    assert store.search('fire')[0]['id'] == 'Mozilla.Firefox'
+    # Moniker, tag and publisher hits, and every term has to match
+    assert [package['id'] for package in store.search('vscode')] == ['Microsoft.VisualStudioCode']
+    assert [package['id'] for package in store.search('developer')] == ['Microsoft.VisualStudioCode']
+    assert [package['id'] for package in store.search('microsoft code')] == ['Microsoft.VisualStudioCode']
+    assert store.search('microsoft firefox') == []
+    assert store.search('  ') == []
+    assert store.get('git.git')['version'] == '2.44.0'
+
+
+def test_search_without_full_text_index(store):
+    store.search('git')
+    store.has_fts = False
+
+    assert [package['id'] for package in store.search('visual stu')] == ['Microsoft.VisualStudioCode']
+
+
+def test_search_answers_from_the_old_catalog_during_an_import(store):
+    halfway = threading.Event()
+    release = threading.Event()
+
+    def packages():
+        yield {'id': 'Contoso.Tool', 'name': 'Contoso Tool'}
+        halfway.set()
+        release.wait(5)
+
+    importer = threading.Thread(target=store.import_packages, args=(packages(),))
+    importer.start()
+    try:
+        assert halfway.wait(5)
+        # The import is mid-transaction on its own file; searching must not wait for it
+        assert [package['id'] for package in store.search('git')] == ['Git.Git']
+    finally:
+        release.set()
+        importer.join(5)
+
+    assert len(store) == 1
+    assert store.search('git') == []
+    assert store.search('contoso')[0]['id'] == 'Contoso.Tool'
+    assert not os.path.exists(f"{store.path}.tmp")
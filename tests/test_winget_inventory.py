@@ -0,0 +1,62 @@
+import os
+
+from scripts.core.winget_inventory import InstalledIndex, merge_inventory, parse_winget_export, parse_winget_list
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8', newline='') as file:
+        return file.read()
+
+
+def test_parse_list_keeps_truncated_ids_as_printed():
+    listed = parse_winget_list(read_fixture('winget_list_truncated.txt'))
+
+    assert set(listed) == {
+        'Git.Git', 'GitHub.GitLFS', 'Microsoft.DotNet.SDK…', 'Microsoft.VCRedist.2…', 'Mozilla.Firefox', 'ARP\\Machine\\X64\\{0C3…',
+    }
+    assert listed['Mozilla.Firefox'] == {
+        'name': 'Mozilla Firefox (x64 en-US)', 'id': 'Mozilla.Firefox', 'version': '124.0.2', 'available': '125.0.1', 'source': 'winget',
+    }
+    assert listed['ARP\\Machine\\X64\\{0C3…']['source'] == ''
+
+
+def test_truncated_ids_never_match_without_export():
+    index = InstalledIndex(merge_inventory({}, parse_winget_list(read_fixture('winget_list_truncated.txt'))))
+
+    assert index.is_installed(['Git.Git'])
+    for package_id in ('Microsoft.DotNet.SDK.6', 'Microsoft.DotNet.SDK.8', 'Microsoft.VCRedist.2015+.x64'):
+        assert package_id not in index
+    # Still there for the lookups by display name
+    assert index.get_by_name('Contoso Line of Business Client') is not None
+
+
+def test_export_supplies_full_ids():
+    exported = parse_winget_export(read_fixture('winget_export.json'))
+    index = InstalledIndex(merge_inventory(exported, parse_winget_list(read_fixture('winget_list_truncated.txt'))))
+
+    assert index.is_installed(['Microsoft.DotNet.SDK.8'])
+    assert 'Microsoft.DotNet.SDK.7' not in index
+    assert index.is_installed(['Microsoft.VCRedist.2015+.x64', 'Microsoft.VCRedist.2015+.x86'])
+    assert 'Microsoft.VCRedist.2015+.arm64' not in index
+    # The only SDK row resolves to the only exported SDK and gets its name from winget list
+    assert index.get('microsoft.dotnet.sdk.8')['name'] == 'Microsoft .NET SDK 8.0.204 (x64)'
+    assert index.has_update(['Mozilla.Firefox'])
+    assert not index.has_update(['Git.Git'])
+
+
+def test_ambiguous_truncated_row_is_not_attributed():
+    exported = parse_winget_export(read_fixture('winget_export.json'))
+    index = InstalledIndex(merge_inventory(exported, parse_winget_list(read_fixture('winget_list_truncated.txt'))))
+
+    # Both VCRedist rows print as "Microsoft.VCRedist.2…", neither export entry takes their columns
+    assert not index.has_update(['Microsoft.VCRedist.2015+.x64'])
+    assert index.get('Microsoft.VCRedist.2015+.x86')['name'] == ''
+
+
+def test_get_by_name_is_exact():
+    index = InstalledIndex(parse_winget_list(read_fixture('winget_list_truncated.txt')))
+
+    assert index.get_by_name('git')['id'] == 'Git.Git'
+    assert index.get_by_name('Git LFS') is None
@@ -0,0 +1,35 @@
+import pytest
+
+from scripts.core.winget_progress import parse_fraction
+
+
+@pytest.mark.parametrize('line, expected', [
+    # Download progress, as winget redraws it
+    ('  ██████▒▒▒▒▒▒▒▒▒▒▒▒▒▒▒▒▒▒▒▒▒▒▒▒  12.5 MB / 40.0 MB', 0.3125),
+    ('12.5 MB / 40 MB', 0.3125),
+    ('12,5 MB / 40 MB', 0.3125),
+    ('512 KB / 2 MB', 0.25),
+    ('1.5 GB / 1.5 GB', 1.0),
+    ('300 B/600 B', 0.5),
+    # Byte counts that overshoot the total are capped
+    ('41 MB / 40 MB', 1.0),
+    # Percentages
+    ('  45%', 0.45),
+    ('100 %', 1.0),
+    ('0%', 0.0),
+    ('250%', 1.0),
+    # No progress on the line
+    ('', None),
+    ('Found Git [Git.Git] Version 2.44.0', None),
+    ('Successfully verified installer hash', None),
+    ('0 B / 0 B', None),
+    ('1.2.3 MB / 4 MB', None),
+    ('MB / MB', None),
+    ('  -\\|/', None),
+])
+def test_parse_fraction(line, expected):
+    fraction = parse_fraction(line)
+    if expected is None:
+        assert fraction is None
+    else:
+        assert fraction == pytest.approx(expected)